@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Adaptive Strategie-Wahl pro PDF-Seite
+Jede Seite wird vorab günstig mit pdfminer geprüft (nur Content-Stream, keine Layout-Analyse):
+- Seiten mit sauberer Textebene        -> "fast" (pdfminer, kein Layout-Modell, kein OCR)
+- Scans, bildlastige Seiten, Tabellen  -> "hi_res" (Layout-Modell + OCR)
+Zusammenhängende Seiten mit gleicher Strategie werden als Seitenbereich im Prozess-Pool
+partitioniert und wie bei pdf_parallel in Original-Reihenfolge zusammengeführt.
+
+Konfiguration (Umgebungsvariablen):
+- ADAPTIVE_MIN_TEXT_CHARS:     Mindestanzahl Textzeichen für "fast"
+- ADAPTIVE_MAX_IMAGE_COVERAGE: Max. Bildanteil an der Seitenfläche für "fast" (0..1)
+- ADAPTIVE_MAX_RULING_LINES:   Max. Linien/Rechtecke für "fast" (mehr = vermutlich Tabelle)
+- ADAPTIVE_MIN_FAST_RUN:       Kürzere "fast"-Abschnitte zwischen hi_res-Seiten laufen mit hi_res
+- ADAPTIVE_SCAN_STRATEGY:      Strategie für Scan-/Bildseiten (hi_res oder ocr_only)
+- ADAPTIVE_MIN_IMAGE_COVERAGE: Min. Bildanteil an der Seitenfläche, ab dem eine Textseite mit
+                               Bild-Extraktion (include_images) über "hi_res" läuft (0..1)
+
+Mit Bild-Extraktion (include_images) laufen Seiten mit nennenswerter Bildfläche über "hi_res" -
+"fast" und "ocr_only" extrahieren keine Bilder. Kleine Bilder auf Textseiten (Briefkopf-Logo,
+Icons) bleiben dabei bewusst auf "fast", sonst liefe jedes Dokument mit Logo komplett über hi_res.
+"""
+
+import os
+import time
+
+from pdf_parallel import PDF_PARALLEL_MIN_PAGES, PDF_PARALLEL_FIRST_CHUNK_PAGES, plan_page_ranges, pdf_range_writer, iter_page_range_partition
+
+ADAPTIVE_MIN_TEXT_CHARS = int(os.environ.get("ADAPTIVE_MIN_TEXT_CHARS", "50"))
+ADAPTIVE_MAX_IMAGE_COVERAGE = float(os.environ.get("ADAPTIVE_MAX_IMAGE_COVERAGE", "0.5"))
+ADAPTIVE_MAX_RULING_LINES = int(os.environ.get("ADAPTIVE_MAX_RULING_LINES", "10"))
+ADAPTIVE_MIN_FAST_RUN = int(os.environ.get("ADAPTIVE_MIN_FAST_RUN", "2"))
+ADAPTIVE_SCAN_STRATEGY = os.environ.get("ADAPTIVE_SCAN_STRATEGY", "hi_res")
+ADAPTIVE_MIN_IMAGE_COVERAGE = float(os.environ.get("ADAPTIVE_MIN_IMAGE_COVERAGE", "0.05"))
+
+FAST_STRATEGY = "fast"
+
+
+def classify_pdf_pages(file_path, include_tables=True, include_images=False):
+    """
+    Bestimmt die Strategie je Seite anhand von Textzeichen, Bildfläche und Linien
+    include_images=True: Seiten mit Bildanteil ab ADAPTIVE_MIN_IMAGE_COVERAGE "hi_res" (Bild-Extraktion)
+
+    Returns:
+        Liste von {"page", "strategy", "text_chars", "image_count", "image_coverage", "ruling_lines"}
+    """
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.layout import LTChar, LTImage, LTCurve, LTContainer
+
+    resource_manager = PDFResourceManager(caching=True)
+    # laparams=None: keine Layout-Analyse, nur die rohen Zeichen/Bilder/Linien der Seite
+    device = PDFPageAggregator(resource_manager, laparams=None)
+    interpreter = PDFPageInterpreter(resource_manager, device)
+
+    page_routes = []
+    with open(file_path, "rb") as f:
+        for page_number, page in enumerate(PDFPage.get_pages(f), start=1):
+            interpreter.process_page(page)
+            layout = device.get_result()
+
+            text_chars = 0
+            image_area = 0.0
+            image_count = 0
+            ruling_lines = 0
+            stack = list(layout)
+            while stack:
+                obj = stack.pop()
+                if isinstance(obj, LTChar):
+                    if not obj.get_text().isspace():
+                        text_chars += 1
+                elif isinstance(obj, LTImage):
+                    image_area += obj.width * obj.height
+                    image_count += 1
+                elif isinstance(obj, LTCurve):
+                    ruling_lines += 1
+                elif isinstance(obj, LTContainer):
+                    stack.extend(obj)
+
+            page_area = max(1.0, layout.width * layout.height)
+            image_coverage = min(1.0, image_area / page_area)
+
+            if include_images and image_count and image_coverage >= ADAPTIVE_MIN_IMAGE_COVERAGE:
+                # Nur hi_res extrahiert Bilder - kleine Logos/Icons halten die Seite nicht auf hi_res
+                strategy = "hi_res"
+            elif text_chars < ADAPTIVE_MIN_TEXT_CHARS or image_coverage >= ADAPTIVE_MAX_IMAGE_COVERAGE:
+                strategy = ADAPTIVE_SCAN_STRATEGY
+            elif include_tables and ruling_lines > ADAPTIVE_MAX_RULING_LINES:
+                # Tabellenstruktur braucht das Layout-Modell
+                strategy = "hi_res"
+            else:
+                strategy = FAST_STRATEGY
+
+            page_routes.append({
+                "page": page_number,
+                "strategy": strategy,
+                "text_chars": text_chars,
+                "image_count": image_count,
+                "image_coverage": round(image_coverage, 3),
+                "ruling_lines": ruling_lines,
+            })
+    return page_routes
+
+
+def _group_routes(strategies):
+    """
+    Fasst aufeinanderfolgende Seiten gleicher Strategie zusammen -> [[start, end, strategy], ...]
+    """
+    groups = []
+    for page_number, strategy in enumerate(strategies, start=1):
+        if groups and groups[-1][2] == strategy:
+            groups[-1][1] = page_number
+        else:
+            groups.append([page_number, page_number, strategy])
+    return groups
+
+
+def plan_adaptive_ranges(page_routes, workers=1, split_ranges=True, min_fast_run=ADAPTIVE_MIN_FAST_RUN):
+    """
+    Plant Seitenbereiche mit eigener Strategie
+
+    - Kurze "fast"-Abschnitte zwischen hi_res-Seiten werden mit hi_res verarbeitet
+      (ein eigener Job pro Einzelseite kostet mehr als er spart)
+    - split_ranges=True: lange Abschnitte zusätzlich für die Worker aufteilen
+
+    Returns:
+        Liste von (start_page, end_page, strategy)
+    """
+    strategies = [route["strategy"] for route in page_routes]
+    for start, end, strategy in _group_routes(strategies):
+        if strategy != FAST_STRATEGY or end - start + 1 >= min_fast_run:
+            continue
+        neighbours = [strategies[i - 1] for i in (start - 1, end + 1) if 1 <= i <= len(strategies)]
+        if neighbours:
+            for page_number in range(start, end + 1):
+                strategies[page_number - 1] = neighbours[0]
+
+    page_ranges = []
+    for start, end, strategy in _group_routes(strategies):
+        length = end - start + 1
+        if split_ranges and length >= PDF_PARALLEL_MIN_PAGES:
+            # Erster Abschnitt mit kleinem Anfangsbereich (erste Elemente früh sichtbar)
+            first_chunk_pages = PDF_PARALLEL_FIRST_CHUNK_PAGES if start == 1 else None
+            for sub_start, sub_end in plan_page_ranges(length, workers, first_chunk_pages=first_chunk_pages):
+                page_ranges.append((start + sub_start - 1, start + sub_end - 1, strategy))
+        else:
+            page_ranges.append((start, end, strategy))
+    return page_ranges
+
+
+def iter_adaptive_partition(file_path, **kwargs):
+    """
+    Adaptive Partitionierung einer PDF als Event-Generator (wie iter_page_range_partition)
+    Das abschließende Ergebnis enthält adaptive_pages = {"fast": n, "hi_res": m, ...}
+
+    Raises:
+        Exception, wenn die Seiten-Klassifikation nicht möglich ist (Aufrufer fällt auf "auto" zurück)
+    """
+    from processing_pool import get_partition_runner
+
+    classify_start = time.time()
+    page_routes = classify_pdf_pages(
+        file_path,
+        include_tables=kwargs.get("include_tables", True),
+        include_images=kwargs.get("include_images", True),
+    )
+    classify_time = time.time() - classify_start
+    if not page_routes:
+        raise ValueError("PDF enthält keine Seiten")
+
+    runner = get_partition_runner()
+    page_ranges = plan_adaptive_ranges(
+        page_routes,
+        workers=runner.workers,
+        split_ranges=kwargs.get("parallel_pages", True),
+    )
+
+    adaptive_pages = {}
+    for start, end, strategy in page_ranges:
+        adaptive_pages[strategy] = adaptive_pages.get(strategy, 0) + end - start + 1
+
+    for event in iter_page_range_partition(
+        file_path, "auto", len(page_routes), pdf_range_writer(file_path), runner,
+        "open_source_pdf_adaptive", page_ranges=page_ranges, **kwargs
+    ):
+        if event["event"] == "done":
+            event["result"]["adaptive_pages"] = adaptive_pages
+            event["result"]["adaptive_classify_time"] = classify_time
+            event["result"]["page_routes"] = page_routes
+        yield event
+
+
+def partition_pdf_adaptive(file_path, **kwargs):
+    """
+    Partitioniert eine PDF mit Strategie-Wahl pro Seite
+
+    Returns:
+        Ergebnis-Dict wie process_with_open_source_library
+    """
+    result = None
+    for event in iter_adaptive_partition(file_path, **kwargs):
+        if event["event"] == "done":
+            result = event["result"]
+    return result
@@ -36,28 +36,50 @@ def setup_standard_picture_partitioner():
         return False
 
     class StandardPowerPointPicturePartitioner:  # type: ignore
-        """Einfache Bild-Extraktion: Bild-Bytes -> Base64 + Image Element"""
+        """Einfache Bild-Extraktion: Bild-Part -> Bild-Speicher (image_blob_id) + Image Element
+        ✅ NEU: Kein Base64 beim Partitionieren - Base64 entsteht erst beim Zugriff
+        (get_image_base64). Auf mehreren Folien verwendete Bild-Parts werden nur einmal abgelegt.
+        """
+        @classmethod
+        def _image_part(cls, picture):
+            # Bild-Part direkt über die Relationship holen: picture.image baut bei jedem
+            # Zugriff ein neues Image-Objekt, der Part ist pro Präsentation eindeutig
+            try:
+                rId = picture._element.blip_rId
+                return picture.part.related_part(rId) if rId else None
+            except Exception:
+                return None
+
         @classmethod
         def iter_elements(cls, picture, opts):
             try:
-                if hasattr(picture, 'image') and picture.image and getattr(picture.image, 'blob', None):
-                    blob = picture.image.blob
-                    b64 = _base64.b64encode(blob).decode('utf-8')
-                    mime_type = 'image/jpeg'
-                    if getattr(picture.image, 'content_type', None):
-                        mime_type = picture.image.content_type
-                    elif getattr(picture.image, 'ext', None):
-                        ext = picture.image.ext.lower()
-                        if ext == 'png':
-                            mime_type = 'image/png'
-                        elif ext == 'gif':
-                            mime_type = 'image/gif'
-                    md = _UElementMetadata()
-                    md.image_base64 = b64
-                    md.image_mime_type = mime_type
-                    md.page_number = getattr(opts, 'page_number', 1)
-                    alt_text = getattr(picture, 'name', None) or 'PowerPoint-Bild'
-                    yield _UImage(text=alt_text, metadata=md)
+                from image_store import store_image_part
+
+                image_part = cls._image_part(picture)
+                if image_part is None:
+                    if not (hasattr(picture, 'image') and picture.image and getattr(picture.image, 'blob', None)):
+                        return
+                    image_part = picture.image
+                mime_type = 'image/jpeg'
+                if getattr(image_part, 'content_type', None):
+                    mime_type = image_part.content_type
+                elif getattr(image_part, 'ext', None):
+                    ext = image_part.ext.lower()
+                    if ext == 'png':
+                        mime_type = 'image/png'
+                    elif ext == 'gif':
+                        mime_type = 'image/gif'
+                md = _UElementMetadata()
+                blob_id = store_image_part(image_part)
+                if blob_id is not None:
+                    md.image_blob_id = blob_id
+                else:
+                    # Bild-Speicher deaktiviert: wie bisher Base64 im Element
+                    md.image_base64 = _base64.b64encode(image_part.blob).decode('utf-8')
+                md.image_mime_type = mime_type
+                md.page_number = getattr(opts, 'page_number', 1)
+                alt_text = getattr(picture, 'name', None) or 'PowerPoint-Bild'
+                yield _UImage(text=alt_text, metadata=md)
             except Exception as e:  # pragma: no cover
                 print(f"Bild-Extraktion Fehler (PicturePartitioner): {e}")
                 return
@@ -79,7 +101,7 @@ try:
     from unstructured.partition.pptx import partition_pptx
     from unstructured.partition.docx import partition_docx
     from unstructured.partition.xlsx import partition_xlsx
-    from unstructured.staging.base import elements_to_md, elements_to_json, elements_to_text, elements_to_dicts, elements_from_json
+    from unstructured.staging.base import elements_to_md, elements_to_text, elements_to_dicts, elements_from_json
     from unstructured.partition.html.convert import elements_to_html
     UNSTRUCTURED_AVAILABLE = True
     IMPORT_ERROR = None
@@ -87,6 +109,47 @@ except ImportError as e:
     UNSTRUCTURED_AVAILABLE = False
     IMPORT_ERROR = str(e)
 
+# Persistenter Ergebnis-Cache (content-adressiert, cache/-Volume)
+from result_cache import get_result_cache, hash_file_content
+# Prozess-Pool für Partitionierungs-Jobs (vorgewärmte Worker-Prozesse)
+from processing_pool import get_partition_pool, run_partition_job
+# Seitenbereich-parallele Partitionierung (PDF-Seiten, PPTX-Folien)
+from pdf_parallel import partition_ranges_parallel, plan_range_partition, iter_page_range_partition
+# Inhaltsbasierte Dateityp-Erkennung (Magic Bytes) + Vorab-Validierung
+from file_sniffer import sniff_file_type, inspect_file
+# Element-Speicher mit Auslagerung auf Disk (große Dokumente in session_state)
+from element_store import to_element_store, load_element_dicts, iter_element_dicts
+# Bereitschafts-Marker des Modell-Warm-ups
+from warmup import read_ready_marker
+# Adaptive Strategie pro PDF-Seite (fast für Textseiten, hi_res nur für Scans/Bilder/Tabellen)
+from adaptive_strategy import partition_pdf_adaptive, iter_adaptive_partition
+# Content-adressierter Bild-Speicher (Bild-Bytes einmal auf Disk, Elemente tragen image_blob_id)
+from image_store import (
+    store_element_images, get_image_base64, get_image_bytes, get_image_hash, has_image, missing_blobs,
+    iter_image_bytes, zip_compress_type, inline_image_data, inline_images_in_dicts,
+    pin_element_images, refresh_image_pin
+)
+# Export-Pakete (ZIP) direkt auf Disk schreiben statt im Speicher
+from package_writer import new_package_path, remove_package, package_available
+# Persistenter Cache für Vision-Bildbeschreibungen (SQLite im logs/-Volume)
+from vision_cache import get_vision_cache
+# Format-Cache für generierte Ausgaben (überlebt Streamlit-Reruns)
+from output_cache import OutputCache, fingerprint_elements
+# Hervorhebungen + Links in einem Scan annotieren (Aho-Corasick)
+from text_annotation import annotate_text
+
+# Bei Änderung von Prompt oder Modell erhöhen -> zwischengespeicherte Beschreibungen werden neu erzeugt
+VISION_PROMPT_VERSION = "1"
+VISION_MODELS = {
+    "claude": "claude-3-5-sonnet-20241022",
+    "gpt4": "gpt-4-vision-preview",
+}
+# Geschätzte Kosten pro Bild (Budget-Reservierung im vision_executor)
+VISION_COST_ESTIMATES = {
+    "claude": 0.003,
+    "gpt4": 0.01,
+}
+
 # STANDARD IMPORTS für erweiterte Features
 try:
     from unstructured.chunking.basic import chunk_elements
@@ -124,39 +187,391 @@ except ImportError:
 
 ADVANCED_FEATURES_AVAILABLE = CHUNKING_AVAILABLE or CLEANERS_AVAILABLE or NLP_AVAILABLE or EXTRACTING_AVAILABLE or STAGING_AVAILABLE
 
+def build_partition_kwargs(file_path, strategy="auto", **kwargs):
+    """
+    Baut die effektiven Partition-Parameter für eine Datei (ohne Verarbeitung)
+    ✅ NEU: Grundlage für Cache-Schlüssel UND allgemeine partition()
+    ✅ NEU: Dateityp aus dem Inhalt (Magic Bytes), nicht aus der Endung
+
+    Returns:
+        Tuple (partition_kwargs, image_capable_type)
+    """
+    image_capable_type = None  # 'pdf' | 'pptx' | 'docx' | 'image'
+    file_type = kwargs.get("file_type") or sniff_file_type(file_path)
+
+    # Open Source Partition-Aufruf mit erweiterten Parametern
+    partition_kwargs = {
+        "filename": file_path,
+        "strategy": strategy,
+        "include_page_breaks": True,
+        "infer_table_structure": kwargs.get("include_tables", True),
+        "include_metadata": True,
+    }
+
+    # Dateityp-spezifische Parameter
+    if file_type == 'pdf':
+        image_capable_type = 'pdf'
+        # PDF-SPEZIFISCHE PARAMETER - KORRIGIERT: OHNE extract_forms
+        partition_kwargs["extract_images_in_pdf"] = kwargs.get("include_images", True)
+        partition_kwargs["extract_image_block_types"] = ["Image", "Table", "FigureCaption", "Picture"]
+        partition_kwargs["extract_image_block_to_payload"] = True  # ✅ Bilder in Payload
+        # ❌ ENTFERNT: extract_forms - nicht verfügbar in aktueller Version
+        # ❌ ENTFERNT: form_extraction_skip_tables - abhängig von extract_forms
+        partition_kwargs["languages"] = ["deu", "eng"]  # ✅ Mehrsprachige OCR
+        partition_kwargs["detect_language_per_element"] = True  # ✅ Sprache pro Element
+        # Fine-tuning Parameter für bessere Extraktion
+        partition_kwargs["pdfminer_word_margin"] = 0.1  # ✅ Bessere Wort-Erkennung
+        partition_kwargs["pdfminer_char_margin"] = 0.5  # ✅ Bessere Zeichen-Erkennung
+
+    elif file_type == 'image':
+        image_capable_type = 'image'
+        # BILD-SPEZIFISCHE PARAMETER - KORRIGIERT: OHNE extract_forms
+        partition_kwargs["strategy"] = "hi_res"  # ✅ Immer hi_res für Bilder
+        partition_kwargs["infer_table_structure"] = True  # ✅ Tabellen in Bildern
+        # ❌ ENTFERNT: extract_forms - nicht verfügbar in aktueller Version
+        # ❌ ENTFERNT: form_extraction_skip_tables - abhängig von extract_forms
+        partition_kwargs["languages"] = ["deu", "eng"]  # ✅ Mehrsprachige OCR
+        partition_kwargs["detect_language_per_element"] = True  # ✅ Sprache pro Element
+        partition_kwargs["hi_res_model_name"] = None  # ✅ Standard Layout-Modell
+
+    elif file_type == 'docx':
+        image_capable_type = 'docx'
+        # WORD-SPEZIFISCHE PARAMETER - MIT BILD-EXTRAKTION
+        partition_kwargs["infer_table_structure"] = True
+        partition_kwargs["include_page_breaks"] = True
+        # ✅ NEU: Bild-Extraktion für Word
+        partition_kwargs["extract_images_in_pdf"] = kwargs.get("include_images", True)
+
+    elif file_type == 'pptx':
+        image_capable_type = 'pptx'
+        # POWERPOINT-SPEZIFISCHE PARAMETER
+        partition_kwargs["include_page_breaks"] = True
+        partition_kwargs["include_slide_notes"] = True  # ✅ NEU: Notizen extrahieren
+        partition_kwargs["infer_table_structure"] = True
+        partition_kwargs["strategy"] = strategy  # ✅ Bessere Strategie-Kontrolle
+
+    elif file_type in ('xlsx', 'xls'):
+        # EXCEL-SPEZIFISCHE PARAMETER
+        # ⚠️ WICHTIG: Excel unterstützt KEINE Bild-Extraktion in Open Source!
+        # Nur Tabellen und Titel werden extrahiert.
+        partition_kwargs["find_subtable"] = kwargs.get("find_subtable", False)
+        partition_kwargs["include_header"] = kwargs.get("include_header", False)
+        partition_kwargs["infer_table_structure"] = kwargs.get("infer_table_structure", True)
+        partition_kwargs["starting_page_number"] = 1
+
+    return partition_kwargs, image_capable_type
+
+def _lookup_cached_result(cache, file_path, strategy, kwargs, start_time):
+    """
+    Sucht ein gespeichertes Ergebnis im Ergebnis-Cache
+
+    Returns:
+        (cache_key, result) - result ist None bei Cache-Fehlschlag
+    """
+    cache_key = None
+    try:
+        partition_kwargs, _ = build_partition_kwargs(file_path, strategy, **kwargs)
+        library_version = None
+        try:
+            from unstructured.__version__ import __version__ as library_version
+        except Exception:
+            pass
+        cache_key = cache.make_key(
+            hash_file_content(file_path),
+            strategy,
+            include_tables=kwargs.get("include_tables", True),
+            include_images=kwargs.get("include_images", True),
+            partition_kwargs=partition_kwargs,
+            library_version=library_version,
+        )
+        entry = cache.get(cache_key)
+        if entry is not None:
+            result = dict(entry["meta"])
+            # Große Einträge blockweise in den Element-Speicher (Auslagerung beim Laden)
+            result["elements"] = load_element_dicts(entry["elements"])
+            # Verdrängte Bilder: Eintrag neu verarbeiten statt Elemente ohne Bild zu liefern
+            if missing_blobs(result["elements"]):
+                print(f"⚠️ Cache-Eintrag {cache_key[:12]} verweist auf verdrängte Bilder, verarbeite neu")
+                return cache_key, None
+            result["element_count"] = len(result["elements"])
+            result["original_processing_time"] = entry["meta"].get("processing_time")
+            result["processing_time"] = time.time() - start_time
+            result["cache_hit"] = True
+            result.update(cache.stats())
+            return cache_key, result
+    except Exception as e:
+        print(f"⚠️ Cache-Lookup fehlgeschlagen: {e}")
+    return cache_key, None
+
+def _store_cached_result(cache, cache_key, result):
+    """
+    Speichert ein erfolgreiches Ergebnis im Cache und ergänzt die Cache-Statistik
+    """
+    # Nur erfolgreiche Ergebnisse cachen
+    if cache_key is not None and result.get("status") == "success":
+        try:
+            meta = {k: v for k, v in result.items() if k != "elements"}
+            cache.put(cache_key, iter_element_dicts(result["elements"]), meta)
+        except Exception as e:
+            print(f"⚠️ Cache-Speicherung fehlgeschlagen: {e}")
+
+    result["cache_hit"] = False
+    result.update(cache.stats())
+    return result
+
 def process_with_open_source_library(file_path, strategy="auto", **kwargs):
     """
     Verarbeitet Datei mit der lokalen Open Source Library
     KEINE API-Aufrufe, alles lokal
+    ✅ NEU: Persistenter Ergebnis-Cache (Datei-Hash + Strategie + Parameter)
+    - Treffer liefern die gespeicherte Element-Liste sofort
+    - Cache-Statistik (cache_hit, cache_hits, cache_misses) im Ergebnis-Dict
+    - use_cache=False erzwingt eine Neuverarbeitung
+    ✅ NEU: Dateityp-Erkennung am Inhalt + Validierung vor der Verarbeitung
+    - Fehler enthalten die Stufe ("validate", "queue", "worker", "partition")
+    """
+    start_time = time.time()
+    use_cache = kwargs.pop("use_cache", True)
+    cache = get_result_cache() if use_cache else None
+
+    cache_key = None
+    if cache is not None:
+        cache_key, cached_result = _lookup_cached_result(cache, file_path, strategy, kwargs, start_time)
+        if cached_result is not None:
+            return cached_result
+
+    # Defekte/unbekannte Dateien abweisen, bevor Pool-Worker und Modelle belegt werden
+    inspection, error_result = _inspect_input(file_path, kwargs, start_time)
+    if error_result is not None:
+        return error_result
+
+    result = _annotate_detection(_run_partition(file_path, strategy, **kwargs), inspection)
+    if cache is None or result.get("fallback_strategy"):
+        # 'auto'-Ersatzergebnis nicht unter dem 'adaptive'-Schlüssel speichern
+        return result
+    return _store_cached_result(cache, cache_key, result)
+
+def _iter_page_batches(elements, total_units=None):
+    """
+    Gruppiert eine fertige Element-Liste in aufeinanderfolgende Seiten-Batches
+    """
+    batch = []
+    batch_page = None
+    for element in elements:
+        page = getattr(getattr(element, 'metadata', None), 'page_number', None) or batch_page or 1
+        if batch and page != batch_page:
+            yield {"event": "batch", "pages": [batch_page, batch_page], "elements": batch,
+                   "completed_units": batch_page, "total_units": total_units}
+            batch = []
+        batch_page = page
+        batch.append(element)
+    if batch:
+        yield {"event": "batch", "pages": [batch_page, batch_page], "elements": batch,
+               "completed_units": batch_page, "total_units": total_units}
+
+def iter_process_with_open_source_library(file_path, strategy="auto", **kwargs):
+    """
+    Generator-Variante von process_with_open_source_library
+    ✅ NEU: Liefert Elemente seitenweise, sobald ein Seitenbereich fertig ist
+    - PDF/PPTX: Seiten-/Folienbereiche laufen parallel im Pool, Batches in Seitenreihenfolge
+    - Andere Formate und Cache-Treffer: fertiges Ergebnis in Seiten-Batches
+
+    Yields:
+        {"event": "batch", "pages": [start, end], "elements": [...], "completed_units", "total_units"}
+        abschließend {"event": "done", "result": {...}} (gleiches Dict wie process_with_open_source_library)
     """
+    start_time = time.time()
+    use_cache = kwargs.pop("use_cache", True)
+    cache = get_result_cache() if use_cache else None
+
+    cache_key = None
+    if cache is not None:
+        cache_key, cached_result = _lookup_cached_result(cache, file_path, strategy, kwargs, start_time)
+        if cached_result is not None:
+            yield from _iter_page_batches(cached_result["elements"])
+            yield {"event": "done", "result": cached_result}
+            return
+
+    # Defekte/unbekannte Dateien abweisen, bevor Pool-Worker und Modelle belegt werden
+    inspection, error_result = _inspect_input(file_path, kwargs, start_time)
+    if error_result is not None:
+        yield {"event": "done", "result": error_result}
+        return
+
+    result = None
+    plan = None
+    fallback_strategy = None
+    if strategy == "adaptive":
+        if kwargs["file_type"] == 'pdf':
+            # ✅ NEU: Strategie pro Seite, Batches in Seitenreihenfolge
+            batches_sent = False
+            try:
+                for event in iter_adaptive_partition(file_path, **kwargs):
+                    if event["event"] == "done":
+                        result = event["result"]
+                    else:
+                        batches_sent = True
+                        yield event
+            except Exception as e:
+                if batches_sent:
+                    # Erste Seiten sind schon beim Aufrufer - kein zweiter Gesamtlauf mit 'auto'
+                    result = {
+                        "status": "error",
+                        "stage": "partition",
+                        "error": f"Adaptive Verarbeitung abgebrochen: {e}",
+                        "processing_time": time.time() - start_time,
+                        "method": "adaptive",
+                    }
+                else:
+                    print(f"⚠️ Adaptive Verarbeitung nicht möglich, nutze 'auto': {e}")
+            if result is None:
+                fallback_strategy = "auto"
+        strategy = "auto"
+
     try:
-        start_time = time.time()
-        image_capable_type = None  # 'pdf' | 'pptx' | 'docx' | 'image'
-
-        # Open Source Partition-Aufruf mit erweiterten Parametern
-        partition_kwargs = {
-            "filename": file_path,
-            "strategy": strategy,
-            "include_page_breaks": True,
-            "infer_table_structure": kwargs.get("include_tables", True),
-            "include_metadata": True,
+        if result is None and kwargs.get("parallel_pages", True):
+            plan = plan_range_partition(file_path, kwargs["file_type"])
+    except Exception as e:
+        print(f"⚠️ Seitenbereich-Planung fehlgeschlagen, nutze Einzel-Durchlauf: {e}")
+
+    if result is not None:
+        pass
+    elif plan is not None:
+        pool, page_count, write_range, method = plan
+        try:
+            for event in iter_page_range_partition(file_path, strategy, page_count, write_range, pool, method, **kwargs):
+                if event["event"] == "done":
+                    result = event["result"]
+                else:
+                    yield event
+        except Exception as e:
+            result = {
+                "status": "error",
+                "stage": "partition",
+                "error": str(e),
+                "processing_time": time.time() - start_time,
+                "method": method,
+            }
+    else:
+        # Keine Seitenbereiche möglich (DOCX, HTML, ...): Batches erst nach dem Gesamtlauf
+        result = _run_partition(file_path, strategy, **kwargs)
+        if result.get("status") == "success":
+            yield from _iter_page_batches(result["elements"])
+
+    result = _annotate_detection(result, inspection)
+    if fallback_strategy:
+        # 'auto'-Ersatzergebnis nicht unter dem 'adaptive'-Schlüssel speichern
+        result["fallback_strategy"] = fallback_strategy
+    elif cache is not None:
+        result = _store_cached_result(cache, cache_key, result)
+    yield {"event": "done", "result": result}
+
+def _run_partition(file_path, strategy="auto", **kwargs):
+    """
+    Führt die Partitionierung im Prozess-Pool aus (vorgewärmte Worker)
+    Fallback: inline im aktuellen Prozess, wenn der Pool deaktiviert ist (PARTITION_WORKERS=0)
+    parallel_pages=True: PDFs/PPTX ab PDF_PARALLEL_MIN_PAGES Seiten werden in Seitenbereiche geteilt
+    (wie im Streaming-Pfad iter_process_with_open_source_library)
+    strategy="adaptive": Strategie pro PDF-Seite (andere Formate: "auto")
+    """
+    file_type = kwargs.get("file_type") or sniff_file_type(file_path)
+
+    # ✅ NEU: Adaptive Strategie - fast für Textseiten, hi_res nur wo nötig
+    if strategy == "adaptive":
+        if file_type == 'pdf':
+            try:
+                result = partition_pdf_adaptive(file_path, **kwargs)
+                if result is not None:
+                    return result
+            except Exception as e:
+                print(f"⚠️ Adaptive Verarbeitung nicht möglich, nutze 'auto': {e}")
+            result = _run_partition(file_path, "auto", **kwargs)
+            result["fallback_strategy"] = "auto"
+            return result
+        strategy = "auto"
+
+    # ✅ NEU: Lange PDFs/PPTX seiten- bzw. folienbereichsweise parallel partitionieren
+    if kwargs.get("parallel_pages", True) and file_type in ('pdf', 'pptx'):
+        try:
+            result = partition_ranges_parallel(file_path, strategy, **dict(kwargs, file_type=file_type))
+            if result is not None:
+                return result
+        except Exception as e:
+            print(f"⚠️ Parallele Verarbeitung fehlgeschlagen, nutze Einzel-Durchlauf: {e}")
+
+    result = run_partition_job(file_path, strategy, **kwargs)
+    if result is None:
+        result = _process_uncached(file_path, strategy, **kwargs)
+    return result
+
+def _partition_error(error, partitioner, start_time):
+    """
+    Fehler-Ergebnis eines spezialisierten Parsers (Stufe "partition", kein zweiter Durchlauf)
+    """
+    return {
+        "status": "error",
+        "stage": "partition",
+        "partitioner": partitioner,
+        "error": f"{partitioner}: {error}",
+        "processing_time": time.time() - start_time,
+        "method": "open_source_local",
+    }
+
+def _inspect_input(file_path, kwargs, start_time):
+    """
+    Erkennt den Dateityp am Inhalt und prüft die Datei, bevor teure Verarbeitung startet
+    Setzt kwargs["file_type"] für die weitere Verarbeitung (auch in den Pool-Workern)
+
+    Returns:
+        (inspection, error_result) - error_result ist None bei gültiger Datei
+    """
+    inspection = inspect_file(file_path)
+    if inspection["error"]:
+        return inspection, {
+            "status": "error",
+            "stage": "validate",
+            "error": inspection["error"],
+            "detected_type": inspection["file_type"],
+            "processing_time": time.time() - start_time,
+            "method": "file_validation",
         }
+    kwargs["file_type"] = inspection["file_type"]
+    return inspection, None
+
+def _annotate_detection(result, inspection):
+    """
+    Ergänzt das Ergebnis um den erkannten Dateityp
+    """
+    result["detected_type"] = inspection["file_type"]
+    result["extension_mismatch"] = inspection["extension_mismatch"]
+    return result
+
+def _process_uncached(file_path, strategy="auto", **kwargs):
+    """
+    Partitioniert die Datei direkt (ohne Cache)
+    ✅ NEU: Extrahierte Bilder wandern in den Bild-Speicher - Elemente tragen nur
+    noch metadata.image_blob_id statt des Base64-Strings
+    """
+    result = _partition_by_type(file_path, strategy, **kwargs)
+    if result.get("status") == "success":
+        store_element_images(result["elements"])
+    return result
 
-        # Dateityp-spezifische Parameter
-        if file_path.lower().endswith(('.pdf')):
-            image_capable_type = 'pdf'
-            # PDF-SPEZIFISCHE PARAMETER - KORRIGIERT: OHNE extract_forms
-            partition_kwargs["extract_images_in_pdf"] = kwargs.get("include_images", True)
-            partition_kwargs["extract_image_block_types"] = ["Image", "Table", "FigureCaption", "Picture"]
-            partition_kwargs["extract_image_block_to_payload"] = True  # ✅ Bilder in Payload
-            # ❌ ENTFERNT: extract_forms - nicht verfügbar in aktueller Version
-            # ❌ ENTFERNT: form_extraction_skip_tables - abhängig von extract_forms
-            partition_kwargs["languages"] = ["deu", "eng"]  # ✅ Mehrsprachige OCR
-            partition_kwargs["detect_language_per_element"] = True  # ✅ Sprache pro Element
-            # Fine-tuning Parameter für bessere Extraktion
-            partition_kwargs["pdfminer_word_margin"] = 0.1  # ✅ Bessere Wort-Erkennung
-            partition_kwargs["pdfminer_char_margin"] = 0.5  # ✅ Bessere Zeichen-Erkennung
+def _partition_by_type(file_path, strategy="auto", **kwargs):
+    """
+    Partitioniert die Datei mit dem Parser des erkannten Dateityps
+    ✅ NEU: Genau ein Partitioner je erkanntem Dateityp - Fehler werden mit Stufe
+    gemeldet statt das Dokument ein zweites Mal über partition() zu verarbeiten
+    """
+    try:
+        start_time = time.time()
+        file_type = kwargs.get("file_type") or sniff_file_type(file_path)
+        kwargs["file_type"] = file_type
+        # Effektive Parameter (identisch mit dem Cache-Schlüssel)
+        partition_kwargs, image_capable_type = build_partition_kwargs(file_path, strategy, **kwargs)
 
+        # Dateityp-spezifische Parser
+        if image_capable_type == 'pdf':
             # DIREKTER PDF-PARSER OHNE extract_forms
             try:
                 elements = partition_pdf(
@@ -173,7 +588,9 @@ def process_with_open_source_library(file_path, strategy="auto", **kwargs):
                     detect_language_per_element=True,
                     pdfminer_word_margin=0.1,
                     pdfminer_char_margin=0.5,
-                    include_metadata=True
+                    include_metadata=True,
+                    # Seitenbereich-Jobs (pdf_parallel) behalten die Original-Seitennummern
+                    starting_page_number=kwargs.get("starting_page_number", 1)
                 )
                 processing_time = time.time() - start_time
                 img_elems = [e for e in elements if type(e).__name__ in ("Image", "Figure", "FigureCaption", "Picture")]
@@ -185,22 +602,12 @@ def process_with_open_source_library(file_path, strategy="auto", **kwargs):
                     "method": "open_source_pdf_optimized_no_forms",
                     "image_support": True,
                     "image_elements": len(img_elems),
-                    "image_base64": sum(1 for e in img_elems if getattr(getattr(e, 'metadata', None), 'image_base64', None)),
+                    "image_base64": sum(1 for e in img_elems if has_image(e)),
                 }
-            except Exception:
-                pass
-
-        elif file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp')):
-            image_capable_type = 'image'
-            # BILD-SPEZIFISCHE PARAMETER - KORRIGIERT: OHNE extract_forms
-            partition_kwargs["strategy"] = "hi_res"  # ✅ Immer hi_res für Bilder
-            partition_kwargs["infer_table_structure"] = True  # ✅ Tabellen in Bildern
-            # ❌ ENTFERNT: extract_forms - nicht verfügbar in aktueller Version
-            # ❌ ENTFERNT: form_extraction_skip_tables - abhängig von extract_forms
-            partition_kwargs["languages"] = ["deu", "eng"]  # ✅ Mehrsprachige OCR
-            partition_kwargs["detect_language_per_element"] = True  # ✅ Sprache pro Element
-            partition_kwargs["hi_res_model_name"] = None  # ✅ Standard Layout-Modell
+            except Exception as pdf_error:
+                return _partition_error(pdf_error, "partition_pdf", start_time)
 
+        elif image_capable_type == 'image':
             # DIREKTER IMAGE-PARSER OHNE extract_forms
             try:
                 from unstructured.partition.image import partition_image
@@ -224,17 +631,10 @@ def process_with_open_source_library(file_path, strategy="auto", **kwargs):
                     "method": "open_source_image_optimized_no_forms"
                 }
             except Exception as image_error:
-                # Fallback auf allgemeine partition
-                pass
-
-        elif file_path.lower().endswith(('.docx')):
-            image_capable_type = 'docx'
-            # WORD-SPEZIFISCHE PARAMETER - MIT BILD-EXTRAKTION
-            partition_kwargs["infer_table_structure"] = True
-            partition_kwargs["include_page_breaks"] = True
-            # ✅ NEU: Bild-Extraktion für Word
-            partition_kwargs["extract_images_in_pdf"] = kwargs.get("include_images", True)
+                # ✅ Kein zweiter Durchlauf über partition() - Fehler mit Stufe melden
+                return _partition_error(image_error, "partition_image", start_time)
 
+        elif image_capable_type == 'docx':
             # DIREKTER WORD-PARSER mit Bild-Extraktion
             try:
                 elements = partition_docx(
@@ -253,25 +653,19 @@ def process_with_open_source_library(file_path, strategy="auto", **kwargs):
                     "method": "open_source_docx_with_images",
                     "image_support": True,
                     "image_elements": len(img_elems),
-                    "image_base64": sum(1 for e in img_elems if getattr(getattr(e, 'metadata', None), 'image_base64', None)),
+                    "image_base64": sum(1 for e in img_elems if has_image(e)),
                 }
             except Exception as docx_error:
-                # Fallback auf allgemeine partition
-                pass
+                # ✅ Kein zweiter Durchlauf über partition() - Fehler mit Stufe melden
+                return _partition_error(docx_error, "partition_docx", start_time)
 
-        elif file_path.lower().endswith(('.pptx', '.ppt')):
-            image_capable_type = 'pptx'
-            # POWERPOINT-SPEZIFISCHE PARAMETER mit Picture Partitioner Setup
+        elif image_capable_type == 'pptx':
+            # POWERPOINT mit Picture Partitioner Setup
             # ✅ KRITISCH: Picture Partitioner MUSS vor partition_pptx registriert werden
             setup_success = setup_standard_picture_partitioner()
             if not setup_success:
                 print("⚠️ Warning: Picture Partitioner Setup fehlgeschlagen - keine Bilder verfügbar")
 
-            partition_kwargs["include_page_breaks"] = True
-            partition_kwargs["include_slide_notes"] = True  # ✅ NEU: Notizen extrahieren
-            partition_kwargs["infer_table_structure"] = True
-            partition_kwargs["strategy"] = strategy  # ✅ Bessere Strategie-Kontrolle
-
             # DIREKTER POWERPOINT-PARSER mit Picture Partitioner
             try:
                 print(f"🎨 PPTX Verarbeitung (Picture Partitioner aktiv={setup_success})")
@@ -282,7 +676,7 @@ def process_with_open_source_library(file_path, strategy="auto", **kwargs):
                     infer_table_structure=True,
                     strategy=strategy,
                     include_metadata=True,
-                    starting_page_number=1
+                    starting_page_number=kwargs.get("starting_page_number", 1)
                 )
                 processing_time = time.time() - start_time
                 img_elems = [e for e in elements if type(e).__name__ in ("Image", "Figure", "FigureCaption", "Picture")]
@@ -294,20 +688,14 @@ def process_with_open_source_library(file_path, strategy="auto", **kwargs):
                     "method": f"open_source_pptx_with_picture_partitioner_{setup_success}",
                     "image_support": setup_success,
                     "image_elements": len(img_elems),
-                    "image_base64": sum(1 for e in img_elems if getattr(getattr(e, 'metadata', None), 'image_base64', None)),
+                    "image_base64": sum(1 for e in img_elems if has_image(e)),
                 }
-            except Exception:
-                pass
+            except Exception as pptx_error:
+                return _partition_error(pptx_error, "partition_pptx", start_time)
 
-        elif file_path.lower().endswith(('.xlsx', '.xls')):
-            # EXCEL-SPEZIFISCHE PARAMETER
+        elif file_type in ('xlsx', 'xls'):
             # ⚠️ WICHTIG: Excel unterstützt KEINE Bild-Extraktion in Open Source!
             # Nur Tabellen und Titel werden extrahiert.
-            partition_kwargs["find_subtable"] = kwargs.get("find_subtable", False)
-            partition_kwargs["include_header"] = kwargs.get("include_header", False)
-            partition_kwargs["infer_table_structure"] = kwargs.get("infer_table_structure", True)
-            partition_kwargs["starting_page_number"] = 1
-
             # DIREKTER EXCEL-PARSER (OHNE Bild-Support)
             try:
                 elements = partition_xlsx(
@@ -329,10 +717,11 @@ def process_with_open_source_library(file_path, strategy="auto", **kwargs):
                     "image_base64": 0,
                 }
             except Exception as xlsx_error:
-                # Fallback auf allgemeine partition
-                pass
+                # ✅ Kein zweiter Durchlauf über partition() - Fehler mit Stufe melden
+                return _partition_error(xlsx_error, "partition_xlsx", start_time)
 
-        # Lokale Partition ausführen
+        # Lokale Partition für alle übrigen Typen (TXT, HTML, DOC, PPT, ...) - einziger Partitioner
+        # ✅ Auch "container" (ZIP/EPUB/ODT/MSG, ...): partition() wählt per Endung/Inhalt
         elements = partition(**partition_kwargs)
         processing_time = time.time() - start_time
         img_elems = [e for e in elements if type(e).__name__ in ("Image", "Figure", "FigureCaption", "Picture")]
@@ -344,11 +733,12 @@ def process_with_open_source_library(file_path, strategy="auto", **kwargs):
             "method": "open_source_local",
             "image_support": image_capable_type in ("pdf", "pptx", "image"),
             "image_elements": len(img_elems),
-            "image_base64": sum(1 for e in img_elems if getattr(getattr(e, 'metadata', None), 'image_base64', None)),
+            "image_base64": sum(1 for e in img_elems if has_image(e)),
         }
     except Exception as e:
         return {
             "status": "error",
+            "stage": "partition",
             "error": str(e),
             "processing_time": time.time() - start_time,
             "method": "open_source_local"
@@ -753,34 +1143,51 @@ def export_tables_to_formats(elements):
             "error": str(e)
         }
 
-def create_image_gallery(elements):
+def create_image_gallery(elements, thumbnail_px=None):
     """
     Erstellt Bild-Galerie aus extrahierten Bildern
     ✅ NEU: Bild-Galerie mit Download-Funktion
+    ✅ NEU: Nur Vorschaubilder (Thumbnail-Cache, einmal pro Bild-Hash erzeugt) -
+    Originale werden erst beim Öffnen/Download über get_image_bytes(element) geladen
     """
     try:
+        from thumbnails import get_thumbnail, get_thumbnail_store, THUMBNAIL_MAX_PX
+
+        thumbnail_px = thumbnail_px or THUMBNAIL_MAX_PX
         images = []
+        thumbnails_created = 0
 
         for i, element in enumerate(elements):
             element_type = type(element).__name__
 
             if element_type in ["Image", "Figure", "FigureCaption", "Picture"]:
                 if hasattr(element, 'metadata') and element.metadata:
-                    if hasattr(element.metadata, 'image_base64') and element.metadata.image_base64:
+                    if has_image(element.metadata):
+                        thumbnail = get_thumbnail(element.metadata, thumbnail_px)
+                        if thumbnail is not None and not thumbnail["cached"]:
+                            thumbnails_created += 1
                         image_info = {
                             "index": i,
                             "element_type": element_type,
-                            "base64": element.metadata.image_base64,
+                            "hash": get_image_hash(element.metadata),
+                            "thumbnail": thumbnail["bytes"] if thumbnail else None,
+                            "thumbnail_mime_type": thumbnail["mime_type"] if thumbnail else None,
                             "mime_type": getattr(element.metadata, 'image_mime_type', 'image/jpeg'),
                             "caption": str(element).strip(),
                             "page_number": getattr(element.metadata, 'page_number', None)
                         }
                         images.append(image_info)
 
+        # Verdrängung nur, wenn neue Vorschaubilder dazugekommen sind
+        thumbnail_store = get_thumbnail_store()
+        if thumbnails_created and thumbnail_store is not None:
+            thumbnail_store.evict()
+
         return {
             "status": "success",
             "images": images,
-            "total_images": len(images)
+            "total_images": len(images),
+            "thumbnails_created": thumbnails_created
         }
 
     except Exception as e:
@@ -789,52 +1196,74 @@ def create_image_gallery(elements):
             "error": str(e)
         }
 
-def describe_image_with_vision_llm(image_base64, image_mime_type, api_provider="auto", api_key=None):
+def _resolve_vision_provider(api_provider="auto"):
     """
-    Beschreibt ein Bild mit Vision-LLM für besseres Text-Retrieval
+    Wählt den Vision-Provider anhand der verfügbaren API-Keys ("auto")
+    """
+    if api_provider != "auto":
+        return api_provider
+    if os.environ.get("ANTHROPIC_API_KEY"):
+        return "claude"
+    if os.environ.get("OPENAI_API_KEY"):
+        return "gpt4"
+    if os.environ.get("GOOGLE_API_KEY"):
+        return "gemini"
+    return "local"
+
+def _vision_cache_provider(api_provider):
+    return f"{api_provider}:{VISION_MODELS.get(api_provider)}"
+
+def _lookup_vision_description(image_hash, api_provider):
+    """
+    Sucht eine gespeicherte Beschreibung im Vision-Cache
 
-    ✅ VORTEILE:
-    - Bessere Embeddings durch Text-Beschreibung
-    - Unabhängig von Vision-LLM bei Queries
-    - 99% Kosten-Ersparnis bei wiederholten Queries
+    Returns:
+        Ergebnis-Dict (cached=True, cost_estimate=0) oder None
+    """
+    vision_cache = get_vision_cache() if image_hash and api_provider in VISION_MODELS else None
+    if vision_cache is None:
+        return None
+    cached = vision_cache.get(image_hash, _vision_cache_provider(api_provider), VISION_PROMPT_VERSION)
+    if cached is None:
+        return None
+    return {
+        "description": cached["description"],
+        "model": cached["model"],
+        "cost_estimate": 0.0,
+        "cost_saved": cached["cost_estimate"],
+        "cached": True
+    }
 
-    Args:
-        image_base64: Base64-kodiertes Bild
-        image_mime_type: MIME-Typ (image/jpeg, image/png, etc.)
-        api_provider: "auto", "claude", "gpt4", "gemini", "local"
-        api_key: Optional API-Key (wird aus ENV geladen falls nicht angegeben)
+def _store_vision_description(image_hash, api_provider, result):
+    """
+    Speichert eine echte API-Beschreibung im Vision-Cache (kein Fallback, keine Fehler)
+    """
+    vision_cache = get_vision_cache() if image_hash and api_provider in VISION_MODELS else None
+    if vision_cache is None:
+        return
+    try:
+        vision_cache.put(image_hash, _vision_cache_provider(api_provider), VISION_PROMPT_VERSION,
+                         result["description"], model=result["model"], cost_estimate=result["cost_estimate"])
+    except Exception as e:
+        print(f"⚠️ Vision-Cache Speichern fehlgeschlagen: {e}")
+
+def _call_vision_provider(api_provider, image_base64, image_mime_type, api_key=None, sdk_retries=None):
+    """
+    Ein Aufruf der Vision-API - Fehler werden NICHT abgefangen (Wiederholung beim Aufrufer)
+    Die SDKs lesen ANTHROPIC_BASE_URL / OPENAI_BASE_URL (z.B. lokaler Stub-Server)
 
     Returns:
-        Dict mit Beschreibung und Metadaten
+        {"description", "model", "cost_estimate", "cached": False} - description None bei
+        Providern ohne API-Anbindung
     """
-    try:
-        import base64
-        import os
-
-        # Generiere detaillierte Beschreibung
-        description = None
-        cost_estimate = 0.0
-        model_used = "unknown"
-
-        # Versuche verschiedene APIs (in Priorität)
-        if api_provider == "auto":
-            # Prüfe welche API-Keys verfügbar sind
-            if os.environ.get("ANTHROPIC_API_KEY"):
-                api_provider = "claude"
-            elif os.environ.get("OPENAI_API_KEY"):
-                api_provider = "gpt4"
-            elif os.environ.get("GOOGLE_API_KEY"):
-                api_provider = "gemini"
-            else:
-                api_provider = "local"
+    client_options = {} if sdk_retries is None else {"max_retries": sdk_retries}
 
-        # Claude 3 Vision (Empfohlen für Qualität)
-        if api_provider == "claude":
-            try:
-                import anthropic
-                client = anthropic.Anthropic(api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"))
+    # Claude 3 Vision (Empfohlen für Qualität)
+    if api_provider == "claude":
+        import anthropic
+        client = anthropic.Anthropic(api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"), **client_options)
 
-                prompt = """Beschreibe dieses Bild DETAILLIERT für ein Dokumenten-Retrieval-System.
+        prompt = """Beschreibe dieses Bild DETAILLIERT für ein Dokumenten-Retrieval-System.
 
 Fokus auf:
 1. Was für ein Bild-Typ ist es? (Diagramm, Foto, Screenshot, Schaubild, Tabelle, etc.)
@@ -845,73 +1274,112 @@ Fokus auf:
 
 Antworte auf Deutsch, präzise und strukturiert."""
 
-                response = client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=500,
-                    messages=[{
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": image_mime_type,
-                                    "data": image_base64
-                                }
-                            },
-                            {"type": "text", "text": prompt}
-                        ]
-                    }]
-                )
+        response = client.messages.create(
+            model=VISION_MODELS["claude"],
+            max_tokens=500,
+            messages=[{
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": image_mime_type,
+                            "data": image_base64
+                        }
+                    },
+                    {"type": "text", "text": prompt}
+                ]
+            }]
+        )
 
-                description = response.content[0].text
-                model_used = "Claude 3.5 Sonnet"
-                cost_estimate = 0.003  # ~$3 per 1K images
+        # ~$3 per 1K images
+        return {"description": response.content[0].text, "model": "Claude 3.5 Sonnet", "cost_estimate": 0.003, "cached": False}
+
+    # GPT-4 Vision (Alternative)
+    if api_provider == "gpt4":
+        import openai
+        client = openai.OpenAI(api_key=api_key or os.environ.get("OPENAI_API_KEY"), **client_options)
+
+        response = client.chat.completions.create(
+            model=VISION_MODELS["gpt4"],
+            messages=[{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "Beschreibe dieses Bild detailliert auf Deutsch für ein Retrieval-System. Fokus auf Inhalt, Daten, Text und Struktur."},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{image_mime_type};base64,{image_base64}"
+                        }
+                    }
+                ]
+            }],
+            max_tokens=300
+        )
 
-            except Exception as e:
-                print(f"Claude Vision fehlgeschlagen: {e}")
+        # ~$10 per 1K images
+        return {"description": response.choices[0].message.content, "model": "GPT-4 Vision", "cost_estimate": 0.01, "cached": False}
 
-        # GPT-4 Vision (Alternative)
-        elif api_provider == "gpt4":
-            try:
-                import openai
-                client = openai.OpenAI(api_key=api_key or os.environ.get("OPENAI_API_KEY"))
-
-                response = client.chat.completions.create(
-                    model="gpt-4-vision-preview",
-                    messages=[{
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": "Beschreibe dieses Bild detailliert auf Deutsch für ein Retrieval-System. Fokus auf Inhalt, Daten, Text und Struktur."},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{image_mime_type};base64,{image_base64}"
-                                }
-                            }
-                        ]
-                    }],
-                    max_tokens=300
-                )
+    return {"description": None, "model": "unknown", "cost_estimate": 0.0, "cached": False}
 
-                description = response.choices[0].message.content
-                model_used = "GPT-4 Vision"
-                cost_estimate = 0.01  # ~$10 per 1K images
-            except Exception as e:
-                print(f"GPT-4 Vision fehlgeschlagen: {e}")
+def _vision_fallback(image_mime_type):
+    return {
+        "description": f"Bild-Element (Typ: {image_mime_type})",
+        "model": "Fallback",
+        "cost_estimate": 0.0,
+        "cached": False
+    }
+
+def describe_image_with_vision_llm(image_base64, image_mime_type, api_provider="auto", api_key=None, image_hash=None):
+    """
+    Beschreibt ein Bild mit Vision-LLM für besseres Text-Retrieval
+
+    ✅ VORTEILE:
+    - Bessere Embeddings durch Text-Beschreibung
+    - Unabhängig von Vision-LLM bei Queries
+    - 99% Kosten-Ersparnis bei wiederholten Queries
+    ✅ NEU: Persistenter Cache (Bild-Hash + Provider/Modell + Prompt-Version) -
+    Treffer kosten nichts und liefern cached=True
+    ✅ NEU: Viele Bilder auf einmal -> describe_images_batch (parallel, ratenbegrenzt)
+
+    Args:
+        image_base64: Base64-kodiertes Bild oder Funktion, die es liefert
+                      (wird bei Cache-Treffer nicht aufgerufen)
+        image_mime_type: MIME-Typ (image/jpeg, image/png, etc.)
+        api_provider: "auto", "claude", "gpt4", "gemini", "local"
+        api_key: Optional API-Key (wird aus ENV geladen falls nicht angegeben)
+        image_hash: Inhalts-Hash des Bildes (get_image_hash) - ohne Hash kein Cache
+
+    Returns:
+        Dict mit Beschreibung und Metadaten
+    """
+    try:
+        api_provider = _resolve_vision_provider(api_provider)
+
+        # ✅ NEU: Cache-Lookup vor dem API-Aufruf
+        try:
+            cached = _lookup_vision_description(image_hash, api_provider)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            print(f"⚠️ Vision-Cache Lookup fehlgeschlagen: {e}")
+
+        if callable(image_base64):
+            image_base64 = image_base64()
+
+        try:
+            result = _call_vision_provider(api_provider, image_base64, image_mime_type, api_key)
+        except Exception as e:
+            print(f"Vision ({api_provider}) fehlgeschlagen: {e}")
+            result = None
 
         # Fallback: Einfache Beschreibung
-        if not description:
-            description = f"Bild-Element (Typ: {image_mime_type})"
-            model_used = "Fallback"
-            cost_estimate = 0.0
+        if not result or not result.get("description"):
+            return _vision_fallback(image_mime_type)
 
-        return {
-            "description": description,
-            "model": model_used,
-            "cost_estimate": cost_estimate,
-            "cached": False
-        }
+        _store_vision_description(image_hash, api_provider, result)
+        return result
 
     except Exception as e:
         return {
@@ -921,23 +1389,100 @@ Antworte auf Deutsch, präzise und strukturiert."""
             "cached": False
         }
 
-def export_images_from_bedrock_json(elements, filename):
+def describe_images_batch(images, api_provider="auto", api_key=None):
+    """
+    Beschreibt viele Bilder nebenläufig (vision_executor): Concurrency-Limit,
+    Requests-pro-Minute-Limit, Wiederholung mit Backoff und Kostenobergrenze
+
+    Args:
+        images: Liste von Dicts {"key", "image_hash", "mime_type", "load"} - load() liefert Base64
+
+    Returns:
+        ({key: Ergebnis wie describe_image_with_vision_llm}, Executor-Statistik)
+        Fehlgeschlagene/übersprungene Bilder erhalten die Fallback-Beschreibung plus "error"
+    """
+    from vision_executor import run_vision_jobs
+
+    api_provider = _resolve_vision_provider(api_provider)
+    if api_provider not in VISION_MODELS:
+        # Kein Vision-Provider konfiguriert: sofort Fallback, kein Executor nötig
+        return {img["key"]: _vision_fallback(img["mime_type"]) for img in images}, {"images": len(images), "provider": api_provider}
+
+    def lookup(job):
+        return _lookup_vision_description(job["image_hash"], api_provider)
+
+    def call(job):
+        # Wiederholungen übernimmt der Executor (SDK-eigene Retries aus)
+        result = _call_vision_provider(api_provider, job["load"](), job["mime_type"], api_key, sdk_retries=0)
+        if not result.get("description"):
+            raise RuntimeError("Leere Antwort des Vision-Providers")
+        _store_vision_description(job["image_hash"], api_provider, result)
+        return result
+
+    run = run_vision_jobs(images, lookup, call, cost_per_request=VISION_COST_ESTIMATES.get(api_provider, 0.0))
+    results = {}
+    for img in images:
+        result = run["results"].get(img["key"])
+        if result is None or result.get("error"):
+            fallback = _vision_fallback(img["mime_type"])
+            fallback["error"] = (result or {}).get("error", "Kein Ergebnis")
+            fallback["skipped"] = (result or {}).get("skipped")
+            result = fallback
+        results[img["key"]] = result
+    stats = dict(run["stats"], provider=api_provider)
+    return results, stats
+
+def _mark_image_duplicates(images, near_duplicates=False):
+    """
+    ✅ NEU: Fasst exakte Duplikate (gleicher SHA-256) zusammen, optional auch Beinahe-Duplikate
+    (image_dedup, Perceptual Hash) - nur für das Teilen von Vision-Beschreibungen, nie für
+    Exporte (fast gleiche Bilder können unterschiedliche Inhalte zeigen)
+
+    Args:
+        images: Liste von Dicts mit "key", "hash" und "metadata" (Element-Reihenfolge)
+        near_duplicates: Beinahe-Duplikate per dHash zusammenfassen (lädt alle Bilder)
+
+    Returns:
+        (Vertreter - erstes Bild jedes Clusters, {key: Hash des Vertreters} für alle übrigen)
+    """
+    cluster_of = {}
+    if near_duplicates:
+        from image_dedup import find_near_duplicates
+
+        try:
+            cluster_of = find_near_duplicates(images)
+        except Exception as e:
+            print(f"⚠️ Duplikat-Erkennung fehlgeschlagen, nur exakte Duplikate: {e}")
+
+    representatives = []
+    duplicate_of = {}
+    seen = set()
+    for img in images:
+        representative_hash = cluster_of.get(img["hash"], img["hash"])
+        if img["hash"] == representative_hash and representative_hash not in seen:
+            seen.add(representative_hash)
+            representatives.append(img)
+        else:
+            duplicate_of[img["key"]] = representative_hash
+    return representatives, duplicate_of
+
+def export_images_from_bedrock_json(elements, filename, output_path=None):
     """
     Exportiert alle Bilder aus den Elementen als ZIP-Datei
     ✅ OPTIMIERT für einfachen Import in Bedrock RAG Oberfläche
+    ✅ NEU: ZIP wird eintragsweise direkt auf Disk geschrieben (konstanter Speicherbedarf)
 
     Args:
         elements: Liste der unstructured Elements
         filename: Original-Dateiname für Bild-Naming
+        output_path: Ziel-Datei (Standard: neue Datei unter EXPORT_PACKAGE_DIR)
 
     Returns:
-        Dict mit ZIP-Bytes und Statistiken oder Error
+        Dict mit ZIP-Pfad (zip_path) und Statistiken oder Error
     """
+    zip_path = None
     try:
-        import io
         import zipfile
-        import base64
-        import hashlib
         from datetime import datetime
 
         # Sammle alle Bilder mit Base64-Daten
@@ -950,10 +1495,9 @@ def export_images_from_bedrock_json(elements, filename):
                 if hasattr(element, 'metadata') and element.metadata:
                     meta = element.metadata
 
-                    if hasattr(meta, 'image_base64') and meta.image_base64:
-                        # ✅ OPTIMIERT: Hash nur auf ersten 1000 Zeichen für Performance
-                        hash_sample = meta.image_base64[:1000] if len(meta.image_base64) > 1000 else meta.image_base64
-                        image_hash = hashlib.md5(hash_sample.encode()).hexdigest()
+                    if has_image(meta):
+                        # ✅ Inhalts-Hash = blob_id aus dem Bild-Speicher (kein erneutes Hashen)
+                        image_hash = get_image_hash(meta)
 
                         # Mime-Type bestimmen
                         mime_type = getattr(meta, 'image_mime_type', 'image/png')
@@ -969,8 +1513,9 @@ def export_images_from_bedrock_json(elements, filename):
                         page_num = getattr(meta, 'page_number', i)
 
                         images.append({
+                            'key': i,
                             'hash': image_hash,
-                            'base64': meta.image_base64,
+                            'metadata': meta,
                             'mime_type': mime_type,
                             'extension': extension,
                             'page': page_num,
@@ -984,43 +1529,58 @@ def export_images_from_bedrock_json(elements, filename):
                 "message": "Keine Bilder mit Base64-Daten gefunden"
             }
 
-        # ZIP-Datei erstellen
-        zip_buffer = io.BytesIO()
+        # ✅ NEU: Byte-identische Bilder werden nur einmal exportiert
+        representatives, duplicate_of = _mark_image_duplicates(images)
+
+        # ZIP-Datei erstellen (direkt auf Disk)
+        zip_path = output_path or new_package_path(prefix="images_")
 
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
             # Manifest-Datei erstellen
             manifest = {
                 "source_document": filename,
                 "export_date": datetime.now().isoformat(),
                 "total_images": len(images),
+                "unique_images": len(representatives),
                 "images": []
             }
 
-            for img in images:
+            # ✅ NEU: Bilder parallel laden, PNG/JPEG/GIF/WebP unkomprimiert speichern
+            written = {}
+            for img, img_bytes, load_error in iter_image_bytes(representatives):
                 # Dateiname: page_<page>_hash_<hash>.<ext>
                 img_filename = f"page_{img['page']:03d}_hash_{img['hash'][:8]}.{img['extension']}"
 
-                # Base64 dekodieren
                 try:
-                    img_bytes = base64.b64decode(img['base64'])
+                    if img_bytes is None:
+                        raise ValueError(load_error)
 
                     # Bild zur ZIP hinzufügen
-                    zip_file.writestr(img_filename, img_bytes)
-
-                    # Manifest-Eintrag
-                    manifest["images"].append({
-                        "filename": img_filename,
-                        "hash": img['hash'],
-                        "page": img['page'],
-                        "element_index": img['element_index'],
-                        "element_type": img['element_type'],
-                        "mime_type": img['mime_type'],
-                        "size_bytes": len(img_bytes)
-                    })
+                    zip_file.writestr(img_filename, img_bytes, compress_type=zip_compress_type(img['mime_type']))
+
+                    written[img['hash']] = {"filename": img_filename, "size_bytes": len(img_bytes)}
 
                 except Exception as e:
                     print(f"Fehler beim Dekodieren von Bild {img['hash']}: {e}")
 
+            # Manifest-Einträge in Element-Reihenfolge, Duplikate verweisen auf die Datei ihres Vertreters
+            for img in images:
+                representative_hash = duplicate_of.get(img['key'], img['hash'])
+                if representative_hash not in written:
+                    continue
+                entry = {
+                    "filename": written[representative_hash]["filename"],
+                    "hash": img['hash'],
+                    "page": img['page'],
+                    "element_index": img['element_index'],
+                    "element_type": img['element_type'],
+                    "mime_type": img['mime_type'],
+                    "size_bytes": written[representative_hash]["size_bytes"]
+                }
+                if img['key'] in duplicate_of:
+                    entry["duplicate_of"] = representative_hash
+                manifest["images"].append(entry)
+
             # Manifest als JSON zur ZIP hinzufügen
             manifest_json = json.dumps(manifest, indent=2, ensure_ascii=False)
             zip_file.writestr("manifest.json", manifest_json)
@@ -1037,6 +1597,9 @@ def export_images_from_bedrock_json(elements, filename):
 - `manifest.json` - Metadaten zu allen Bildern (Hash, Seite, Typ)
 - `page_XXX_hash_XXXXXXXX.<ext>` - Original-Bilder aus dem Dokument
 
+Byte-identische Bilder (wiederholte Logos, Icons) sind nur einmal enthalten -
+ihre Manifest-Einträge verweisen über `duplicate_of` auf den Hash des gespeicherten Bildes.
+
 ## 🔗 Verwendung mit S3 (optional)
 
 ### 1. Bilder zu S3 hochladen:
@@ -1067,49 +1630,138 @@ Die Original-Bilder werden nur bei Bedarf geladen!
 """
             zip_file.writestr("README.md", readme)
 
-        # ZIP-Bytes zurückgeben
-        zip_bytes = zip_buffer.getvalue()
-
+        # ZIP-Pfad zurückgeben (Download liest die Datei)
         return {
             "status": "success",
-            "zip_bytes": zip_bytes,
+            "zip_path": zip_path,
             "total_images": len(images),
-            "total_size_bytes": len(zip_bytes),
+            "unique_images": len(representatives),
+            "total_size_bytes": os.path.getsize(zip_path),
             "manifest": manifest
         }
 
     except Exception as e:
+        if zip_path and zip_path != output_path:
+            remove_package(zip_path)
         return {
             "status": "error",
             "error": str(e)
         }
 
-def export_bedrock_import_package(elements, filename, describe_images=False):
+ASSET_EXPORT_FORMATS = {
+    # format_type -> (Dokument-Datei im ZIP, Bezeichnung)
+    "markdown": ("document.md", "Markdown"),
+    "html": ("index.html", "HTML"),
+    "pptx_html": ("index.html", "PowerPoint-HTML"),
+}
+
+def export_document_with_assets(elements, filename, format_type="markdown", output_path=None):
+    """
+    Exportiert HTML/Markdown mit Bildern als externe Dateien statt Data-URLs
+    ✅ NEU: Jedes Bild liegt genau einmal unter assets/<hash>.<ext>, das Dokument referenziert
+    es per relativem Pfad - Dokument + assets/ als eine ZIP (direkt auf Disk geschrieben)
+
+    Args:
+        elements: Liste der unstructured Elements
+        filename: Original-Dateiname (Titel des HTML-Dokuments)
+        format_type: "markdown", "html" oder "pptx_html" (Slide-Darstellung)
+        output_path: Ziel-Datei (Standard: neue Datei unter EXPORT_PACKAGE_DIR)
+
+    Returns:
+        Dict mit ZIP-Pfad (zip_path) und Statistiken oder Error
+    """
+    zip_path = None
+    try:
+        import zipfile
+        from package_writer import AssetCollector
+
+        if format_type not in ASSET_EXPORT_FORMATS:
+            return {"status": "error", "error": f"Unbekanntes Format: {format_type}"}
+        document_name, _ = ASSET_EXPORT_FORMATS[format_type]
+
+        # Rendern: Bilder werden nur registriert, nicht geladen/kodiert
+        assets = AssetCollector()
+        if format_type == "markdown":
+            document = elements_to_markdown_with_images(elements, image_src=assets)
+        else:
+            if format_type == "pptx_html":
+                from pptx_helpers import elements_to_html_powerpoint_optimized
+                body = elements_to_html_powerpoint_optimized(elements, image_src=assets)
+            else:
+                body = elements_to_html_with_images(elements, image_src=assets)
+            document = f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{filename}</title>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+        document_bytes = document.encode("utf-8")
+
+        # ZIP-Datei erstellen (direkt auf Disk)
+        zip_path = output_path or new_package_path(prefix="document_assets_")
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr(document_name, document_bytes)
+            asset_result = assets.write_to_zip(zip_file)
+
+        for error in asset_result["errors"]:
+            print(f"⚠️ Bild konnte nicht exportiert werden: {error}")
+
+        return {
+            "status": "success",
+            "zip_path": zip_path,
+            "document_name": document_name,
+            "document_size_bytes": len(document_bytes),
+            "image_references": assets.references,
+            "image_count": asset_result["written"],
+            "image_errors": len(asset_result["errors"]),
+            "total_size_bytes": os.path.getsize(zip_path),
+        }
+
+    except Exception as e:
+        if zip_path and zip_path != output_path:
+            remove_package(zip_path)
+        return {
+            "status": "error",
+            "error": str(e)
+        }
+
+def export_bedrock_import_package(elements, filename, describe_images=False, output_path=None):
     """
     Erstellt KOMPLETTES Import-Package für Bedrock RAG Oberfläche
     ✅ RAG JSON + Original-Bilder + Manifest in einer ZIP
+    ✅ NEU: ZIP wird eintragsweise direkt auf Disk geschrieben (konstanter Speicherbedarf)
 
     Args:
         elements: Liste der unstructured Elements
         filename: Original-Dateiname
         describe_images: Ob Bilder mit Vision-LLM beschrieben werden sollen
+        output_path: Ziel-Datei (Standard: neue Datei unter EXPORT_PACKAGE_DIR)
 
     Returns:
-        Dict mit ZIP-Bytes für direkten Download/Import
+        Dict mit ZIP-Pfad (zip_path) für direkten Download/Import
     """
+    zip_path = None
+    spool = None
     try:
-        import io
+        import shutil
+        import tempfile
         import zipfile
-        import base64
-        import hashlib
         from datetime import datetime
 
         # 1. Erstelle Bedrock RAG JSON (mit Bild-Hashes)
+        # ✅ NEU: dokumentweise als JSONL in eine temporäre Datei (nie komplett im Speicher)
+        spool = tempfile.TemporaryFile()
         rag_result = export_for_bedrock_knowledge_base(
             elements=elements,
             filename=filename,
             format_type="element",
-            describe_images=describe_images
+            describe_images=describe_images,
+            output=spool
         )
 
         if rag_result["status"] != "success":
@@ -1124,10 +1776,9 @@ def export_bedrock_import_package(elements, filename, describe_images=False):
                 if hasattr(element, 'metadata') and element.metadata:
                     meta = element.metadata
 
-                    if hasattr(meta, 'image_base64') and meta.image_base64:
-                        # Hash berechnen (Performance-optimiert)
-                        hash_sample = meta.image_base64[:1000] if len(meta.image_base64) > 1000 else meta.image_base64
-                        image_hash = hashlib.md5(hash_sample.encode()).hexdigest()
+                    if has_image(meta):
+                        # Inhalts-Hash = blob_id aus dem Bild-Speicher
+                        image_hash = get_image_hash(meta)
 
                         mime_type = getattr(meta, 'image_mime_type', 'image/png')
                         extension = 'png'
@@ -1139,45 +1790,63 @@ def export_bedrock_import_package(elements, filename, describe_images=False):
                         page_num = getattr(meta, 'page_number', i)
 
                         images_data.append({
+                            'key': i,
                             'hash': image_hash,
-                            'base64': meta.image_base64,
+                            'metadata': meta,
                             'mime_type': mime_type,
                             'extension': extension,
                             'page': page_num,
                             'element_index': i
                         })
 
-        # 3. Erstelle ZIP mit allem
-        zip_buffer = io.BytesIO()
+        # ✅ NEU: Byte-identische Bilder kommen nur einmal ins Package
+        representatives, duplicate_of = _mark_image_duplicates(images_data)
 
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        # 3. Erstelle ZIP mit allem (direkt auf Disk)
+        zip_path = output_path or new_package_path(prefix="bedrock_package_")
+
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
             # 3.1 RAG JSON (JSON-Lines Format für Bedrock)
-            rag_json = rag_result["json_lines"]
-            zip_file.writestr("rag_data.jsonl", rag_json)
+            spool.seek(0)
+            with zip_file.open("rag_data.jsonl", "w") as entry:
+                shutil.copyfileobj(spool, entry)
 
-            # 3.2 RAG JSON als Array (für Preview/Debugging)
-            rag_json_array = json.dumps(rag_result["documents"], indent=2, ensure_ascii=False)
-            zip_file.writestr("rag_data_preview.json", rag_json_array)
+            # 3.2 RAG JSON als Array (für Preview/Debugging) - zeilenweise aus dem JSONL
+            spool.seek(0)
+            with zip_file.open("rag_data_preview.json", "w") as entry:
+                write_json_array_from_jsonl(spool, entry)
 
             # 3.3 Bilder im Unterordner
-            manifest_images = []
-            for img in images_data:
+            # ✅ NEU: parallel laden, bereits komprimierte Formate unkomprimiert speichern
+            written = {}
+            for img, img_bytes, load_error in iter_image_bytes(representatives):
                 img_filename = f"images/page_{img['page']:03d}_{img['hash'][:8]}.{img['extension']}"
 
                 try:
-                    img_bytes = base64.b64decode(img['base64'])
-                    zip_file.writestr(img_filename, img_bytes)
-
-                    manifest_images.append({
-                        "filename": img_filename,
-                        "hash": img['hash'],
-                        "page": img['page'],
-                        "size_bytes": len(img_bytes),
-                        "mime_type": img['mime_type']
-                    })
+                    if img_bytes is None:
+                        raise ValueError(load_error)
+                    zip_file.writestr(img_filename, img_bytes, compress_type=zip_compress_type(img['mime_type']))
+                    written[img['hash']] = {"filename": img_filename, "size_bytes": len(img_bytes)}
                 except Exception as e:
                     print(f"Fehler beim Dekodieren von Bild {img['hash']}: {e}")
 
+            # Duplikate verweisen auf die Datei des identischen Bildes
+            manifest_images = []
+            for img in images_data:
+                representative_hash = duplicate_of.get(img['key'], img['hash'])
+                if representative_hash not in written:
+                    continue
+                entry = {
+                    "filename": written[representative_hash]["filename"],
+                    "hash": img['hash'],
+                    "page": img['page'],
+                    "size_bytes": written[representative_hash]["size_bytes"],
+                    "mime_type": img['mime_type']
+                }
+                if img['key'] in duplicate_of:
+                    entry["duplicate_of"] = representative_hash
+                manifest_images.append(entry)
+
             # 3.4 Manifest für deine Import-Funktion
             manifest = {
                 "source_document": filename,
@@ -1185,14 +1854,15 @@ def export_bedrock_import_package(elements, filename, describe_images=False):
                 "total_elements": rag_result["document_count"],
                 "total_images": len(images_data),
                 "rag_format": "json_lines",
-                "images_included": len(manifest_images),
+                "images_included": len(written),
+                "duplicates_mapped": len(manifest_images) - len(written),
                 "image_descriptions": rag_result.get("image_descriptions"),
                 "images": manifest_images,
                 "import_info": {
                     "rag_file": "rag_data.jsonl",
                     "images_folder": "images/",
                     "format": "Bedrock Knowledge Base compatible",
-                    "hash_algorithm": "MD5",
+                    "hash_algorithm": "SHA-256",
                     "ready_for_import": True
                 }
             }
@@ -1267,13 +1937,13 @@ aws bedrock-agent sync-knowledge-base --knowledge-base-id YOUR_KB_ID
 
 ## 🔗 **Hash-basierte Bild-Referenzierung:**
 
-Jedes Bild hat einen **eindeutigen Hash** (MD5):
+Jedes Bild hat einen **eindeutigen Hash** (SHA-256 der Bild-Bytes, 64 Hex-Zeichen - siehe `hash_algorithm` im Manifest); Dateinamen enthalten die ersten 8 Zeichen:
 
 **Im RAG JSON:**
 ```json
 {{
   "metadataAttributes": {{
-    "image_hash": "abc12345def67890",
+    "image_hash": "abc123450f1e2d3c4b5a69780f1e2d3c4b5a69780f1e2d3c4b5a697889abcdef",
     "image_available": true,
     "page": 5
   }},
@@ -1284,7 +1954,7 @@ Jedes Bild hat einen **eindeutigen Hash** (MD5):
 **Im Manifest:**
 ```json
 {{
-  "hash": "abc12345def67890",
+  "hash": "abc123450f1e2d3c4b5a69780f1e2d3c4b5a69780f1e2d3c4b5a697889abcdef",
   "filename": "images/page_005_abc12345.png"
 }}
 ```
@@ -1336,12 +2006,10 @@ def get_image_by_hash(hash_value):
 """
             zip_file.writestr("IMPORT_GUIDE.md", import_guide)
 
-        zip_bytes = zip_buffer.getvalue()
-
         return {
             "status": "success",
-            "zip_bytes": zip_bytes,
-            "total_size_bytes": len(zip_bytes),
+            "zip_path": zip_path,
+            "total_size_bytes": os.path.getsize(zip_path),
             "rag_element_count": rag_result["document_count"],
             "images_count": len(images_data),
             "manifest": manifest,
@@ -1353,272 +2021,477 @@ def get_image_by_hash(hash_value):
         }
 
     except Exception as e:
+        if zip_path and zip_path != output_path:
+            remove_package(zip_path)
         return {
             "status": "error",
             "error": str(e)
         }
+    finally:
+        if spool is not None:
+            spool.close()
+
+BEDROCK_PREVIEW_DOCS = 5
+BEDROCK_IMAGE_TYPES = ["Image", "Figure", "Picture", "FigureCaption"]
 
-def export_for_bedrock_knowledge_base(elements, filename, format_type="element", describe_images=False):
+def _new_bedrock_stats(describe_images=False):
     """
-    Exportiert Elemente im OPTIMALEN Format für Amazon Bedrock Knowledge Bases
+    Laufende Statistik eines Bedrock-Exports (wird von iter_bedrock_documents befüllt)
+    """
+    return {
+        "document_count": 0,
+        "image_documents": 0,
+        "preview": [],  # erste BEDROCK_PREVIEW_DOCS Dokumente
+        "executor": None,
+        "describe_images": describe_images,
+        # ✅ Statistiken für Bild-Beschreibungen
+        "image_stats": {
+            "total_images": 0,
+            "images_described": 0,
+            "images_failed": 0,
+            "total_cost_estimate": 0.0,
+            "models_used": {},
+            # ✅ NEU: Vision-Cache (Treffer kosten nichts)
+            "cache_hits": 0,
+            "cache_hit_rate": 0.0,
+            "cost_saved": 0.0,
+            # ✅ NEU: Beschreibungen, die von einem Cluster-Vertreter übernommen wurden
+            "duplicates_reused": 0
+        }
+    }
 
-    ✅ BEDROCK-OPTIMIERT:
-    - Jedes Element als separates JSON-Dokument
-    - Metadata klar getrennt für Filtering/Retrieval
-    - Content ohne Base64-Bilder (zu groß für RAG)
-    - Optional: Gruppierung nach Seiten
+def _update_bedrock_stats(stats, doc):
+    """
+    Zählt ein erzeugtes Dokument in die laufende Statistik ein
+    """
+    stats["document_count"] += 1
+    if len(stats["preview"]) < BEDROCK_PREVIEW_DOCS:
+        stats["preview"].append(doc)
+    meta = doc["metadataAttributes"]
+    if meta.get("image_available"):
+        stats["image_documents"] += 1
+    if not stats["describe_images"]:
+        return
+    image_stats = stats["image_stats"]
+    if meta.get("image_described"):
+        image_stats["images_described"] += 1
+        image_stats["total_cost_estimate"] += meta.get("vision_cost_estimate", 0.0)
+        if "duplicate_of" in meta:
+            image_stats["duplicates_reused"] += 1
+        elif meta.get("vision_cached"):
+            image_stats["cache_hits"] += 1
+            image_stats["cost_saved"] += meta.get("vision_cost_saved", 0.0)
+        model = meta.get("vision_model", "Unknown")
+        image_stats["models_used"][model] = image_stats["models_used"].get(model, 0) + 1
+    elif meta.get("element_type") in BEDROCK_IMAGE_TYPES:
+        image_stats["total_images"] += 1
+        if meta.get("image_described") == False:
+            image_stats["images_failed"] += 1
+
+def _bedrock_summary(stats, format_type):
+    """
+    Gemeinsamer Teil des Export-Ergebnisses (Zähler, Vorschau, Bild-Statistik, Chunking-Empfehlung)
+    """
+    import json
+
+    image_stats = None
+    if stats["describe_images"]:
+        image_stats = stats["image_stats"]
+        if image_stats["images_described"]:
+            image_stats["cache_hit_rate"] = round(image_stats["cache_hits"] / image_stats["images_described"], 3)
+        image_stats["executor"] = stats["executor"]
+        image_stats["cost_saved"] = round(image_stats["cost_saved"], 4)
+        vision_cache = get_vision_cache()
+        if vision_cache is not None:
+            image_stats["cache_totals"] = vision_cache.stats()
+
+    return {
+        "status": "success",
+        "document_count": stats["document_count"],
+        "image_document_count": stats["image_documents"],
+        # ✅ OPTIMIERT: JSON-Array NUR für kleine Vorschau (erste 5 Elemente)
+        # Verhindert Browser-Freeze bei großen Dokumenten!
+        "json_preview": json.dumps(stats["preview"], indent=2, ensure_ascii=False),
+        "is_preview": stats["document_count"] > BEDROCK_PREVIEW_DOCS,  # Flag für UI
+        "format_type": format_type,
+        "image_descriptions": image_stats,
+        "recommended_chunking": {
+            "strategy": "fixed_size" if format_type == "page" else "semantic",
+            "chunk_size": 512 if format_type == "page" else 300,
+            "overlap": 50,
+            "note": "Bedrock chunked automatisch - diese Werte sind optional"
+        }
+    }
 
-    Args:
-        elements: Liste der unstructured Elements
-        filename: Original-Dateiname
-        format_type: "element" (pro Element) oder "page" (pro Seite gruppiert)
-        describe_images: Ob Bilder mit LLM beschrieben werden sollen
+def _bedrock_page_document(page_num, page_data, filename):
+    combined_text = "\n\n".join(page_data["texts"])
 
-    Returns:
-        Dict mit Bedrock-optimierten JSON-Dokumenten
+    metadata = {
+        "source": page_data["metadata"].get("filename", filename),
+        "page": page_num,
+        "document_type": page_data["metadata"].get("filetype", "unknown"),
+        "element_count": len(page_data["texts"]),
+        "element_types": list(set(page_data["element_types"]))
+    }
+
+    if page_data["metadata"].get("languages"):
+        metadata["language"] = page_data["metadata"]["languages"][0]
+
+    return {
+        "metadataAttributes": metadata,
+        "content": combined_text
+    }
+
+def iter_bedrock_documents(elements, filename, format_type="element", describe_images=False, stats=None):
     """
-    try:
-        import json
-        from datetime import datetime
+    ✅ NEU: Erzeugt die Bedrock-Dokumente einzeln (Generator) - nichts wird gesammelt,
+    die Statistik (stats, siehe _new_bedrock_stats) wird unterwegs fortgeschrieben
 
-        bedrock_documents = []
+    Format wie export_for_bedrock_knowledge_base; bei format_type="page" wird jede Seite ein
+    Dokument (Seiten in der Reihenfolge ihres ersten Auftretens, auch wenn ihre Elemente nicht
+    hintereinander stehen).
+    """
+    if stats is None:
+        stats = _new_bedrock_stats(describe_images)
 
-        if format_type == "element":
-            # ✅ PRO ELEMENT: Jedes Element wird ein separates Dokument
-            for i, element in enumerate(elements):
-                element_type = type(element).__name__
-                element_text = str(element).strip()
+    vision_results = {}
+    duplicate_of = {}
 
-                # Überspringe leere Elemente und Seitenumbrüche
-                if not element_text or element_type == "PageBreak":
-                    continue
+    if format_type == "element":
+        # ✅ NEU: Beinahe-Duplikate (Perceptual Hash) - nur ein Vertreter pro Cluster wird beschrieben
+        # (ohne Vision-Beschreibung genügen exakte Duplikate, dHash wird dann nicht berechnet)
+        image_items = []
+        for i, element in enumerate(elements):
+            meta = getattr(element, 'metadata', None)
+            if (type(element).__name__ in ["Image", "Figure", "Picture", "FigureCaption"]
+                    and str(element).strip() and meta is not None and has_image(meta)):
+                image_items.append({
+                    "key": i,
+                    "hash": get_image_hash(meta),
+                    "metadata": meta,
+                    "mime_type": getattr(meta, 'image_mime_type', 'image/png'),
+                })
+        representatives, duplicate_of = _mark_image_duplicates(image_items, near_duplicates=describe_images)
 
-                # Metadaten sammeln
-                metadata = {
-                    "source": filename,
-                    "element_index": i,
-                    "element_type": element_type
-                }
+        if describe_images:
+            # ✅ NEU: Alle Vertreter zuerst sammeln und nebenläufig beschreiben (statt einzeln im Loop)
+            vision_jobs = [{
+                "key": img["hash"],
+                "image_hash": img["hash"],
+                "mime_type": img["mime_type"],
+                "load": lambda meta=img["metadata"]: get_image_base64(meta),  # nur bei Cache-Fehlschlag
+            } for img in representatives]
+            vision_results, vision_stats = describe_images_batch(vision_jobs)
+            stats["executor"] = vision_stats
+
+    if format_type == "element":
+        # ✅ PRO ELEMENT: Jedes Element wird ein separates Dokument
+        for i, element in enumerate(elements):
+            element_type = type(element).__name__
+            element_text = str(element).strip()
 
-                if hasattr(element, 'metadata') and element.metadata:
-                    meta = element.metadata
+            # Überspringe leere Elemente und Seitenumbrüche
+            if not element_text or element_type == "PageBreak":
+                continue
 
-                    # Wichtige Metadaten für Bedrock Filtering
-                    if hasattr(meta, 'page_number') and meta.page_number:
-                        metadata["page"] = meta.page_number
-
-                    if hasattr(meta, 'filename') and meta.filename:
-                        metadata["source"] = meta.filename
-
-                    if hasattr(meta, 'filetype') and meta.filetype:
-                        metadata["document_type"] = meta.filetype
-
-                    # Hierarchie für besseres Retrieval
-                    if hasattr(meta, 'parent_id') and meta.parent_id:
-                        metadata["parent_id"] = meta.parent_id
-
-                    if hasattr(meta, 'category_depth') and meta.category_depth is not None:
-                        metadata["hierarchy_level"] = meta.category_depth
-
-                    # Sprache für Multi-Language RAG
-                    if hasattr(meta, 'languages') and meta.languages:
-                        metadata["language"] = meta.languages[0] if meta.languages else "unknown"
-
-                    # Links für Cross-References
-                    if hasattr(meta, 'links') and meta.links:
-                        metadata["has_links"] = True
-                        metadata["link_count"] = len(meta.links)
-
-                    # Tabellen-Marker
-                    if hasattr(meta, 'text_as_html') and meta.text_as_html:
-                        metadata["is_table"] = True
-
-                    # Excel Sheet-Name
-                    if hasattr(meta, 'page_name') and meta.page_name:
-                        metadata["sheet_name"] = meta.page_name
-
-                    # Email-Metadaten
-                    if hasattr(meta, 'subject') and meta.subject:
-                        metadata["email_subject"] = meta.subject
-                    if hasattr(meta, 'sent_from') and meta.sent_from:
-                        metadata["email_from"] = str(meta.sent_from)
-
-                # ✅ BILD-HANDLING: Vision-Beschreibung statt Base64
-                content = element_text
-
-                # Prüfe ob es ein Bild-Element ist
-                if element_type in ["Image", "Figure", "Picture", "FigureCaption"]:
-                    # Extrahiere Bild-Metadaten (falls vorhanden)
-                    if hasattr(element, 'metadata') and element.metadata:
-                        meta = element.metadata
-
-                        # Original-Bild NICHT als Base64, sondern als Referenz
-                        if hasattr(meta, 'image_base64') and meta.image_base64:
-                            # ✅ OPTIMIERT: Speichere nur Hash/Referenz, nicht Base64
-                            # Nutze nur erste 1000 Zeichen für Hash (schneller!)
-                            import hashlib
-                            hash_sample = meta.image_base64[:1000] if len(meta.image_base64) > 1000 else meta.image_base64
-                            image_hash = hashlib.md5(hash_sample.encode()).hexdigest()
-                            metadata["image_hash"] = image_hash
-                            metadata["image_available"] = True
-
-                            # Optional: Bild-URL falls extern verfügbar
-                            if hasattr(meta, 'url') and meta.url:
-                                metadata["image_url"] = meta.url
-
-                        # Vision-Beschreibung hinzufügen (falls gewünscht UND describe_images=True)
-                        if describe_images and hasattr(meta, 'image_base64') and meta.image_base64:
-                            try:
-                                # Rufe Vision-API auf für Bild-Beschreibung
-                                vision_result = describe_image_with_vision_llm(
-                                    image_base64=meta.image_base64,
-                                    image_mime_type=getattr(meta, 'image_mime_type', 'image/png'),
-                                    api_provider="auto",  # Auto-detect verfügbare API
-                                    api_key=None  # Nutzt ENV-Variablen
-                                )
+            # Metadaten sammeln
+            metadata = {
+                "source": filename,
+                "element_index": i,
+                "element_type": element_type
+            }
 
-                                if vision_result and vision_result.get('description'):
-                                    vision_description = vision_result['description']
+            if hasattr(element, 'metadata') and element.metadata:
+                meta = element.metadata
 
-                                    # Vision-Beschreibung als Content (durchsuchbar!)
-                                    if vision_description and vision_description != element_text:
-                                        content = f"{element_text}\n\n[Vision-Beschreibung]: {vision_description}"
-                                        metadata["image_described"] = True
-                                        metadata["vision_model"] = vision_result.get('model', 'Unknown')
-                                        metadata["vision_cost_estimate"] = vision_result.get('cost_estimate', 0.003)
-                                    else:
-                                        metadata["image_described"] = False
-                                else:
-                                    # Vision-API fehlgeschlagen - Fallback
-                                    metadata["image_described"] = False
-                                    content = f"{element_text}\n\n[Hinweis: Vision-API nicht verfügbar - Bild nicht beschrieben]"
+                # Wichtige Metadaten für Bedrock Filtering
+                if hasattr(meta, 'page_number') and meta.page_number:
+                    metadata["page"] = meta.page_number
 
-                            except Exception as e:
-                                # Fehler bei Vision-API - dokumentieren aber nicht abbrechen
-                                metadata["image_described"] = False
-                                metadata["vision_error"] = str(e)[:100]
-                                content = f"{element_text}\n\n[Hinweis: Vision-Beschreibung fehlgeschlagen - {str(e)[:50]}]"
-                        else:
-                            metadata["image_described"] = False
+                if hasattr(meta, 'filename') and meta.filename:
+                    metadata["source"] = meta.filename
 
-                            # Warnung in Content wenn Bild nicht beschrieben
-                            if not describe_images:
-                                content = f"{element_text}\n\n[Hinweis: Bild nicht beschrieben - aktiviere 'Vision-Beschreibung' für durchsuchbaren Content]"
+                if hasattr(meta, 'filetype') and meta.filetype:
+                    metadata["document_type"] = meta.filetype
 
-                # Bedrock-Format: Metadata + Content getrennt
-                bedrock_doc = {
-                    "metadataAttributes": metadata,
-                    "content": content
-                }
+                # Hierarchie für besseres Retrieval
+                if hasattr(meta, 'parent_id') and meta.parent_id:
+                    metadata["parent_id"] = meta.parent_id
 
-                bedrock_documents.append(bedrock_doc)
+                if hasattr(meta, 'category_depth') and meta.category_depth is not None:
+                    metadata["hierarchy_level"] = meta.category_depth
 
-        elif format_type == "page":
-            # ✅ PRO SEITE: Gruppiere Elemente nach Seiten
-            pages = {}
+                # Sprache für Multi-Language RAG
+                if hasattr(meta, 'languages') and meta.languages:
+                    metadata["language"] = meta.languages[0] if meta.languages else "unknown"
 
-            for element in elements:
-                element_type = type(element).__name__
-                element_text = str(element).strip()
+                # Links für Cross-References
+                if hasattr(meta, 'links') and meta.links:
+                    metadata["has_links"] = True
+                    metadata["link_count"] = len(meta.links)
 
-                if not element_text or element_type == "PageBreak":
-                    continue
+                # Tabellen-Marker
+                if hasattr(meta, 'text_as_html') and meta.text_as_html:
+                    metadata["is_table"] = True
 
-                # Bestimme Seite
-                page_num = 1
-                if hasattr(element, 'metadata') and element.metadata:
-                    page_num = getattr(element.metadata, 'page_number', 1) or 1
+                # Excel Sheet-Name
+                if hasattr(meta, 'page_name') and meta.page_name:
+                    metadata["sheet_name"] = meta.page_name
 
-                if page_num not in pages:
-                    pages[page_num] = {
-                        "texts": [],
-                        "element_types": [],
-                        "metadata": {}
-                    }
+                # Email-Metadaten
+                if hasattr(meta, 'subject') and meta.subject:
+                    metadata["email_subject"] = meta.subject
+                if hasattr(meta, 'sent_from') and meta.sent_from:
+                    metadata["email_from"] = str(meta.sent_from)
 
-                pages[page_num]["texts"].append(element_text)
-                pages[page_num]["element_types"].append(element_type)
+            # ✅ BILD-HANDLING: Vision-Beschreibung statt Base64
+            content = element_text
 
-                # Sammle Metadaten von erster Element auf Seite
-                if not pages[page_num]["metadata"] and hasattr(element, 'metadata') and element.metadata:
+            # Prüfe ob es ein Bild-Element ist
+            if element_type in ["Image", "Figure", "Picture", "FigureCaption"]:
+                # Extrahiere Bild-Metadaten (falls vorhanden)
+                if hasattr(element, 'metadata') and element.metadata:
                     meta = element.metadata
-                    pages[page_num]["metadata"] = {
-                        "filename": getattr(meta, 'filename', filename),
-                        "filetype": getattr(meta, 'filetype', None),
-                        "languages": getattr(meta, 'languages', [])
-                    }
 
-            # Erstelle Bedrock-Dokumente pro Seite
-            for page_num, page_data in pages.items():
-                combined_text = "\n\n".join(page_data["texts"])
+                    # Original-Bild NICHT als Base64, sondern als Referenz
+                    if has_image(meta):
+                        # ✅ OPTIMIERT: Speichere nur Hash/Referenz, nicht Base64
+                        # Inhalts-Hash = blob_id aus dem Bild-Speicher (gleich wie im Bild-ZIP)
+                        image_hash = get_image_hash(meta)
+                        metadata["image_hash"] = image_hash
+                        metadata["image_available"] = True
+                        if i in duplicate_of:
+                            metadata["duplicate_of"] = duplicate_of[i]
+
+                        # Optional: Bild-URL falls extern verfügbar
+                        if hasattr(meta, 'url') and meta.url:
+                            metadata["image_url"] = meta.url
+
+                    # Vision-Beschreibung hinzufügen (falls gewünscht UND describe_images=True)
+                    if describe_images and has_image(meta):
+                        try:
+                            # Ergebnis der gesammelten Vision-Beschreibung (describe_images_batch)
+                            # Duplikate übernehmen die Beschreibung ihres Cluster-Vertreters
+                            vision_result = vision_results.get(duplicate_of.get(i, get_image_hash(meta)))
+                            if vision_result and vision_result.get('error'):
+                                # Nach allen Wiederholungen fehlgeschlagen oder Budget erschöpft
+                                metadata["image_described"] = False
+                                metadata["vision_error"] = str(vision_result['error'])[:100]
+                                reason = "Vision-Budget erschöpft" if vision_result.get('skipped') == "budget" else "Vision-Beschreibung fehlgeschlagen"
+                                content = f"{element_text}\n\n[Hinweis: {reason} - Bild nicht beschrieben]"
+                            elif vision_result and vision_result.get('description'):
+                                vision_description = vision_result['description']
+
+                                # Vision-Beschreibung als Content (durchsuchbar!)
+                                if vision_description and vision_description != element_text:
+                                    content = f"{element_text}\n\n[Vision-Beschreibung]: {vision_description}"
+                                    metadata["image_described"] = True
+                                    metadata["vision_model"] = vision_result.get('model', 'Unknown')
+                                    metadata["vision_cost_estimate"] = vision_result.get('cost_estimate', 0.003)
+                                    if i in duplicate_of:
+                                        metadata["vision_cost_estimate"] = 0.0
+                                    elif vision_result.get('cached'):
+                                        metadata["vision_cached"] = True
+                                        metadata["vision_cost_saved"] = vision_result.get('cost_saved', 0.0)
+                                else:
+                                    metadata["image_described"] = False
+                            else:
+                                # Vision-API fehlgeschlagen - Fallback
+                                metadata["image_described"] = False
+                                content = f"{element_text}\n\n[Hinweis: Vision-API nicht verfügbar - Bild nicht beschrieben]"
 
-                metadata = {
-                    "source": page_data["metadata"].get("filename", filename),
-                    "page": page_num,
-                    "document_type": page_data["metadata"].get("filetype", "unknown"),
-                    "element_count": len(page_data["texts"]),
-                    "element_types": list(set(page_data["element_types"]))
+                        except Exception as e:
+                            # Fehler bei Vision-API - dokumentieren aber nicht abbrechen
+                            metadata["image_described"] = False
+                            metadata["vision_error"] = str(e)[:100]
+                            content = f"{element_text}\n\n[Hinweis: Vision-Beschreibung fehlgeschlagen - {str(e)[:50]}]"
+                    else:
+                        metadata["image_described"] = False
+
+                        # Warnung in Content wenn Bild nicht beschrieben
+                        if not describe_images:
+                            content = f"{element_text}\n\n[Hinweis: Bild nicht beschrieben - aktiviere 'Vision-Beschreibung' für durchsuchbaren Content]"
+
+            # Bedrock-Format: Metadata + Content getrennt
+            bedrock_doc = {
+                "metadataAttributes": metadata,
+                "content": content
+            }
+
+            _update_bedrock_stats(stats, bedrock_doc)
+            yield bedrock_doc
+
+    elif format_type == "page":
+        # ✅ PRO SEITE: Gruppiere Elemente nach Seiten (Seite wird beim Seitenwechsel ausgegeben)
+        def element_page(element):
+            if hasattr(element, 'metadata') and element.metadata:
+                return getattr(element.metadata, 'page_number', 1) or 1
+            return 1
+
+        # Elemente einer Seite stehen nicht immer hintereinander (z.B. zusammengeführte
+        # Seitenbereiche) - vorab nur die Seitenzahlen lesen und stabil nach erstem Auftreten
+        # der Seite sortieren, damit jede Seite genau ein Dokument ergibt
+        page_rank = {}
+        order = [(page_rank.setdefault(element_page(element), len(page_rank)), i)
+                 for i, element in enumerate(elements)]
+        order.sort()
+
+        page_num = None
+        page_data = None
+
+        for _, i in order:
+            element = elements[i]
+            element_type = type(element).__name__
+            element_text = str(element).strip()
+
+            if not element_text or element_type == "PageBreak":
+                continue
+
+            # Bestimme Seite
+            element_page_num = element_page(element)
+
+            if element_page_num != page_num:
+                if page_data is not None:
+                    doc = _bedrock_page_document(page_num, page_data, filename)
+                    _update_bedrock_stats(stats, doc)
+                    yield doc
+                page_num = element_page_num
+                page_data = {
+                    "texts": [],
+                    "element_types": [],
+                    "metadata": {}
                 }
 
-                if page_data["metadata"].get("languages"):
-                    metadata["language"] = page_data["metadata"]["languages"][0]
+            page_data["texts"].append(element_text)
+            page_data["element_types"].append(element_type)
 
-                bedrock_doc = {
-                    "metadataAttributes": metadata,
-                    "content": combined_text
+            # Sammle Metadaten von erster Element auf Seite
+            if not page_data["metadata"] and hasattr(element, 'metadata') and element.metadata:
+                meta = element.metadata
+                page_data["metadata"] = {
+                    "filename": getattr(meta, 'filename', filename),
+                    "filetype": getattr(meta, 'filetype', None),
+                    "languages": getattr(meta, 'languages', [])
                 }
 
-                bedrock_documents.append(bedrock_doc)
+        if page_data is not None:
+            doc = _bedrock_page_document(page_num, page_data, filename)
+            _update_bedrock_stats(stats, doc)
+            yield doc
 
-        # ✅ OPTIMIERT: JSON-Lines formatieren (ein JSON pro Zeile) - OHNE indent für Performance
-        json_lines = "\n".join([json.dumps(doc, ensure_ascii=False, separators=(',', ':')) for doc in bedrock_documents])
+def write_bedrock_jsonl(elements, filename, output, format_type="element", describe_images=False):
+    """
+    ✅ NEU: Schreibt die Bedrock-Dokumente als JSON-Lines direkt in eine Datei oder einen Stream
+    Konstanter Speicherbedarf - jedes Dokument wird sofort geschrieben und verworfen.
 
-        # ✅ OPTIMIERT: JSON-Array NUR für kleine Vorschau (erste 5 Elemente)
-        # Verhindert Browser-Freeze bei großen Dokumenten!
-        preview_docs = bedrock_documents[:5] if len(bedrock_documents) > 5 else bedrock_documents
-        json_array = json.dumps(preview_docs, indent=2, ensure_ascii=False)
+    Args:
+        output: Dateipfad (atomar geschrieben) oder offener Stream (Text oder Binär)
 
-        # Vollständiges JSON wird NUR bei Download generiert (lazy)
+    Returns:
+        Dict wie export_for_bedrock_knowledge_base, aber ohne documents/json_lines;
+        stattdessen size_bytes (und output_path bei Pfad-Ausgabe)
+    """
+    import io
+    import json
+    import tempfile
 
-        # ✅ Statistiken für Bild-Beschreibungen
-        image_stats = {
-            "total_images": 0,
-            "images_described": 0,
-            "images_failed": 0,
-            "total_cost_estimate": 0.0,
-            "models_used": {}
-        }
+    stats = _new_bedrock_stats(describe_images)
+    tmp_path = None
+    try:
+        if isinstance(output, (str, os.PathLike)):
+            output_path = os.fspath(output)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", prefix=".tmp_")
+            stream = os.fdopen(fd, "wb")
+        else:
+            output_path = None
+            stream = output
+        binary = not isinstance(stream, io.TextIOBase)
 
-        if describe_images:
-            for doc in bedrock_documents:
-                meta = doc["metadataAttributes"]
-                if meta.get("image_described"):
-                    image_stats["images_described"] += 1
-                    image_stats["total_cost_estimate"] += meta.get("vision_cost_estimate", 0.0)
-                    model = meta.get("vision_model", "Unknown")
-                    image_stats["models_used"][model] = image_stats["models_used"].get(model, 0) + 1
-                elif meta.get("element_type") in ["Image", "Figure", "FigureCaption", "Picture"]:
-                    image_stats["total_images"] += 1
-                    if meta.get("image_described") == False:
-                        image_stats["images_failed"] += 1
+        size_bytes = 0
+        try:
+            for doc in iter_bedrock_documents(elements, filename, format_type, describe_images, stats):
+                line = json.dumps(doc, ensure_ascii=False, separators=(',', ':')) + "\n"
+                data = line.encode("utf-8")
+                stream.write(data if binary else line)
+                size_bytes += len(data)
+        finally:
+            if tmp_path:
+                stream.close()
+
+        if tmp_path:
+            os.replace(tmp_path, output_path)
+            tmp_path = None
+
+        result = _bedrock_summary(stats, format_type)
+        result["size_bytes"] = size_bytes
+        if output_path:
+            result["output_path"] = output_path
+        return result
 
+    except Exception as e:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
         return {
-            "status": "success",
-            "documents": bedrock_documents,  # ⚠️ Nur für Download, nicht für UI
-            "document_count": len(bedrock_documents),
-            "json_lines": json_lines,  # Für Bedrock Upload
-            "json_preview": json_array,  # ✅ NUR VORSCHAU (erste 5)
-            "is_preview": len(bedrock_documents) > 5,  # Flag für UI
-            "format_type": format_type,
-            "image_descriptions": image_stats if describe_images else None,
-            "recommended_chunking": {
-                "strategy": "fixed_size" if format_type == "page" else "semantic",
-                "chunk_size": 512 if format_type == "page" else 300,
-                "overlap": 50,
-                "note": "Bedrock chunked automatisch - diese Werte sind optional"
-            }
+            "status": "error",
+            "error": str(e)
         }
 
+def write_json_array_from_jsonl(jsonl_stream, output):
+    """
+    ✅ NEU: Wandelt JSON-Lines (Binär-Stream) zeilenweise in ein eingerücktes JSON-Array um
+    Für das bisherige "_bedrock_rag.json"-Format und die Paket-Vorschau, ohne alles zu laden.
+    """
+    import json
+
+    separator = b"[\n"
+    for line in jsonl_stream:
+        doc_json = json.dumps(json.loads(line), indent=2, ensure_ascii=False)
+        output.write(separator + ("  " + doc_json.replace("\n", "\n  ")).encode("utf-8"))
+        separator = b",\n"
+    output.write(b"[]" if separator == b"[\n" else b"\n]")
+
+def export_for_bedrock_knowledge_base(elements, filename, format_type="element", describe_images=False, output=None):
+    """
+    Exportiert Elemente im OPTIMALEN Format für Amazon Bedrock Knowledge Bases
+
+    ✅ BEDROCK-OPTIMIERT:
+    - Jedes Element als separates JSON-Dokument
+    - Metadata klar getrennt für Filtering/Retrieval
+    - Content ohne Base64-Bilder (zu groß für RAG)
+    - Optional: Gruppierung nach Seiten
+    - ✅ NEU: Streaming-Modus (output) für beliebig große Dokumente
+
+    Args:
+        elements: Liste der unstructured Elements
+        filename: Original-Dateiname
+        format_type: "element" (pro Element) oder "page" (pro Seite gruppiert)
+        describe_images: Ob Bilder mit LLM beschrieben werden sollen
+        output: Optional - Dateipfad oder Stream; dann wird JSONL direkt geschrieben
+                (write_bedrock_jsonl) und documents/json_lines entfallen
+
+    Returns:
+        Dict mit Bedrock-optimierten JSON-Dokumenten
+    """
+    if output is not None:
+        return write_bedrock_jsonl(elements, filename, output, format_type, describe_images)
+
+    try:
+        import json
+
+        stats = _new_bedrock_stats(describe_images)
+        bedrock_documents = list(iter_bedrock_documents(elements, filename, format_type, describe_images, stats))
+
+        # ✅ OPTIMIERT: JSON-Lines formatieren (ein JSON pro Zeile) - OHNE indent für Performance
+        json_lines = "\n".join([json.dumps(doc, ensure_ascii=False, separators=(',', ':')) for doc in bedrock_documents])
+
+        result = _bedrock_summary(stats, format_type)
+        result["documents"] = bedrock_documents  # ⚠️ Nur für Download, nicht für UI
+        result["json_lines"] = json_lines  # Für Bedrock Upload
+        return result
+
     except Exception as e:
         return {
             "status": "error",
@@ -1741,7 +2614,8 @@ def analyze_extracted_elements(elements):
                     metadata_dict["detection_class_prob"] = detection_prob
 
                 # === BILD-METADATEN ===
-                metadata_dict["image_base64"] = getattr(metadata, 'image_base64', None)
+                metadata_dict["image_base64"] = get_image_base64(metadata) if has_image(metadata) else None
+                metadata_dict["image_blob_id"] = getattr(metadata, 'image_blob_id', None)
                 metadata_dict["image_mime_type"] = getattr(metadata, 'image_mime_type', None)
                 metadata_dict["image_path"] = getattr(metadata, 'image_path', None)
                 metadata_dict["image_url"] = getattr(metadata, 'image_url', None)
@@ -1839,11 +2713,11 @@ def analyze_extracted_elements(elements):
                 element_info["metadata"] = metadata_dict
 
                 # PDF-Bilder sammeln
-                if metadata_dict.get("image_path") or metadata_dict.get("image_base64"):
+                if metadata_dict.get("image_path") or has_image(metadata):
                     analysis["format_specific"]["pdf"]["images"].append({
                         "element_index": i,
                         "path": metadata_dict.get("image_path"),
-                        "has_base64": bool(metadata_dict.get("image_base64")),
+                        "has_base64": has_image(metadata),
                         "mime_type": metadata_dict.get("image_mime_type")
                     })
 
@@ -1863,9 +2737,9 @@ def analyze_extracted_elements(elements):
 
                 # ✅ Prüfe auf Base64-Bild-Daten in Metadaten
                 if hasattr(element, 'metadata') and element.metadata:
-                    if hasattr(element.metadata, 'image_base64') and element.metadata.image_base64:
+                    if has_image(element.metadata):
                         image_info["has_base64"] = True
-                        image_info["base64_data"] = element.metadata.image_base64
+                        image_info["base64_data"] = get_image_base64(element.metadata)
                         image_info["mime_type"] = getattr(element.metadata, 'image_mime_type', 'image/jpeg')
 
                 analysis["images"].append(image_info)
@@ -1901,101 +2775,174 @@ def analyze_extracted_elements(elements):
             "error": str(e)
         }
 
-def convert_elements_to_all_formats(elements):
+# Formate des Single-Pass-Serializers (convert_elements_to_all_formats)
+SERIALIZER_FORMATS = ("text", "html", "markdown", "json", "json_full_metadata", "dicts")
+
+FORMAT_ERROR_LABELS = {
+    "text": "Text Konvertierung fehlgeschlagen",
+    "html": "HTML Konvertierung fehlgeschlagen",
+    "markdown": "Markdown Konvertierung fehlgeschlagen",
+    "json": "JSON Konvertierung fehlgeschlagen",
+    "json_full_metadata": "JSON mit Metadaten fehlgeschlagen",
+    "dicts": "Dictionary Konvertierung fehlgeschlagen",
+}
+
+def _element_full_metadata_dict(element):
     """
-    Konvertiert Elemente in alle verfügbaren Ausgabeformate
+    Element als Dict mit GARANTIERT VOLLSTÄNDIGEN METADATEN (für json_full_metadata)
     """
-    conversions = {}
+    element_dict = {
+        "type": type(element).__name__,
+        "element_id": getattr(element, 'id', None),
+        "text": str(element),
+    }
 
-    try:
-        # ORIGINAL Text Format - OFFIZIELLE Unstructured.io Funktion
-        text_content = elements_to_text(elements)
-        conversions["text"] = text_content
-    except Exception as e:
-        conversions["text"] = f"Text Konvertierung fehlgeschlagen: {e}"
+    # Vollständige Metadaten extrahieren
+    if hasattr(element, 'metadata') and element.metadata:
+        metadata = element.metadata
+        metadata_dict = {}
+
+        # Basis-Metadaten
+        for attr in ['page_number', 'page_name', 'filename', 'file_directory',
+                     'filetype', 'coordinates', 'parent_id', 'category_depth',
+                     'text_as_html', 'languages', 'emphasized_text_contents',
+                     'emphasized_text_tags', 'is_continuation', 'detection_class_prob',
+                     'last_modified', 'file_size', 'data_source', 'url']:
+            if hasattr(metadata, attr):
+                metadata_dict[attr] = getattr(metadata, attr, None)
+
+        # Bild-Metadaten
+        for attr in ['image_path', 'image_base64', 'image_blob_id', 'image_mime_type',
+                     'image_width', 'image_height']:
+            if hasattr(metadata, attr):
+                value = getattr(metadata, attr, None)
+                # Kürze Base64 für bessere Lesbarkeit (optional)
+                if attr == 'image_base64' and value:
+                    metadata_dict[attr] = value[:100] + "..." if len(value) > 100 else value
+                    metadata_dict['has_full_image_base64'] = True
+                elif attr == 'image_base64' and has_image(metadata):
+                    # Bild liegt im Bild-Speicher (image_blob_id) - Vorschau von dort
+                    value = get_image_base64(metadata) or ""
+                    metadata_dict[attr] = value[:100] + "..." if len(value) > 100 else value
+                    metadata_dict['has_full_image_base64'] = bool(value)
+                else:
+                    metadata_dict[attr] = value
 
-    try:
-        # HTML Format (erweitert)
-        html_content = elements_to_html(elements, exclude_binary_image_data=True)
-        conversions["html"] = html_content
-    except Exception as e:
-        conversions["html"] = f"HTML Konvertierung fehlgeschlagen: {e}"
+        # Link-Metadaten
+        if hasattr(metadata, 'link_urls'):
+            metadata_dict['link_urls'] = metadata.link_urls
+        if hasattr(metadata, 'link_texts'):
+            metadata_dict['link_texts'] = metadata.link_texts
 
-    try:
-        # Markdown Format (erweitert)
-        md_content = elements_to_md(elements, exclude_binary_image_data=True)
-        conversions["markdown"] = md_content
-    except Exception as e:
-        conversions["markdown"] = f"Markdown Konvertierung fehlgeschlagen: {e}"
+        # Regex-Metadaten
+        if hasattr(metadata, 'regex_metadata'):
+            metadata_dict['regex_metadata'] = metadata.regex_metadata
+
+        element_dict["metadata"] = metadata_dict
 
+    return element_dict
+
+def convert_elements_to_all_formats(elements, formats=None):
+    """
+    Konvertiert Elemente in alle (bzw. die angeforderten) Ausgabeformate
+    ✅ NEU: Single-Pass - jedes Element wird genau einmal besucht und speist die
+    Writer für Text, Markdown, Dicts/JSON und JSON mit Metadaten gleichzeitig.
+    HTML bleibt ein eigener elements_to_html-Durchlauf (gruppiert nach Seiten/Eltern).
+    JSON ist byteweise identisch mit elements_to_json(elements, indent=2) auf Elementen mit image_base64
+
+    Args:
+        elements: Liste der unstructured Elements (oder ElementStore)
+        formats: Iterable aus SERIALIZER_FORMATS (Standard: alle)
+
+    Returns:
+        Dict Format -> Ergebnis; fehlgeschlagene Formate enthalten eine Fehlermeldung
+    """
+    import json
+    try:
+        from unstructured.staging.base import element_to_md
+    except ImportError:
+        element_to_md = None  # Ältere unstructured-Versionen: elements_to_md nach dem Durchlauf
     try:
-        # JSON Format - Standard (könnte Metadaten weglassen)
-        json_content = elements_to_json(elements, indent=2)
-        conversions["json"] = json_content
+        # Rundet coordinates/detection_class_prob wie elements_to_json
+        from unstructured.staging.base import _fix_metadata_field_precision
+    except ImportError:
+        _fix_metadata_field_precision = list
 
-        # ✅ NEU: Erweiterte JSON-Variante mit GARANTIERT VOLLSTÄNDIGEN METADATEN
-        import json
-        json_with_full_metadata = []
+    formats = set(formats or SERIALIZER_FORMATS)
+    conversions = {}
+    errors = {}
+
+    # Writer nur für angeforderte Formate (None = nicht angefordert oder fehlgeschlagen)
+    text_parts = [] if "text" in formats else None
+    md_parts = [] if "markdown" in formats and element_to_md is not None else None
+    dicts = [] if formats & {"json", "dicts"} else None
+    json_dicts = [] if dicts is not None else None  # wie dicts, Koordinaten gerundet
+    full_metadata = [] if "json_full_metadata" in formats else None
+
+    for element in elements:
+        if text_parts is not None:
+            text_parts.append(str(element))
+        if md_parts is not None:
+            try:
+                md_parts.append(element_to_md(element, exclude_binary_image_data=True))
+            except Exception as e:
+                errors["markdown"], md_parts = e, None
+        if dicts is not None:
+            try:
+                element_dict = inline_image_data(element.to_dict())
+                json_element = _fix_metadata_field_precision([element])[0]
+                dicts.append(element_dict)
+                json_dicts.append(element_dict if json_element is element
+                                  else inline_image_data(json_element.to_dict()))
+            except Exception as e:
+                errors["json"] = errors["dicts"] = e
+                dicts = json_dicts = None
+        if full_metadata is not None:
+            try:
+                full_metadata.append(_element_full_metadata_dict(element))
+            except Exception as e:
+                errors["json_full_metadata"], full_metadata = e, None
 
-        for element in elements:
-            element_dict = {
-                "type": type(element).__name__,
-                "element_id": getattr(element, 'id', None),
-                "text": str(element),
-            }
+    # ORIGINAL Text Format (wie elements_to_text)
+    if text_parts is not None:
+        conversions["text"] = "\n\n".join(text_parts)
 
-            # Vollständige Metadaten extrahieren
-            if hasattr(element, 'metadata') and element.metadata:
-                metadata = element.metadata
-                metadata_dict = {}
+    # HTML gruppiert Elemente nach Seiten/Eltern - braucht die ganze Liste
+    if "html" in formats:
+        try:
+            conversions["html"] = elements_to_html(elements, exclude_binary_image_data=True)
+        except Exception as e:
+            errors["html"] = e
 
-                # Basis-Metadaten
-                for attr in ['page_number', 'page_name', 'filename', 'file_directory',
-                             'filetype', 'coordinates', 'parent_id', 'category_depth',
-                             'text_as_html', 'languages', 'emphasized_text_contents',
-                             'emphasized_text_tags', 'is_continuation', 'detection_class_prob',
-                             'last_modified', 'file_size', 'data_source', 'url']:
-                    if hasattr(metadata, attr):
-                        metadata_dict[attr] = getattr(metadata, attr, None)
-
-                # Bild-Metadaten
-                for attr in ['image_path', 'image_base64', 'image_mime_type',
-                             'image_width', 'image_height']:
-                    if hasattr(metadata, attr):
-                        value = getattr(metadata, attr, None)
-                        # Kürze Base64 für bessere Lesbarkeit (optional)
-                        if attr == 'image_base64' and value:
-                            metadata_dict[attr] = value[:100] + "..." if len(value) > 100 else value
-                            metadata_dict['has_full_image_base64'] = True
-                        else:
-                            metadata_dict[attr] = value
-
-                # Link-Metadaten
-                if hasattr(metadata, 'link_urls'):
-                    metadata_dict['link_urls'] = metadata.link_urls
-                if hasattr(metadata, 'link_texts'):
-                    metadata_dict['link_texts'] = metadata.link_texts
-
-                # Regex-Metadaten
-                if hasattr(metadata, 'regex_metadata'):
-                    metadata_dict['regex_metadata'] = metadata.regex_metadata
-
-                element_dict["metadata"] = metadata_dict
-
-            json_with_full_metadata.append(element_dict)
-
-        conversions["json_full_metadata"] = json.dumps(json_with_full_metadata, indent=2, ensure_ascii=False)
+    # Markdown Format (wie elements_to_md)
+    if md_parts is not None:
+        conversions["markdown"] = "\n".join(md_parts)
+    elif "markdown" in formats and element_to_md is None:
+        try:
+            conversions["markdown"] = elements_to_md(elements, exclude_binary_image_data=True)
+        except Exception as e:
+            errors["markdown"] = e
 
-    except Exception as e:
-        conversions["json"] = f"JSON Konvertierung fehlgeschlagen: {e}"
-        conversions["json_full_metadata"] = f"JSON mit Metadaten fehlgeschlagen: {e}"
+    # JSON Format (wie elements_to_json) + Dictionary Format (wie elements_to_dicts)
+    if dicts is not None:
+        if "json" in formats:
+            try:
+                conversions["json"] = json.dumps(json_dicts, indent=2, sort_keys=True)
+            except Exception as e:
+                errors["json"] = e
+        if "dicts" in formats:
+            conversions["dicts"] = dicts
 
-    try:
-        # Dictionary Format für weitere Verarbeitung
-        dict_content = elements_to_dicts(elements)
-        conversions["dicts"] = dict_content
-    except Exception as e:
-        conversions["dicts"] = f"Dictionary Konvertierung fehlgeschlagen: {e}"
+    # ✅ Erweiterte JSON-Variante mit GARANTIERT VOLLSTÄNDIGEN METADATEN
+    if full_metadata is not None:
+        try:
+            conversions["json_full_metadata"] = json.dumps(full_metadata, indent=2, ensure_ascii=False)
+        except Exception as e:
+            errors["json_full_metadata"] = e
+
+    for format_name, error in errors.items():
+        if format_name in formats:
+            conversions[format_name] = f"{FORMAT_ERROR_LABELS[format_name]}: {error}"
 
     return conversions
 
@@ -2004,15 +2951,9 @@ def convert_elements_to_all_formats_with_images(elements):
     Konvertiert Elemente in alle verfügbaren Ausgabeformate MIT Bild-Integration
     ✅ OPTIMIERT: Schnellere Verarbeitung, keine print-Statements
     ✅ NEU: Bilder werden in HTML und Markdown integriert
+    ✅ NEU: Text/JSON/Dicts aus einem gemeinsamen Durchlauf (convert_elements_to_all_formats)
     """
-    conversions = {}
-
-    # Text Format - schnell
-    try:
-        text_content = elements_to_text(elements)
-        conversions["text"] = text_content
-    except Exception as e:
-        conversions["text"] = f"Text Konvertierung fehlgeschlagen: {e}"
+    conversions = convert_elements_to_all_formats(elements, formats=("text", "json", "dicts"))
 
     # HTML Format mit Base64-Bildern - kann länger dauern
     try:
@@ -2028,26 +2969,13 @@ def convert_elements_to_all_formats_with_images(elements):
     except Exception as e:
         conversions["markdown"] = f"Markdown Konvertierung fehlgeschlagen: {e}"
 
-    # JSON Format (Standard-Library)
-    try:
-        json_content = elements_to_json(elements, indent=2)
-        conversions["json"] = json_content
-    except Exception as e:
-        conversions["json"] = f"JSON Konvertierung fehlgeschlagen: {e}"
-
-    # Dictionary Format
-    try:
-        dict_content = elements_to_dicts(elements)
-        conversions["dicts"] = dict_content
-    except Exception as e:
-        conversions["dicts"] = f"Dictionary Konvertierung fehlgeschlagen: {e}"
-
     return conversions
 
-def elements_to_html_with_images(elements, include_metadata=True):
+def elements_to_html_with_images(elements, include_metadata=True, image_src=None):
     """
     Konvertiert Elemente zu HTML MIT eingebetteten Base64-Bildern UND Metadaten
     ✅ NEU: Zeigt Links, Formatierungen, Hierarchien und mehr
+    ✅ NEU: image_src = f(metadata) -> relativer Pfad (AssetCollector) statt Data-URL
     """
     try:
         html_parts = []
@@ -2075,11 +3003,16 @@ def elements_to_html_with_images(elements, include_metadata=True):
             # ✅ VERBESSERT: Erweiterte Bild-Element-Erkennung
             if element_type in ["Image", "FigureCaption", "Figure", "Picture"]:
                 # Prüfe auf Base64-Bild-Daten in Metadaten
-                if (hasattr(element, 'metadata') and element.metadata and
-                    hasattr(element.metadata, 'image_base64') and element.metadata.image_base64):
+                if (hasattr(element, 'metadata') and element.metadata and has_image(element.metadata)):
 
-                    base64_data = element.metadata.image_base64
-                    mime_type = getattr(element.metadata, 'image_mime_type', 'image/jpeg')
+                    if image_src is not None:
+                        # Externe Referenz (assets/...) - Bild liegt einmal neben dem Dokument
+                        img_src = image_src(element.metadata)
+                    else:
+                        # Base64 erst hier für die Data-URL erzeugen (Bild-Speicher)
+                        base64_data = get_image_base64(element.metadata)
+                        mime_type = getattr(element.metadata, 'image_mime_type', 'image/jpeg')
+                        img_src = f"data:{mime_type};base64,{base64_data}"
 
                     # HTML für eingebettetes Bild mit Metadaten (effizient mit Liste)
                     img_parts = ['<div class="image-container" style="margin: 15px 0; padding: 10px; border: 1px solid #ddd; border-radius: 4px; background: #f9f9f9;">']
@@ -2087,7 +3020,7 @@ def elements_to_html_with_images(elements, include_metadata=True):
                     if include_metadata and metadata.get('page_number'):
                         img_parts.append(f'<div class="meta-badge" style="font-size: 0.8em; color: #666; margin-bottom: 5px;">📄 Seite {metadata["page_number"]}</div>')
 
-                    img_parts.append(f'<div style="text-align: center;"><img src="data:{mime_type};base64,{base64_data}" alt="{element_text[:100] if element_text else "Extrahiertes Bild"}" style="max-width: 100%; height: auto; border: 1px solid #ccc; border-radius: 4px;" /></div>')
+                    img_parts.append(f'<div style="text-align: center;"><img src="{img_src}" alt="{element_text[:100] if element_text else "Extrahiertes Bild"}" style="max-width: 100%; height: auto; border: 1px solid #ccc; border-radius: 4px;" /></div>')
 
                     if element_text:
                         img_parts.append(f'<p class="image-caption" style="font-style: italic; color: #666; margin-top: 8px; text-align: center;">{element_text}</p>')
@@ -2138,12 +3071,17 @@ def elements_to_html_with_images(elements, include_metadata=True):
                     if meta_badges:
                         element_parts.append(f'<div class="meta-info" style="font-size: 0.75em; color: #999; margin-bottom: 3px;">{" | ".join(meta_badges)}</div>')
 
-                # ✅ TEXT-FORMATIERUNG: Betonten Text hervorheben
-                display_text = element_text
-                if metadata.get('emphasized_text_contents'):
-                    for emph_text in metadata['emphasized_text_contents']:
-                        if emph_text in display_text:
-                            display_text = display_text.replace(emph_text, f'<strong style="background: #ffeb3b; padding: 2px 4px;">{emph_text}</strong>')
+                # ✅ TEXT-FORMATIERUNG: Betonten Text hervorheben und Linktexte inline verlinken
+                # ✅ NEU: Ein Scan über den Text (text_annotation) statt replace() pro Hervorhebung
+                link_urls = metadata.get('link_urls') or []
+                link_texts = metadata.get('link_texts') or []
+                display_text, inline_links = annotate_text(
+                    element_text,
+                    emphasized=metadata.get('emphasized_text_contents'),
+                    links=[(link_texts[idx] if idx < len(link_texts) else None, url) for idx, url in enumerate(link_urls)],
+                    render_emphasis=lambda segment: f'<strong style="background: #ffeb3b; padding: 2px 4px;">{segment}</strong>',
+                    render_link=lambda segment, url: f'<a href="{url}" target="_blank" style="color: #0066cc; text-decoration: underline;">{segment}</a>'
+                )
 
                 # ✅ LINKS ANKLICKBAR MACHEN
                 if metadata.get('links'):
@@ -2154,10 +3092,12 @@ def elements_to_html_with_images(elements, include_metadata=True):
                         elif isinstance(link_data, str):
                             display_text += f' <a href="{link_data}" target="_blank" style="color: #0066cc; text-decoration: underline;">🔗</a>'
 
-                if metadata.get('link_urls'):
-                    for idx, url in enumerate(metadata['link_urls']):
-                        link_text = metadata.get('link_texts', [])[idx] if metadata.get('link_texts') and idx < len(metadata['link_texts']) else '🔗'
-                        display_text += f' <a href="{url}" target="_blank" style="color: #0066cc; text-decoration: underline;">{link_text}</a>'
+                # Links, deren Text nicht im Element vorkommt, werden angehängt
+                for idx, url in enumerate(link_urls):
+                    if idx in inline_links:
+                        continue
+                    link_text = link_texts[idx] if idx < len(link_texts) else '🔗'
+                    display_text += f' <a href="{url}" target="_blank" style="color: #0066cc; text-decoration: underline;">{link_text}</a>'
 
                 # Element-spezifisches HTML mit Hierarchie
                 if element_type == "Title":
@@ -2186,13 +3126,14 @@ def elements_to_html_with_images(elements, include_metadata=True):
 
     except Exception as e:
         # Fallback zur Standard-Funktion OHNE exclude_binary_image_data
-        return elements_to_html(elements, exclude_binary_image_data=False)
+        return elements_to_html(elements, exclude_binary_image_data=image_src is not None)
 
-def elements_to_markdown_with_images(elements):
+def elements_to_markdown_with_images(elements, image_src=None):
     """
     Konvertiert Elemente zu Markdown MIT eingebetteten Base64-Bildern
     ✅ OPTIMAL für LLMs - Bilder als Data-URLs integriert
     ✅ KORRIGIERT: Bilder werden GARANTIERT angezeigt
+    ✅ NEU: image_src = f(metadata) -> relativer Pfad (AssetCollector) statt Data-URL
     """
     try:
         markdown_parts = []
@@ -2204,16 +3145,21 @@ def elements_to_markdown_with_images(elements):
             # ✅ VERBESSERT: Erweiterte Bild-Element-Erkennung
             if element_type in ["Image", "FigureCaption", "Figure", "Picture"]:
                 # ✅ Base64-Bilder als Markdown-Images integrieren
-                if (hasattr(element, 'metadata') and element.metadata and
-                    hasattr(element.metadata, 'image_base64') and element.metadata.image_base64):
+                if (hasattr(element, 'metadata') and element.metadata and has_image(element.metadata)):
 
-                    base64_data = element.metadata.image_base64
-                    mime_type = getattr(element.metadata, 'image_mime_type', 'image/jpeg')
+                    if image_src is not None:
+                        # Externe Referenz (assets/...) - Bild liegt einmal neben dem Dokument
+                        img_src = image_src(element.metadata)
+                    else:
+                        # Base64 erst hier für die Data-URL erzeugen (Bild-Speicher)
+                        base64_data = get_image_base64(element.metadata)
+                        mime_type = getattr(element.metadata, 'image_mime_type', 'image/jpeg')
+                        img_src = f"data:{mime_type};base64,{base64_data}"
                     element_text = str(element).strip()
 
-                    # Markdown-Bild mit Data-URL
+                    # Markdown-Bild mit Data-URL bzw. relativem Pfad
                     alt_text = element_text[:100] if element_text else f"Extrahiertes Bild ({element_type})"
-                    img_markdown = f'![{alt_text}](data:{mime_type};base64,{base64_data})'
+                    img_markdown = f'![{alt_text}]({img_src})'
 
                     markdown_parts.append(img_markdown)
                     image_count += 1
@@ -2281,13 +3227,17 @@ def elements_to_markdown_with_images(elements):
                 if meta_info:
                     markdown_parts.append(f"> {' | '.join(meta_info)}")
 
-                # ✅ TEXT-FORMATIERUNG: Betonten Text hervorheben
-                display_text = element_text
-                if metadata.get('emphasized_text_contents'):
-                    for emph_text in metadata['emphasized_text_contents']:
-                        if emph_text in display_text:
-                            # Markdown: **fett** oder __fett__
-                            display_text = display_text.replace(emph_text, f'**{emph_text}**')
+                # ✅ TEXT-FORMATIERUNG: Betonten Text hervorheben (**fett**) und Linktexte inline verlinken
+                # ✅ NEU: Ein Scan über den Text (text_annotation) statt replace() pro Hervorhebung
+                link_urls = metadata.get('link_urls') or []
+                link_texts = metadata.get('link_texts') or []
+                display_text, inline_links = annotate_text(
+                    element_text,
+                    emphasized=metadata.get('emphasized_text_contents'),
+                    links=[(link_texts[idx] if idx < len(link_texts) else None, url) for idx, url in enumerate(link_urls)],
+                    render_emphasis=lambda segment: f'**{segment}**',
+                    render_link=lambda segment, url: f'[{segment}]({url})'
+                )
 
                 # ✅ LINKS HINZUFÜGEN
                 links_to_add = []
@@ -2298,10 +3248,12 @@ def elements_to_markdown_with_images(elements):
                         elif isinstance(link_data, str):
                             links_to_add.append(link_data)
 
-                if metadata.get('link_urls'):
-                    for idx, url in enumerate(metadata['link_urls']):
-                        link_text = metadata.get('link_texts', [])[idx] if metadata.get('link_texts') and idx < len(metadata['link_texts']) else 'Link'
-                        display_text += f' [{link_text}]({url})'
+                # Links, deren Text nicht im Element vorkommt, werden angehängt
+                for idx, url in enumerate(link_urls):
+                    if idx in inline_links:
+                        continue
+                    link_text = link_texts[idx] if idx < len(link_texts) else 'Link'
+                    display_text += f' [{link_text}]({url})'
 
                 # Element-spezifisches Markdown mit Hierarchie
                 if element_type == "Title":
@@ -2348,7 +3300,7 @@ def elements_to_markdown_with_images(elements):
 
     except Exception as e:
         # Fallback zur Standard-Funktion OHNE exclude_binary_image_data
-        return elements_to_md(elements, exclude_binary_image_data=False)
+        return elements_to_md(elements, exclude_binary_image_data=image_src is not None)
 # STREAMLIT APP - KORRIGIERT UND VEREINFACHT
 def main():
     """
@@ -2381,6 +3333,20 @@ def main():
 
     with debug_col3:
         st.write(f"🔗 Advanced: {ADVANCED_FEATURES_AVAILABLE}")
+        partition_pool = get_partition_pool()
+        if partition_pool is not None:
+            # ✅ NEU: Worker vorwärmen, bevor der erste Job kommt
+            partition_pool.start_workers()
+            pool_stats = partition_pool.stats()
+            st.write(f"⚙️ Worker: {pool_stats['workers']} | Laufend/Wartend: {pool_stats['in_flight']} | Max. Warteschlange: {pool_stats['queue_depth']}")
+        else:
+            st.write("⚙️ Worker: inline (kein Pool)")
+        # ✅ NEU: Modell-Warm-up beim Container-Start (warmup.py)
+        warmup_report = read_ready_marker()
+        if warmup_report is None:
+            st.write("🔥 Warm-up: läuft noch...")
+        else:
+            st.write(f"🔥 Warm-up: {warmup_report.get('status')} ({warmup_report.get('duration', 0)}s)")
 
     # Stop wenn Library nicht verfügbar
     if not UNSTRUCTURED_AVAILABLE:
@@ -2460,7 +3426,7 @@ def main():
         st.subheader("⚙️ Verarbeitungs-Strategien")
         strategy = st.selectbox(
             "Open Source Strategie",
-            ["auto", "fast", "hi_res", "ocr_only"],
+            ["auto", "fast", "hi_res", "ocr_only", "adaptive"],
             help="""**Verarbeitungs-Qualität wählen:**
 
 📄 **Gilt für:** PDF, DOCX, PPTX, Bilder
@@ -2470,6 +3436,7 @@ def main():
 • **fast** - Schnell, weniger genau
 • **hi_res** - Langsam, sehr genau (beste Qualität)
 • **ocr_only** - Nur OCR-Texterkennung
+• **adaptive** - PDF: pro Seite fast (Textseiten) oder hi_res (Scans, Bilder, Tabellen)
 
 Alle Strategien laufen lokal ohne externe APIs."""
         )
@@ -2489,6 +3456,19 @@ Alle Strategien laufen lokal ohne externe APIs."""
 Empfohlen für Dokumente mit Tabellen."""
         )
 
+        parallel_pages = st.checkbox(
+            "⚡ Parallele PDF-Verarbeitung",
+            value=True,
+            help="""**Lange PDFs in Seitenbereiche aufteilen:**
+
+📄 **Gilt für:** PDF (ab ~8 Seiten)
+
+• **AN:** Seitenbereiche werden parallel auf mehreren CPU-Kernen verarbeitet
+• **AUS:** Ein einziger Durchlauf über alle Seiten
+
+Seitennummern, Reihenfolge und Hierarchie bleiben erhalten."""
+        )
+
         include_images = st.checkbox(
             "Bild-Extraktion",
             value=True,
@@ -2575,13 +3555,49 @@ Empfohlen wenn Bilder wichtig sind."""
                         with open(temp_path, "wb") as f:
                             f.write(uploaded_file.getvalue())
 
-                        # Processing
-                        result = process_with_open_source_library(
+                        # ✅ NEU: Streaming-Processing - Fortschritt und erste Elemente,
+                        # während spätere Seiten noch verarbeitet werden
+                        progress_bar = st.progress(0.0, text="Starte Verarbeitung...")
+                        first_elements_box = st.empty()
+                        # Nur Vorschau + Anzahl halten - die vollständige Liste kommt mit "done"
+                        first_elements = []
+                        streamed_count = 0
+                        result = None
+
+                        for event in iter_process_with_open_source_library(
                             temp_path,
                             strategy,
                             include_tables=include_tables,
-                            include_images=include_images
-                        )
+                            include_images=include_images,
+                            parallel_pages=parallel_pages
+                        ):
+                            if event["event"] == "done":
+                                result = event["result"]
+                                break
+
+                            streamed_count += len(event["elements"])
+                            start_page, end_page = event["pages"]
+                            total_units = event.get("total_units")
+                            if total_units:
+                                progress_bar.progress(
+                                    min(event["completed_units"] / total_units, 1.0),
+                                    text=f"Seiten {start_page}-{end_page} fertig ({event['completed_units']}/{total_units}) - {streamed_count} Elemente"
+                                )
+                            else:
+                                progress_bar.progress(1.0, text=f"Seite {end_page} - {streamed_count} Elemente")
+
+                            # Erste Elemente sofort anzeigen
+                            if len(first_elements) < 5:
+                                first_elements.extend(event["elements"][:5 - len(first_elements)])
+                                with first_elements_box.container():
+                                    st.caption("📝 Erste Elemente (Verarbeitung läuft weiter...)")
+                                    for element in first_elements:
+                                        text = str(element).strip()
+                                        if text:
+                                            st.write(f"**{type(element).__name__}:** {text[:200]}")
+
+                        progress_bar.empty()
+                        first_elements_box.empty()
 
                         # Temporäre Datei löschen
                         try:
@@ -2589,6 +3605,26 @@ Empfohlen wenn Bilder wichtig sind."""
                         except:
                             pass
 
+                        # ✅ NEU: Elemente in den Element-Speicher - große Dokumente werden
+                        # auf Disk ausgelagert statt komplett in session_state zu liegen
+                        if result.get("status") == "success":
+                            result["elements"] = to_element_store(result["elements"])
+                            # Fingerprint pro Verarbeitungslauf (Inhalt + Bilder + Optionen) für Format-Cache,
+                            # Galerie und Exporte
+                            result["fingerprint"] = fingerprint_elements(result["elements"], options={
+                                "filename": uploaded_file.name,
+                                "strategy": strategy,
+                                "include_tables": include_tables,
+                                "include_images": include_images,
+                                "parallel_pages": parallel_pages,
+                            })
+                            # ✅ NEU: Bilder des angezeigten Ergebnisses vor der Blob-Verdrängung schützen
+                            # (ersetzt die Pins des vorherigen Ergebnisses dieser Session)
+                            if 'image_pin_owner' not in st.session_state:
+                                import uuid
+                                st.session_state['image_pin_owner'] = f"session-{uuid.uuid4().hex}"
+                            pin_element_images(st.session_state['image_pin_owner'], result["elements"])
+
                         st.session_state.os_result = result
                         st.session_state.os_filename = uploaded_file.name
 
@@ -2611,6 +3647,40 @@ Empfohlen wenn Bilder wichtig sind."""
                     with col_m3:
                         st.metric("Methode", result['method'])
 
+                    # ✅ NEU: Ergebnis-Cache Status
+                    if result.get("cache_hit") is not None:
+                        cache_label = "✅ Treffer" if result["cache_hit"] else "❌ Neu verarbeitet"
+                        st.caption(
+                            f"💾 Cache: {cache_label} | Treffer: {result.get('cache_hits', 0)} | "
+                            f"Fehlschläge: {result.get('cache_misses', 0)}"
+                            + (f" | Ursprüngliche Verarbeitung: {result['original_processing_time']:.3f}s"
+                               if result.get("original_processing_time") else "")
+                        )
+
+                    # ✅ NEU: Dateityp am Inhalt erkannt - Hinweis bei abweichender Endung
+                    if result.get("extension_mismatch"):
+                        st.warning(
+                            f"⚠️ Dateiendung passt nicht zum Inhalt - verarbeitet als "
+                            f"{str(result.get('detected_type')).upper()}"
+                        )
+
+                    # ✅ NEU: Adaptive Strategie - Seiten je Verarbeitungspfad
+                    if result.get("adaptive_pages"):
+                        st.caption(
+                            "🧭 Adaptiv: " + " | ".join(
+                                f"{name}: {count} Seiten" for name, count in sorted(result["adaptive_pages"].items())
+                            ) + f" | Seitenprüfung: {result.get('adaptive_classify_time', 0):.2f}s"
+                        )
+
+                    # ✅ NEU: Element-Speicher Status (Auslagerung auf Disk)
+                    element_store_stats = result["elements"].stats() if hasattr(result["elements"], "stats") else None
+                    if element_store_stats and element_store_stats["spilled_chunks"]:
+                        st.caption(
+                            f"🗄️ Element-Speicher: {element_store_stats['spilled_chunks']}/{element_store_stats['chunks']} Blöcke "
+                            f"auf Disk ({element_store_stats['disk_bytes'] / (1024 * 1024):.1f} MB), "
+                            f"{element_store_stats['resident_bytes'] / (1024 * 1024):.1f} MB im RAM"
+                        )
+
                     # NEU: Bild-Extraktions-Status
                     if result.get("image_support") is not None:
                         st.metric("Bild-Extraktion", "✅ Aktiv" if result["image_support"] else "❌ Inaktiv")
@@ -2650,7 +3720,8 @@ Empfohlen wenn Bilder wichtig sind."""
                             st.info(f"... und {len(result['elements']) - 5} weitere Elemente")
 
                 else:
-                    st.error(f"❌ Processing fehlgeschlagen: {result.get('error')}")
+                    stage = result.get("stage")
+                    st.error(f"❌ Processing fehlgeschlagen{f' ({stage})' if stage else ''}: {result.get('error')}")
 
             else:
                 st.info("👆 Datei hochladen oder Repository-Beispiel auswählen")
@@ -2661,6 +3732,15 @@ Empfohlen wenn Bilder wichtig sind."""
         if hasattr(st.session_state, 'os_result') and st.session_state.os_result["status"] == "success":
             elements = st.session_state.os_result['elements']
             filename = st.session_state.os_filename
+            # Dokument-Fingerprint: Schlüssel für Galerie, Format-Cache und Exporte (id() wird nach
+            # Garbage Collection wiederverwendet und taugt nicht als Dokument-Schlüssel)
+            fingerprint = st.session_state.os_result.get('fingerprint')
+            if fingerprint is None:
+                fingerprint = fingerprint_elements(elements)
+                st.session_state.os_result['fingerprint'] = fingerprint
+            # Pin der Session-Bilder auffrischen, solange das Ergebnis angezeigt wird
+            if 'image_pin_owner' in st.session_state:
+                refresh_image_pin(st.session_state['image_pin_owner'])
 
             # ===== OPTIMIERT: Einzelne Format-Buttons =====
             st.subheader("📄 Ausgabeformate")
@@ -2687,7 +3767,56 @@ Empfohlen wenn Bilder wichtig sind."""
                     **💡 Empfehlung:** Erst Standard-Formate testen, dann bei Bedarf mit Bildern!
                     """)
 
+                # ✅ NEU: Bild-Galerie mit Vorschaubildern - Original erst auf Klick
+                if st.toggle(f"🖼️ Bild-Galerie anzeigen ({image_count})", key="show_image_gallery"):
+                    # Galerie einmal pro Dokument aufbauen, Reruns nutzen das Ergebnis
+                    if st.session_state.get('image_gallery_doc') != fingerprint:
+                        st.session_state['image_gallery'] = create_image_gallery(elements)
+                        st.session_state['image_gallery_doc'] = fingerprint
+                        st.session_state.pop('gallery_selected', None)
+                    gallery = st.session_state['image_gallery']
+
+                    if gallery["status"] != "success":
+                        st.error(f"❌ Galerie fehlgeschlagen: {gallery.get('error')}")
+                    elif not gallery["images"]:
+                        st.info("Keine Bild-Daten vorhanden (Bild-Extraktion aktiv?)")
+                    else:
+                        gallery_cols = st.columns(4)
+                        for pos, img in enumerate(gallery["images"]):
+                            with gallery_cols[pos % 4]:
+                                page_label = f"Seite {img['page_number']}" if img.get('page_number') else img['element_type']
+                                if img["thumbnail"]:
+                                    st.image(img["thumbnail"], caption=page_label, use_container_width=True)
+                                else:
+                                    st.caption(f"🖼️ {page_label} (keine Vorschau)")
+                                if st.button("🔍 Original", key=f"gallery_open_{img['index']}", use_container_width=True):
+                                    st.session_state['gallery_selected'] = img['index']
+
+                        selected = st.session_state.get('gallery_selected')
+                        selected_img = next((img for img in gallery["images"] if img["index"] == selected), None)
+                        if selected_img is not None:
+                            original = get_image_bytes(elements[selected].metadata)
+                            if original is None:
+                                st.warning("⚠️ Original nicht mehr im Bild-Speicher")
+                            else:
+                                st.image(original, caption=selected_img["caption"][:200] or None)
+                                extension = selected_img["mime_type"].split("/")[-1].replace("jpeg", "jpg")
+                                st.download_button(
+                                    f"💾 Original herunterladen ({len(original) // 1024} KB)",
+                                    original,
+                                    f"{filename}_page_{selected_img.get('page_number') or 0:03d}_{selected_img['hash'][:8]}.{extension}",
+                                    selected_img["mime_type"],
+                                    key="dl_gallery_original"
+                                )
+
             # ===== EINZELNE FORMAT-BUTTONS (on-demand) =====
+            # ✅ NEU: Generierte Formate bleiben pro Dokument im Format-Cache (Fingerprint der
+            # Elemente) - mehrere Formate gleichzeitig, neues Dokument leert den Cache
+            if 'output_cache' not in st.session_state:
+                st.session_state['output_cache'] = OutputCache()
+            output_cache = st.session_state['output_cache']
+            output_cache.bind(fingerprint)
+
             st.markdown("### Wähle Format zum Generieren:")
 
             format_col1, format_col2, format_col3, format_col4 = st.columns(4)
@@ -2695,49 +3824,43 @@ Empfohlen wenn Bilder wichtig sind."""
             with format_col1:
                 if st.button("📝 Text", key="btn_text", use_container_width=True):
                     with st.spinner("Generiere Text..."):
-                        # Lösche alte Formate
-                        for key in ['format_html', 'format_markdown', 'format_json', 'format_markdown_images']:
-                            st.session_state.pop(key, None)
-                        # Generiere neues Format
-                        text_output = elements_to_text(elements)
-                        st.session_state['format_text'] = text_output
-                        st.success("✅ Text generiert!")
+                        # ✅ NEU: Aus dem Format-Cache, nur bei Fehlschlag neu generieren
+                        _, from_cache = output_cache.get_or_create(
+                            fingerprint, "text", lambda: elements_to_text(elements)
+                        )
+                        st.success("✅ Text aus Cache!" if from_cache else "✅ Text generiert!")
                         st.rerun()
 
             with format_col2:
                 if st.button("🌐 HTML", key="btn_html", use_container_width=True):
                     with st.spinner("Generiere HTML..."):
-                        # Lösche alte Formate
-                        for key in ['format_text', 'format_markdown', 'format_json', 'format_markdown_images']:
-                            st.session_state.pop(key, None)
-                        # Generiere neues Format
-                        html_output = elements_to_html(elements)
-                        st.session_state['format_html'] = html_output
-                        st.success("✅ HTML generiert!")
+                        _, from_cache = output_cache.get_or_create(
+                            fingerprint, "html", lambda: elements_to_html(elements),
+                            options=(("exclude_binary_image_data", False),)
+                        )
+                        st.success("✅ HTML aus Cache!" if from_cache else "✅ HTML generiert!")
                         st.rerun()
 
             with format_col3:
                 if st.button("📋 Markdown", key="btn_markdown", use_container_width=True):
                     with st.spinner("Generiere Markdown..."):
-                        # Lösche alte Formate
-                        for key in ['format_text', 'format_html', 'format_json', 'format_markdown_images']:
-                            st.session_state.pop(key, None)
-                        # Generiere neues Format OHNE Bilder (exclude_binary_image_data=True)
-                        markdown_output = elements_to_md(elements, exclude_binary_image_data=True)
-                        st.session_state['format_markdown'] = markdown_output
-                        st.success("✅ Markdown generiert!")
+                        # OHNE Bilder (exclude_binary_image_data=True)
+                        _, from_cache = output_cache.get_or_create(
+                            fingerprint, "markdown", lambda: elements_to_md(elements, exclude_binary_image_data=True),
+                            options=(("exclude_binary_image_data", True),)
+                        )
+                        st.success("✅ Markdown aus Cache!" if from_cache else "✅ Markdown generiert!")
                         st.rerun()
 
             with format_col4:
                 if st.button("🔧 JSON", key="btn_json", use_container_width=True):
                     with st.spinner("Generiere JSON..."):
-                        # Lösche alte Formate
-                        for key in ['format_text', 'format_html', 'format_markdown', 'format_markdown_images']:
-                            st.session_state.pop(key, None)
-                        # Generiere neues Format
-                        json_output = json.dumps(elements_to_dicts(elements), indent=2, ensure_ascii=False)
-                        st.session_state['format_json'] = json_output
-                        st.success("✅ JSON generiert!")
+                        _, from_cache = output_cache.get_or_create(
+                            fingerprint, "json",
+                            lambda: json.dumps(inline_images_in_dicts(elements_to_dicts(elements)), indent=2, ensure_ascii=False),
+                            options=(("indent", 2),)
+                        )
+                        st.success("✅ JSON aus Cache!" if from_cache else "✅ JSON generiert!")
                         st.rerun()
 
             # Optional: Markdown mit Bildern (separat)
@@ -2750,33 +3873,77 @@ Empfohlen wenn Bilder wichtig sind."""
                 with special_col1:
                     if st.button("📋 Markdown + Bilder (⚠️ Langsam!)", key="btn_markdown_img", type="secondary", help=f"Base64-Bilder einbetten - dauert länger bei {image_count} Bildern"):
                         with st.spinner(f"Generiere Markdown mit {image_count} Bildern (kann 10-30 Sek dauern)..."):
-                            # Lösche alte Formate
-                            for key in ['format_text', 'format_html', 'format_markdown', 'format_json']:
-                                st.session_state.pop(key, None)
-                            # Generiere neues Format
-                            markdown_with_images = elements_to_markdown_with_images(elements)
-                            st.session_state['format_markdown_images'] = markdown_with_images
-                            st.success("✅ Markdown mit Bildern generiert! (Download empfohlen)")
+                            _, from_cache = output_cache.get_or_create(
+                                fingerprint, "markdown_images", lambda: elements_to_markdown_with_images(elements)
+                            )
+                            st.success("✅ Markdown mit Bildern aus Cache!" if from_cache else "✅ Markdown mit Bildern generiert! (Download empfohlen)")
                             st.rerun()
 
                 with special_col2:
-                    st.info("⚠️ 'Alle Formate MIT Bildern' wurde entfernt - wähle ein Format einzeln")
+                    # ✅ NEU: Bilder als Dateien (assets/) statt Data-URLs - Dokument + Bilder als ZIP
+                    asset_formats = ["markdown", "html"]
+                    if filename.lower().endswith(".pptx"):
+                        asset_formats.append("pptx_html")
+                    asset_format = st.selectbox(
+                        "Format für ZIP mit Bild-Ordner",
+                        asset_formats,
+                        format_func=lambda f: ASSET_EXPORT_FORMATS[f][1],
+                        key="assets_export_format"
+                    )
+                    if st.button("📦 Dokument + Bilder als ZIP", key="btn_assets_zip", help="Jedes Bild einmal unter assets/, das Dokument verweist per relativem Pfad (schnell, kleine Datei)"):
+                        with st.spinner(f"Erstelle ZIP mit {image_count} Bildern..."):
+                            previous = st.session_state.pop('assets_package', None)
+                            if previous:
+                                remove_package(previous['result'].get('zip_path'))
+                            assets_result = export_document_with_assets(elements, filename, format_type=asset_format)
+                            if assets_result.get("status") == "success":
+                                st.session_state['assets_package'] = {
+                                    "fingerprint": fingerprint,
+                                    "format": asset_format,
+                                    "result": assets_result,
+                                }
+                            else:
+                                st.error(f"❌ Export fehlgeschlagen: {assets_result.get('error')}")
+
+                    assets_package = st.session_state.get('assets_package')
+                    if assets_package and assets_package["fingerprint"] == fingerprint and package_available(assets_package["result"].get("zip_path")):
+                        assets_result = assets_package["result"]
+                        st.caption(f"📄 {assets_result['document_name']}: {assets_result['document_size_bytes'] / 1024:.1f} KB, "
+                                   f"🖼️ {assets_result['image_count']} Bilder ({assets_result['image_references']} Verweise), "
+                                   f"ZIP: {assets_result['total_size_bytes'] / 1024 / 1024:.2f} MB")
+                        if assets_result.get("image_errors"):
+                            st.warning(f"⚠️ {assets_result['image_errors']} Bilder nicht verfügbar")
+                        # Download direkt aus der ZIP-Datei
+                        with open(assets_result["zip_path"], 'rb') as assets_file:
+                            st.download_button(
+                                "💾 ZIP herunterladen",
+                                assets_file,
+                                f"{filename}_{assets_package['format']}_assets.zip",
+                                "application/zip",
+                                key="dl_assets_zip"
+                            )
 
             # ===== ANZEIGE DER GENERIERTEN FORMATE =====
             st.divider()
             st.markdown("### 📊 Generierte Formate")
 
-            # Tabs für alle möglichen Formate
+            # Tabs für alle gecachten Formate
+            outputs = output_cache.outputs(fingerprint)
+            if outputs:
+                cache_stats = output_cache.stats()
+                st.caption(f"🗄️ Format-Cache: {cache_stats['formats']} Formate, "
+                           f"{cache_stats['total_bytes'] // 1024} KB von {cache_stats['max_bytes'] // (1024 * 1024)} MB, "
+                           f"{cache_stats['hits']} Treffer")
             available_tabs = []
-            if 'format_text' in st.session_state:
+            if 'text' in outputs:
                 available_tabs.append("📝 Text")
-            if 'format_html' in st.session_state:
+            if 'html' in outputs:
                 available_tabs.append("🌐 HTML")
-            if 'format_markdown' in st.session_state:
+            if 'markdown' in outputs:
                 available_tabs.append("📋 Markdown")
-            if 'format_json' in st.session_state:
+            if 'json' in outputs:
                 available_tabs.append("🔧 JSON")
-            if 'format_markdown_images' in st.session_state:
+            if 'markdown_images' in outputs:
                 available_tabs.append("🖼️ Markdown+Bilder")
 
             if not available_tabs:
@@ -2786,15 +3953,15 @@ Empfohlen wenn Bilder wichtig sind."""
                 tab_index = 0
 
                 # Text Tab
-                if 'format_text' in st.session_state:
+                if 'text' in outputs:
                     with format_tabs[tab_index]:
                         st.subheader("📝 Text-Ausgabe")
-                        st.text_area("", st.session_state['format_text'], height=500, key="text_display", label_visibility="collapsed")
-                        st.download_button("💾 Text herunterladen", st.session_state['format_text'], f"{filename}_text.txt", "text/plain", key="dl_text")
+                        st.text_area("", outputs['text'], height=500, key="text_display", label_visibility="collapsed")
+                        st.download_button("💾 Text herunterladen", outputs['text'], f"{filename}_text.txt", "text/plain", key="dl_text")
                     tab_index += 1
 
                 # HTML Tab
-                if 'format_html' in st.session_state:
+                if 'html' in outputs:
                     with format_tabs[tab_index]:
                         st.subheader("🌐 HTML-Ausgabe")
                         view_tabs = st.tabs(["🌐 Vorschau", "🔍 Code"])
@@ -2851,17 +4018,17 @@ Empfohlen wenn Bilder wichtig sind."""
     </style>
 </head>
 <body>
-{st.session_state["format_html"]}
+{outputs["html"]}
 </body>
 </html>'''
                             st.components.v1.html(styled_html, height=600, scrolling=True)
                         with view_tabs[1]:
-                            st.code(st.session_state['format_html'], language="html")
-                        st.download_button("💾 HTML herunterladen", st.session_state['format_html'], f"{filename}_output.html", "text/html", key="dl_html")
+                            st.code(outputs['html'], language="html")
+                        st.download_button("💾 HTML herunterladen", outputs['html'], f"{filename}_output.html", "text/html", key="dl_html")
                     tab_index += 1
 
                 # Markdown Tab
-                if 'format_markdown' in st.session_state:
+                if 'markdown' in outputs:
                     with format_tabs[tab_index]:
                         st.subheader("📋 Markdown-Ausgabe")
 
@@ -2927,26 +4094,26 @@ Empfohlen wenn Bilder wichtig sind."""
                         """, unsafe_allow_html=True)
 
                         with st.expander("📄 Vorschau (gerendert)", expanded=False):
-                            st.markdown(f'<div class="scrollable-markdown">{st.session_state["format_markdown"]}</div>', unsafe_allow_html=True)
+                            st.markdown(f'<div class="scrollable-markdown">{outputs["markdown"]}</div>', unsafe_allow_html=True)
                         with st.expander("🔍 Code", expanded=False):
-                            st.code(st.session_state['format_markdown'], language="markdown")
-                        st.download_button("💾 Markdown herunterladen", st.session_state['format_markdown'], f"{filename}_markdown.md", "text/markdown", key="dl_md")
+                            st.code(outputs['markdown'], language="markdown")
+                        st.download_button("💾 Markdown herunterladen", outputs['markdown'], f"{filename}_markdown.md", "text/markdown", key="dl_md")
                     tab_index += 1
 
                 # JSON Tab
-                if 'format_json' in st.session_state:
+                if 'json' in outputs:
                     with format_tabs[tab_index]:
                         st.subheader("🔧 JSON-Ausgabe")
                         try:
-                            json_data = json.loads(st.session_state['format_json'])
+                            json_data = json.loads(outputs['json'])
                             st.json(json_data)
                         except:
-                            st.code(st.session_state['format_json'], language="json")
-                        st.download_button("💾 JSON herunterladen", st.session_state['format_json'], f"{filename}_elements.json", "application/json", key="dl_json")
+                            st.code(outputs['json'], language="json")
+                        st.download_button("💾 JSON herunterladen", outputs['json'], f"{filename}_elements.json", "application/json", key="dl_json")
                     tab_index += 1
 
                 # Markdown mit Bildern Tab
-                if 'format_markdown_images' in st.session_state:
+                if 'markdown_images' in outputs:
                     with format_tabs[tab_index]:
                         st.subheader("🖼️ Markdown mit Base64-Bildern")
 
@@ -2961,7 +4128,7 @@ Empfohlen wenn Bilder wichtig sind."""
                         """)
 
                         # Größe berechnen
-                        markdown_size = len(st.session_state['format_markdown_images'])
+                        markdown_size = len(outputs['markdown_images'])
                         size_mb = markdown_size / (1024 * 1024)
 
                         st.info(f"""
@@ -2974,7 +4141,7 @@ Empfohlen wenn Bilder wichtig sind."""
                         # Vorschau OHNE Bilder-Rendering (zu langsam!)
                         with st.expander("📄 Text-Vorschau (ohne Bild-Rendering)", expanded=False):
                             # Entferne Base64-Daten für Vorschau
-                            preview_text = st.session_state['format_markdown_images']
+                            preview_text = outputs['markdown_images']
                             # Ersetze data:image URLs mit Platzhalter
                             import re
                             preview_text = re.sub(r'!\[([^\]]*)\]\(data:image/[^)]+\)', r'🖼️ [Bild: \1]', preview_text)
@@ -2982,14 +4149,14 @@ Empfohlen wenn Bilder wichtig sind."""
                             st.caption("ℹ️ Bilder werden als Platzhalter angezeigt. Lade die Datei herunter für volle Bilder.")
 
                         with st.expander("🔍 Code (erste 5000 Zeichen)", expanded=False):
-                            code_preview = st.session_state['format_markdown_images'][:5000]
-                            if len(st.session_state['format_markdown_images']) > 5000:
+                            code_preview = outputs['markdown_images'][:5000]
+                            if len(outputs['markdown_images']) > 5000:
                                 code_preview += "\n\n... (gekürzt, zu groß für Anzeige)"
                             st.code(code_preview, language="markdown")
 
                         st.download_button(
                             "💾 Markdown+Bilder herunterladen (empfohlen!)",
-                            st.session_state['format_markdown_images'],
+                            outputs['markdown_images'],
                             f"{filename}_with_images.md",
                             "text/markdown",
                             key="dl_md_img",
@@ -3046,22 +4213,19 @@ Empfohlen wenn Bilder wichtig sind."""
                                 # Check für Base64-Daten
                                 has_base64 = False
                                 image_hash = None
-                                base64_data = None
 
                                 if hasattr(element, 'metadata') and element.metadata:
-                                    base64_data = getattr(element.metadata, 'image_base64', None)
-                                    if base64_data:
+                                    if has_image(element.metadata):
                                         has_base64 = True
-                                        # Hash erstellen für Referenz
-                                        import hashlib
-                                        image_hash = hashlib.md5(base64_data.encode()).hexdigest()[:16]
+                                        # Hash = blob_id aus dem Bild-Speicher
+                                        image_hash = get_image_hash(element.metadata)[:16]
 
                                 metadata_attrs["image_available"] = has_base64
                                 if image_hash:
                                     metadata_attrs["image_hash"] = image_hash
 
-                                    # Bild für separaten Export speichern
-                                    if base64_data:
+                                    # Bild für separaten Export vormerken (Referenz, keine Bild-Daten)
+                                    if has_base64:
                                         mime_type = "image/png"
                                         if hasattr(element, 'metadata') and element.metadata:
                                             mime_type = getattr(element.metadata, 'image_mime_type', 'image/png')
@@ -3069,7 +4233,7 @@ Empfohlen wenn Bilder wichtig sind."""
                                         file_ext = mime_type.split('/')[-1]
                                         image_files.append({
                                             "hash": image_hash,
-                                            "base64": base64_data,
+                                            "blob_id": getattr(element.metadata, 'image_blob_id', None),
                                             "mime_type": mime_type,
                                             "filename": f"{image_hash}.{file_ext}",
                                             "element_text": element_text
@@ -3143,19 +4307,30 @@ Empfohlen wenn Bilder wichtig sind."""
                         with dl_col2:
                             # Bild-Export-Button (falls Bilder vorhanden)
                             if len(image_elements) > 0:
-                                # ZIP direkt erstellen beim Klick
-                                with st.spinner("Bereite Bilder-ZIP vor..."):
-                                    image_export = export_images_from_bedrock_json(elements, filename)
+                                # ✅ NEU: ZIP einmal pro Dokument auf Disk erstellen, Reruns nutzen die Datei
+                                # (auch "warning"/"error" ohne ZIP bleiben gecacht - nur eine verschwundene ZIP wird neu gebaut)
+                                image_export = st.session_state.get('bedrock_images_export')
+                                if (st.session_state.get('bedrock_images_export_doc') != fingerprint
+                                        or (image_export.get('status') == "success"
+                                            and not package_available(image_export.get('zip_path')))):
+                                    with st.spinner("Bereite Bilder-ZIP vor..."):
+                                        remove_package((image_export or {}).get('zip_path'))
+                                        image_export = export_images_from_bedrock_json(elements, filename)
+                                    # Nur Pfad + Statistik im session_state, keine ZIP-Bytes
+                                    image_export.pop('manifest', None)
+                                    st.session_state['bedrock_images_export'] = image_export
+                                    st.session_state['bedrock_images_export_doc'] = fingerprint
 
                                 if image_export["status"] == "success":
-                                    st.download_button(
-                                        f"📸 {image_export['total_images']} Bilder als ZIP herunterladen",
-                                        image_export['zip_bytes'],
-                                        f"{filename}_images.zip",
-                                        "application/zip",
-                                        help=f"Enthält {image_export['total_images']} Bilder + manifest.json + README ({image_export['total_size_bytes'] // 1024} KB)",
-                                        key="dl_images_zip_bedrock"
-                                    )
+                                    with open(image_export['zip_path'], 'rb') as zip_file:
+                                        st.download_button(
+                                            f"📸 {image_export['total_images']} Bilder als ZIP herunterladen",
+                                            zip_file,
+                                            f"{filename}_images.zip",
+                                            "application/zip",
+                                            help=f"Enthält {image_export.get('unique_images', image_export['total_images'])} eindeutige Bilder (Duplikate nur im Manifest) + manifest.json + README ({image_export['total_size_bytes'] // 1024} KB)",
+                                            key="dl_images_zip_bedrock"
+                                        )
                                 elif image_export["status"] == "warning":
                                     st.warning(image_export["message"])
                                 else:
@@ -3364,21 +4539,31 @@ Empfohlen wenn Bilder wichtig sind."""
                         with st.spinner("Erstelle Bedrock RAG JSON..."):
                             try:
                                 # Bedrock-Export
+                                # ✅ NEU: JSONL wird dokumentweise direkt in eine Datei geschrieben,
+                                # im Speicher bleiben nur Statistik + Vorschau
+                                remove_package(st.session_state.pop('bedrock_rag_jsonl_path', None))
+                                remove_package(st.session_state.pop('bedrock_rag_json_path', None))
+                                jsonl_path = new_package_path(prefix="bedrock_rag_", suffix=".jsonl")
                                 bedrock_result = export_for_bedrock_knowledge_base(
                                     elements=elements,
                                     filename=filename,
                                     format_type="element",
-                                    describe_images=describe_images_img
+                                    describe_images=describe_images_img,
+                                    output=jsonl_path
                                 )
 
                                 if bedrock_result.get("status") == "success":
-                                    # ✅ KORRIGIERT: Verwende json_preview statt json_array
-                                    bedrock_json_preview = bedrock_result.get("json_preview")
-                                    bedrock_docs = bedrock_result.get("documents", [])
+                                    st.session_state['bedrock_rag_jsonl_path'] = jsonl_path
+                                    # Bisheriges Download-Format (JSON-Array) zeilenweise aus dem JSONL
+                                    json_path = new_package_path(prefix="bedrock_rag_", suffix=".json")
+                                    with open(jsonl_path, 'rb') as jsonl_file, open(json_path, 'wb') as json_file:
+                                        write_json_array_from_jsonl(jsonl_file, json_file)
+                                    st.session_state['bedrock_rag_json_path'] = json_path
+                                    preview_docs = json.loads(bedrock_result.get("json_preview") or "[]")
                                     is_preview = bedrock_result.get("is_preview", False)
 
                                     # Validierung
-                                    if not bedrock_docs:
+                                    if not bedrock_result['document_count']:
                                         st.error("❌ Keine Dokumente generiert!")
                                         st.stop()
 
@@ -3388,48 +4573,59 @@ Empfohlen wenn Bilder wichtig sind."""
                                     if is_preview:
                                         st.warning(f"⚠️ Große Datei: Vorschau zeigt nur die ersten 5 Elemente. Download enthält alle {bedrock_result['document_count']} Elemente.")
 
-                                    # Statistiken
+                                    # Statistiken (beim Schreiben mitgezählt)
                                     stat_col1, stat_col2, stat_col3 = st.columns(3)
 
-                                    image_elements = [d for d in bedrock_docs if d["metadataAttributes"].get("image_available")]
-                                    described_images = [d for d in image_elements if d["metadataAttributes"].get("image_described")]
+                                    image_document_count = bedrock_result.get("image_document_count", 0)
+                                    described_count = (bedrock_result.get("image_descriptions") or {}).get("images_described", 0)
 
                                     with stat_col1:
-                                        st.metric("Elemente", len(bedrock_docs))
+                                        st.metric("Elemente", bedrock_result['document_count'])
                                     with stat_col2:
-                                        st.metric("Bilder", len(image_elements))
+                                        st.metric("Bilder", image_document_count)
                                     with stat_col3:
-                                        st.metric("Beschrieben", len(described_images))
+                                        st.metric("Beschrieben", described_count)
 
                                     # Vorschau - nur erste 3 für UI Performance
                                     st.markdown("### 📋 Vorschau (erste 3)")
-                                    st.json(bedrock_docs[:3])
+                                    st.json(preview_docs[:3])
 
                                     # Downloads
                                     dl_col1, dl_col2 = st.columns(2)
 
                                     with dl_col1:
-                                        # ✅ OPTIMIERT: Vollständiges JSON nur beim Download generieren
-                                        full_json = json.dumps(bedrock_docs, indent=2, ensure_ascii=False)
-                                        st.download_button(
-                                            "💾 RAG JSON herunterladen",
-                                            full_json,
-                                            f"{filename}_bedrock_rag.json",
-                                            "application/json",
-                                            key="dl_bedrock_imgs",
-                                            help=f"Enthält alle {len(bedrock_docs)} Elemente"
-                                        )
+                                        # ✅ NEU: Downloads direkt aus den Dateien - JSON-Array wie bisher,
+                                        # zusätzlich JSONL (eine Zeile pro Dokument, Format für Bedrock-Ingest)
+                                        with open(json_path, 'rb') as json_file:
+                                            st.download_button(
+                                                "💾 RAG JSON herunterladen",
+                                                json_file,
+                                                f"{filename}_bedrock_rag.json",
+                                                "application/json",
+                                                key="dl_bedrock_imgs",
+                                                help=f"JSON-Array mit allen {bedrock_result['document_count']} Elementen"
+                                            )
+                                        with open(jsonl_path, 'rb') as jsonl_file:
+                                            st.download_button(
+                                                "💾 RAG JSONL herunterladen",
+                                                jsonl_file,
+                                                f"{filename}_bedrock_rag.jsonl",
+                                                "application/x-ndjson",
+                                                key="dl_bedrock_imgs_jsonl",
+                                                help=f"Gleicher Inhalt als JSON-Lines ({bedrock_result['size_bytes'] // 1024} KB)"
+                                            )
 
                                     with dl_col2:
-                                        if len(image_elements) > 0:
+                                        if image_document_count > 0:
                                             # ✅ KORRIGIERT: Session State für ZIP-Download
                                             if st.button("📸 Bilder ZIP erstellen", key="dl_imgs_btn", type="secondary"):
                                                 with st.spinner("Erstelle ZIP..."):
                                                     img_export = export_images_from_bedrock_json(elements, filename)
 
                                                     if img_export["status"] == "success":
-                                                        # In Session State speichern
-                                                        st.session_state['bedrock_image_zip'] = img_export['zip_bytes']
+                                                        # In Session State nur den Pfad speichern (ZIP liegt auf Disk)
+                                                        remove_package(st.session_state.get('bedrock_image_zip_path'))
+                                                        st.session_state['bedrock_image_zip_path'] = img_export['zip_path']
                                                         st.session_state['bedrock_image_count'] = img_export['total_images']
                                                         st.session_state['bedrock_zip_size'] = img_export['total_size_bytes']
                                                         st.session_state['bedrock_zip_filename'] = filename
@@ -3439,17 +4635,18 @@ Empfohlen wenn Bilder wichtig sind."""
                                                         st.error(f"❌ {img_export.get('error', 'Fehler')}")
 
                                             # Download-Button anzeigen wenn ZIP vorhanden
-                                            if 'bedrock_image_zip' in st.session_state:
-                                                st.download_button(
-                                                    f"💾 {st.session_state['bedrock_image_count']} Bilder ({st.session_state['bedrock_zip_size'] // 1024} KB)",
-                                                    st.session_state['bedrock_image_zip'],
-                                                    f"{st.session_state['bedrock_zip_filename']}_images.zip",
-                                                    "application/zip",
-                                                    key="dl_imgs_zip_final"
-                                                )
+                                            if package_available(st.session_state.get('bedrock_image_zip_path')):
+                                                with open(st.session_state['bedrock_image_zip_path'], 'rb') as zip_file:
+                                                    st.download_button(
+                                                        f"💾 {st.session_state['bedrock_image_count']} Bilder ({st.session_state['bedrock_zip_size'] // 1024} KB)",
+                                                        zip_file,
+                                                        f"{st.session_state['bedrock_zip_filename']}_images.zip",
+                                                        "application/zip",
+                                                        key="dl_imgs_zip_final"
+                                                    )
                                                 # Clear-Button
                                                 if st.button("🗑️ ZIP löschen", key="clear_bedrock_zip", type="secondary"):
-                                                    del st.session_state['bedrock_image_zip']
+                                                    remove_package(st.session_state.pop('bedrock_image_zip_path', None))
                                                     del st.session_state['bedrock_image_count']
                                                     del st.session_state['bedrock_zip_size']
                                                     del st.session_state['bedrock_zip_filename']
@@ -3458,7 +4655,7 @@ Empfohlen wenn Bilder wichtig sind."""
                                             st.caption("ℹ️ Keine Bilder")
 
                                     # S3-Hinweise
-                                    if len(image_elements) > 0:
+                                    if image_document_count > 0:
                                         st.divider()
                                         with st.expander("💡 S3-Integration (optional)"):
                                             st.markdown("""
@@ -3471,6 +4668,7 @@ Empfohlen wenn Bilder wichtig sind."""
                                             """)
 
                                 else:
+                                    remove_package(jsonl_path)
                                     st.error(f"❌ Fehler: {bedrock_result.get('error')}")
 
                             except Exception as e:
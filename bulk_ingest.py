@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Headless Bulk-Ingestion über ein Verzeichnis (ohne Streamlit-Uploader)
+Nutzt process_with_open_source_library und export_for_bedrock_knowledge_base der App:
+- Dateien werden rekursiv gesucht und mit konfigurierbarer Parallelität verarbeitet
+  (die Partitionierung selbst läuft im Prozess-Pool, siehe processing_pool.py)
+- Pro Dokument eine Bedrock-JSONL-Datei, Verzeichnisstruktur wird gespiegelt
+- run_summary.json mit Zeiten pro Datei
+- Unveränderte Dateien mit aktuellem Output werden übersprungen (ingest_manifest.json)
+
+Aufruf (im Container):
+    python3 bulk_ingest.py test_files --output output/bedrock --concurrency 2
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+APP_DIR = str(Path(__file__).resolve().parent)
+
+# Gleiche Dateitypen wie im Streamlit-Uploader
+DEFAULT_EXTENSIONS = ['pdf', 'docx', 'pptx', 'xlsx', 'jpg', 'jpeg', 'png', 'txt', 'html']
+DEFAULT_OUTPUT_DIR = os.path.join(APP_DIR, "output", "bedrock")
+MANIFEST_NAME = "ingest_manifest.json"
+SUMMARY_NAME = "run_summary.json"
+
+
+def find_input_files(input_dir, extensions, exclude_dir=None):
+    """
+    Sucht alle Dateien mit passender Endung (rekursiv, sortiert, ohne das Output-Verzeichnis)
+    """
+    input_dir = Path(input_dir).resolve()
+    exclude_dir = Path(exclude_dir).resolve() if exclude_dir else None
+    suffixes = {f".{ext.lower().lstrip('.')}" for ext in extensions}
+    files = []
+    for path in sorted(input_dir.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in suffixes:
+            continue
+        if exclude_dir is not None and exclude_dir in path.parents:
+            continue
+        files.append(path)
+    return files
+
+
+def options_key(options):
+    """
+    Kurzer Hash der ergebnisrelevanten Optionen (andere Optionen = Output veraltet)
+    Cache und Seitenaufteilung ändern das Ergebnis nicht und zählen nicht mit
+    """
+    relevant = {k: v for k, v in options.items() if k not in ("use_cache", "parallel_pages")}
+    serialized = json.dumps(relevant, sort_keys=True)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
+
+
+def _write_atomic(path, text):
+    """
+    Schreibt eine Textdatei atomar über temporäre Datei + os.replace
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp_", suffix=path.suffix)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def is_up_to_date(manifest_entry, source_path, output_path, current_options_key):
+    """
+    Output ist aktuell, wenn Quelle (Größe + mtime) und Optionen unverändert sind
+    und die JSONL-Datei noch existiert
+    """
+    if not manifest_entry or not output_path.exists():
+        return False
+    stat = source_path.stat()
+    return (
+        manifest_entry.get("source_size") == stat.st_size
+        and manifest_entry.get("source_mtime_ns") == stat.st_mtime_ns
+        and manifest_entry.get("options_key") == current_options_key
+    )
+
+
+def ingest_file(app, source_path, output_path, options):
+    """
+    Verarbeitet eine Datei und schreibt die Bedrock-JSONL
+
+    Returns:
+        Eintrag für run_summary.json
+    """
+    start_time = time.time()
+    entry = {"file": str(source_path), "output": str(output_path)}
+    stat = source_path.stat()
+
+    result = app.process_with_open_source_library(
+        str(source_path),
+        options["strategy"],
+        include_tables=options["include_tables"],
+        include_images=options["include_images"],
+        parallel_pages=options["parallel_pages"],
+        use_cache=options["use_cache"],
+    )
+    entry["processing_time"] = round(result.get("processing_time", time.time() - start_time), 3)
+    entry["method"] = result.get("method")
+    entry["cache_hit"] = result.get("cache_hit")
+    if result.get("status") != "success":
+        entry.update(status="failed", stage=result.get("stage", "partition"), error=result.get("error"),
+                     total_time=round(time.time() - start_time, 3))
+        return entry
+
+    export_start = time.time()
+    # JSONL wird dokumentweise direkt (atomar) in die Ausgabedatei geschrieben
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    export = app.export_for_bedrock_knowledge_base(
+        result["elements"],
+        source_path.name,
+        format_type=options["format_type"],
+        describe_images=options["describe_images"],
+        output=str(output_path),
+    )
+    if export.get("status") != "success":
+        entry.update(status="failed", stage="export", error=export.get("error"),
+                     total_time=round(time.time() - start_time, 3))
+        return entry
+
+    entry.update(
+        status="processed",
+        element_count=result.get("element_count"),
+        document_count=export.get("document_count"),
+        export_time=round(time.time() - export_start, 3),
+        image_descriptions=export.get("image_descriptions"),
+        total_time=round(time.time() - start_time, 3),
+        source_size=stat.st_size,
+        source_mtime_ns=stat.st_mtime_ns,
+    )
+    return entry
+
+
+def run_ingest(input_dir, output_dir, options, concurrency=2, extensions=DEFAULT_EXTENSIONS, force=False):
+    """
+    Verarbeitet alle Dateien eines Verzeichnisses und schreibt Manifest + run_summary.json
+
+    Returns:
+        Summary-Dict (gleicher Inhalt wie run_summary.json)
+    """
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    import app_open_source_recovered as app
+
+    if not app.UNSTRUCTURED_AVAILABLE:
+        raise RuntimeError(f"Open Source Unstructured Library nicht verfügbar: {app.IMPORT_ERROR}")
+
+    input_dir = Path(input_dir).resolve()
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    start_time = time.time()
+    current_options_key = options_key(options)
+    manifest = load_manifest(output_dir)
+
+    files = find_input_files(input_dir, extensions, exclude_dir=output_dir)
+    entries = []
+    jobs = []
+    for source_path in files:
+        relative = source_path.relative_to(input_dir).as_posix()
+        output_path = output_dir / (relative + ".jsonl")
+        if not force and is_up_to_date(manifest.get(relative), source_path, output_path, current_options_key):
+            entries.append({"file": str(source_path), "output": str(output_path), "status": "skipped"})
+            continue
+        jobs.append((relative, source_path, output_path))
+
+    print(f"📂 {len(files)} Dateien gefunden, {len(jobs)} zu verarbeiten, {len(files) - len(jobs)} aktuell")
+
+    def record(relative, entry):
+        # Manifest nach jeder Datei sichern - ein Abbruch verliert keine fertigen Outputs
+        if entry["status"] == "processed":
+            manifest[relative] = {
+                "source_size": entry["source_size"],
+                "source_mtime_ns": entry["source_mtime_ns"],
+                "options_key": current_options_key,
+                "output": entry["output"],
+                "processed_at": datetime.now().isoformat(),
+            }
+            _write_atomic(output_dir / MANIFEST_NAME, json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {
+            executor.submit(ingest_file, app, source_path, output_path, options): (relative, source_path, output_path)
+            for relative, source_path, output_path in jobs
+        }
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            relative, source_path, output_path = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                entry = {"file": str(source_path), "output": str(output_path), "status": "failed",
+                         "stage": "ingest", "error": str(e)}
+            record(relative, entry)
+            entries.append(entry)
+
+            if entry["status"] == "processed":
+                print(f"✅ [{done_count}/{len(jobs)}] {relative} - {entry['total_time']:.1f}s, "
+                      f"{entry['element_count']} Elemente, {entry['document_count']} Dokumente")
+            else:
+                print(f"❌ [{done_count}/{len(jobs)}] {relative} - {entry.get('stage')}: {entry.get('error')}")
+
+    counts = {"processed": 0, "skipped": 0, "failed": 0}
+    for entry in entries:
+        counts[entry["status"]] += 1
+
+    summary = {
+        "started": datetime.fromtimestamp(start_time).isoformat(),
+        "finished": datetime.now().isoformat(),
+        "duration": round(time.time() - start_time, 3),
+        "input_dir": str(input_dir),
+        "output_dir": str(output_dir),
+        "concurrency": concurrency,
+        "options": options,
+        "counts": counts,
+        "files": sorted(entries, key=lambda e: e["file"]),
+    }
+    _write_atomic(output_dir / SUMMARY_NAME, json.dumps(summary, indent=2, ensure_ascii=False))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-Ingestion eines Verzeichnisses zu Bedrock-JSONL")
+    parser.add_argument("input_dir", nargs="?", default=os.path.join(APP_DIR, "test_files"),
+                        help="Eingabe-Verzeichnis (Standard: test_files/)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Ausgabe-Verzeichnis (Standard: output/bedrock/)")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("INGEST_CONCURRENCY", "2")),
+                        help="Dateien gleichzeitig in Verarbeitung")
+    parser.add_argument("--strategy", default="auto", choices=["auto", "fast", "hi_res", "ocr_only", "adaptive"])
+    parser.add_argument("--format-type", default="element", choices=["element", "page"],
+                        help="Bedrock-Dokument pro Element oder pro Seite")
+    parser.add_argument("--extensions", default=",".join(DEFAULT_EXTENSIONS), help="Komma-getrennte Dateiendungen")
+    parser.add_argument("--no-tables", action="store_true", help="Tabellen-Extraktion aus")
+    parser.add_argument("--no-images", action="store_true", help="Bild-Extraktion aus")
+    parser.add_argument("--describe-images", action="store_true", help="Bilder per Vision-LLM beschreiben")
+    parser.add_argument("--parallel-pages", action="store_true",
+                        help="Lange PDFs zusätzlich seitenweise aufteilen (Standard: Parallelität pro Datei)")
+    parser.add_argument("--no-cache", action="store_true", help="Ergebnis-Cache nicht nutzen")
+    parser.add_argument("--force", action="store_true", help="Auch aktuelle Dateien neu verarbeiten")
+    args = parser.parse_args()
+
+    options = {
+        "strategy": args.strategy,
+        "format_type": args.format_type,
+        "include_tables": not args.no_tables,
+        "include_images": not args.no_images,
+        "describe_images": args.describe_images,
+        "parallel_pages": args.parallel_pages,
+        "use_cache": not args.no_cache,
+    }
+    extensions = [ext.strip() for ext in args.extensions.split(",") if ext.strip()]
+
+    summary = run_ingest(args.input_dir, args.output, options, concurrency=args.concurrency,
+                         extensions=extensions, force=args.force)
+    counts = summary["counts"]
+    print(f"🏁 Fertig in {summary['duration']:.1f}s - verarbeitet: {counts['processed']}, "
+          f"übersprungen: {counts['skipped']}, fehlgeschlagen: {counts['failed']}")
+    print(f"📄 Zusammenfassung: {Path(summary['output_dir']) / SUMMARY_NAME}")
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
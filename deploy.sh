@@ -35,7 +35,9 @@ echo ""
 echo "📁 Schritt 2/5: Erstelle Verzeichnisse..."
 mkdir -p test_files
 mkdir -p logs
-echo "✅ Verzeichnisse erstellt: test_files/, logs/"
+mkdir -p cache
+mkdir -p output
+echo "✅ Verzeichnisse erstellt: test_files/, logs/, cache/, output/"
 echo ""
 
 # ============================================
@@ -168,10 +170,13 @@ echo "   Logs anzeigen:    docker-compose logs -f"
 echo "   Container stoppen: docker-compose down"
 echo "   Neu starten:      docker-compose restart"
 echo "   Status prüfen:    docker-compose ps"
+echo "   Bulk-Ingestion:   docker-compose exec unstructured-app python3 bulk_ingest.py test_files"
 echo ""
 echo "📂 Volumes:"
 echo "   Uploads:  ./test_files/"
 echo "   Logs:     ./logs/"
+echo "   Cache:    ./cache/"
+echo "   Output:   ./output/ (Bulk-Ingestion)"
 echo ""
 echo "🔧 Technische Details:"
 echo "   Base Image: downloads.unstructured.io/unstructured-io/unstructured:latest"
@@ -0,0 +1,17 @@
+#!/bin/bash
+
+# ============================================
+# Container-Start: Streamlit + Job-API (inkl. Pool + Modell-Warm-up)
+# ============================================
+# serve.py startet den Partition-Pool im Streamlit-Prozess, wärmt die
+# Worker (bzw. bei PARTITION_WORKERS=0 den Prozess selbst) und schreibt
+# logs/ready.json erst, wenn alle Worker ihren Warm-up gemeldet haben.
+# Die Job-API (Port 8502, JOB_API_ENABLED) läuft als Thread im selben
+# Prozess und nutzt denselben Pool.
+
+cd /app/prototype
+
+# Veralteten Marker vom letzten Lauf entfernen
+rm -f logs/ready.json
+
+exec python3 serve.py --server.port=8501 --server.address=0.0.0.0
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Element-Speicher mit Auslagerung auf Disk für sehr große Dokumente
+Verhält sich wie eine (nur lesbare) Liste von unstructured-Elementen:
+- Elemente liegen in Blöcken zu ELEMENT_STORE_CHUNK_SIZE Elementen
+- Überschreitet der geschätzte Speicherbedarf ELEMENT_STORE_MEMORY_MB, werden die
+  ältesten Blöcke als Element-Dicts (elements_to_dicts) in eine temporäre Datei ausgelagert
+- Zugriffe laden ausgelagerte Blöcke bei Bedarf zurück (max. ELEMENT_STORE_LOADED_CHUNKS gleichzeitig)
+- Iteration läuft blockweise - Exporte und Vorschauen halten nie das ganze Dokument im RAM
+- load_element_dicts() deserialisiert Element-Dicts (Pool-Worker, Ergebnis-Cache) blockweise
+  direkt in den Speicher - die vollständige Objekt-Liste entsteht bei großen Dokumenten nie
+
+Grenzen:
+- Begrenzt wird der Speicher der Element-OBJEKTE. Die Element-Dicts eines Ergebnisses
+  (Rückgabe des Pool-Workers bzw. der JSON-Eintrag des Ergebnis-Caches) liegen beim Laden
+  einmal vollständig im RAM.
+- Der Speicher ist nur lesbar: Änderungen an Elementen (z.B. element.metadata.x = ...) gehen
+  verloren, sobald ihr Block ausgelagert bzw. erneut geladen wird. Elemente vor dem Ablegen
+  fertig bearbeiten.
+- Die Auslagerungsdatei wird nur pro Zugriff geöffnet - ein Store in session_state hält
+  keinen offenen Datei-Handle.
+
+Konfiguration (Umgebungsvariablen):
+- ELEMENT_STORE_MEMORY_MB:       Speicherschwelle pro Dokument, ab der ausgelagert wird
+- ELEMENT_STORE_CHUNK_SIZE:      Elemente pro Block
+- ELEMENT_STORE_LOADED_CHUNKS:   Gleichzeitig zurückgeladene Blöcke
+- ELEMENT_STORE_DIR:             Verzeichnis für Auslagerungsdateien (Standard: System-Temp)
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Sequence
+
+ELEMENT_STORE_MEMORY_BYTES = int(float(os.environ.get("ELEMENT_STORE_MEMORY_MB", "256")) * 1024 * 1024)
+ELEMENT_STORE_CHUNK_SIZE = int(os.environ.get("ELEMENT_STORE_CHUNK_SIZE", "200"))
+ELEMENT_STORE_LOADED_CHUNKS = int(os.environ.get("ELEMENT_STORE_LOADED_CHUNKS", "2"))
+ELEMENT_STORE_DIR = os.environ.get("ELEMENT_STORE_DIR") or None
+
+# Grober Sockelbetrag pro Element (Objekt + ElementMetadata + Koordinaten)
+ELEMENT_OVERHEAD_BYTES = 2048
+
+
+def estimate_element_bytes(element):
+    """
+    Schätzt den Speicherbedarf eines Elements (Text, HTML-Tabelle, Base64-Bild)
+    """
+    size = ELEMENT_OVERHEAD_BYTES + len(getattr(element, "text", "") or "")
+    metadata = getattr(element, "metadata", None)
+    if metadata is not None:
+        size += len(getattr(metadata, "image_base64", None) or "")
+        size += len(getattr(metadata, "text_as_html", None) or "")
+    return size
+
+
+class ElementStore(Sequence):
+    """
+    Listen-artiger Element-Speicher mit Auslagerung auf Disk
+
+    Nutzung wie eine (nur lesbare) Liste: len(store), store[i], store[:5], for element in store
+    Änderungen an Elementen ausgelagerter Blöcke werden NICHT zurückgeschrieben.
+    """
+
+    def __init__(self, elements=(), memory_limit_bytes=ELEMENT_STORE_MEMORY_BYTES,
+                 chunk_size=ELEMENT_STORE_CHUNK_SIZE, loaded_chunks=ELEMENT_STORE_LOADED_CHUNKS,
+                 spill_dir=ELEMENT_STORE_DIR):
+        self.memory_limit_bytes = memory_limit_bytes
+        self.chunk_size = max(1, chunk_size)
+        self.loaded_chunks = max(1, loaded_chunks)
+        self._spill_dir = spill_dir
+        self._chunks = []        # Liste (im RAM) oder None (ausgelagert)
+        self._chunk_bytes = []   # geschätzte Größe je Block
+        self._offsets = {}       # Block-Index -> (offset, length) in der Auslagerungsdatei
+        self._loaded = OrderedDict()  # LRU zurückgeladener Blöcke
+        self._length = 0
+        self._resident_bytes = 0
+        self._spill_path = None
+        self._lock = threading.RLock()
+        self._finalizer = None
+        self.extend(elements)
+
+    # ---------- Schreiben ----------
+
+    def append(self, element):
+        with self._lock:
+            if not self._chunks or self._chunks[-1] is None or len(self._chunks[-1]) >= self.chunk_size:
+                self._chunks.append([])
+                self._chunk_bytes.append(0)
+            size = estimate_element_bytes(element)
+            self._chunks[-1].append(element)
+            self._chunk_bytes[-1] += size
+            self._resident_bytes += size
+            self._length += 1
+            if self._resident_bytes > self.memory_limit_bytes:
+                self._spill()
+
+    def extend(self, elements):
+        for element in elements:
+            self.append(element)
+
+    def extend_dicts(self, element_dicts):
+        """
+        Deserialisiert Element-Dicts blockweise und hängt sie an (auslagern während des Ladens)
+        """
+        from unstructured.staging.base import elements_from_dicts
+
+        for start in range(0, len(element_dicts), self.chunk_size):
+            self.extend(elements_from_dicts(element_dicts[start:start + self.chunk_size]))
+
+    def _spill(self):
+        """
+        Lagert die ältesten vollständigen Blöcke aus, bis die Schwelle wieder eingehalten ist
+        (der aktuell befüllte letzte Block bleibt im RAM)
+        """
+        from unstructured.staging.base import elements_to_dicts
+
+        if self._spill_path is None:
+            fd, self._spill_path = tempfile.mkstemp(prefix="elements_", suffix=".spill", dir=self._spill_dir)
+            os.close(fd)
+            self._finalizer = weakref.finalize(self, _remove_spill_file, self._spill_path)
+
+        with open(self._spill_path, "ab") as spill_file:
+            for index in range(len(self._chunks) - 1):
+                if self._resident_bytes <= self.memory_limit_bytes:
+                    break
+                chunk = self._chunks[index]
+                if chunk is None:
+                    continue
+                payload = pickle.dumps(elements_to_dicts(chunk), protocol=pickle.HIGHEST_PROTOCOL)
+                self._offsets[index] = (spill_file.tell(), len(payload))
+                spill_file.write(payload)
+                self._chunks[index] = None
+                self._resident_bytes -= self._chunk_bytes[index]
+
+    # ---------- Lesen ----------
+
+    def _get_chunk(self, index):
+        chunk = self._chunks[index]
+        if chunk is not None:
+            return chunk
+        if index in self._loaded:
+            self._loaded.move_to_end(index)
+            return self._loaded[index]
+
+        from unstructured.staging.base import elements_from_dicts
+
+        offset, length = self._offsets[index]
+        with open(self._spill_path, "rb") as spill_file:
+            spill_file.seek(offset)
+            payload = spill_file.read(length)
+        chunk = elements_from_dicts(pickle.loads(payload))
+        self._loaded[index] = chunk
+        while len(self._loaded) > self.loaded_chunks:
+            self._loaded.popitem(last=False)
+        return chunk
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ElementStore index out of range")
+        with self._lock:
+            return self._get_chunk(index // self.chunk_size)[index % self.chunk_size]
+
+    def __iter__(self):
+        for index in range(len(self._chunks)):
+            with self._lock:
+                chunk = self._get_chunk(index)
+            yield from chunk
+
+    def iter_chunks(self):
+        """
+        Liefert die Elemente blockweise (für Exporte, die in Blöcken schreiben)
+        """
+        for index in range(len(self._chunks)):
+            with self._lock:
+                chunk = self._get_chunk(index)
+            yield list(chunk)
+
+    # ---------- Verwaltung ----------
+
+    @property
+    def spilled(self):
+        return bool(self._offsets)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "elements": self._length,
+                "chunks": len(self._chunks),
+                "spilled_chunks": len(self._offsets),
+                "resident_bytes": self._resident_bytes,
+                "disk_bytes": sum(length for _, length in self._offsets.values()),
+            }
+
+    def close(self):
+        """
+        Entfernt die Auslagerungsdatei (auch automatisch bei Garbage Collection)
+        """
+        with self._lock:
+            if self._finalizer is not None:
+                self._finalizer()
+            self._finalizer = None
+            self._spill_path = None
+            self._chunks = []
+            self._chunk_bytes = []
+            self._offsets = {}
+            self._loaded.clear()
+            self._length = 0
+            self._resident_bytes = 0
+
+    def __repr__(self):
+        return f"ElementStore({self._length} Elemente, {len(self._offsets)} Blöcke ausgelagert)"
+
+
+def _remove_spill_file(spill_path):
+    try:
+        os.unlink(spill_path)
+    except FileNotFoundError:
+        pass
+
+
+def to_element_store(elements, **kwargs):
+    """
+    Wandelt eine Element-Liste in einen ElementStore um (bestehende Stores bleiben unverändert)
+    Danach Elemente nicht mehr verändern (siehe ElementStore)
+    """
+    if isinstance(elements, ElementStore):
+        return elements
+    return ElementStore(elements, **kwargs)
+
+
+def estimate_dict_bytes(element_dict):
+    """
+    Schätzt den Speicherbedarf eines Elements anhand seines Dicts (wie estimate_element_bytes)
+    """
+    metadata = element_dict.get("metadata") or {}
+    return (
+        ELEMENT_OVERHEAD_BYTES
+        + len(element_dict.get("text") or "")
+        + len(metadata.get("image_base64") or "")
+        + len(metadata.get("text_as_html") or "")
+    )
+
+
+def load_element_dicts(element_dicts, memory_limit_bytes=ELEMENT_STORE_MEMORY_BYTES, **kwargs):
+    """
+    Deserialisiert Element-Dicts: unter der Speicherschwelle als normale Liste,
+    darüber blockweise direkt in einen ElementStore (die volle Objekt-Liste entsteht nie)
+    """
+    from unstructured.staging.base import elements_from_dicts
+
+    if sum(estimate_dict_bytes(d) for d in element_dicts) <= memory_limit_bytes:
+        return elements_from_dicts(element_dicts)
+    store = ElementStore(memory_limit_bytes=memory_limit_bytes, **kwargs)
+    store.extend_dicts(element_dicts)
+    return store
+
+
+def iter_element_dicts(elements, chunk_size=ELEMENT_STORE_CHUNK_SIZE):
+    """
+    Serialisiert Elemente blockweise (Liste oder ElementStore) - z.B. für den Ergebnis-Cache,
+    ohne die vollständige Dict-Liste aufzubauen
+    """
+    from unstructured.staging.base import elements_to_dicts
+
+    if isinstance(elements, ElementStore):
+        chunks = elements.iter_chunks()
+    else:
+        chunks = (elements[start:start + chunk_size] for start in range(0, len(elements), chunk_size))
+    for chunk in chunks:
+        yield from elements_to_dicts(chunk)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Inhaltsbasierte Dateityp-Erkennung (Magic Bytes) und Vorab-Validierung
+Der Dateityp wird am Inhalt erkannt, nicht an der Endung - genau ein Partitioner
+wird gewählt, defekte Dateien werden erkannt, bevor teure Modelle laufen.
+
+Erkannte Typen:
+    pdf, docx, pptx, xlsx, doc, ppt, xls (OLE2 + Endung), image, html, txt, container, unknown
+
+"container": gültiges ZIP bzw. OLE2 ohne eindeutigen Office-Typ (ZIP, EPUB, ODT, MSG, ...) oder
+Binärinhalt ohne bekannte Signatur - wird nicht abgewiesen, sondern über partition() verarbeitet
+(Auswahl per Endung/Inhalt).
+"txt": Text in UTF-8, UTF-16 (BOM) oder cp1252/latin-1 (z.B. deutsche Windows-Exporte).
+"""
+
+import os
+import zipfile
+
+SNIFF_BYTES = 8192
+
+# OOXML: Pflicht-Part je Dokumenttyp
+OOXML_MAIN_PARTS = {
+    "docx": "word/document.xml",
+    "pptx": "ppt/presentation.xml",
+    "xlsx": "xl/workbook.xml",
+}
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+
+# Endungen, die zum erkannten Typ passen (sonst extension_mismatch)
+EXPECTED_EXTENSIONS = {
+    "image": {"jpg", "jpeg", "png", "gif", "bmp", "tif", "tiff", "webp"},
+    "html": {"htm", "html"},
+    "txt": {"txt", "text", "md", "csv", "tsv", "log", "xml", "json", "eml", "rtf", "rst", "org"},
+}
+
+OLE2_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+OLE2_EXTENSIONS = {".doc": "doc", ".ppt": "ppt", ".xls": "xls"}
+
+# Container ohne eindeutigen Typ - Partitioner-Wahl bleibt partition() überlassen
+CONTAINER_TYPE = "container"
+
+UTF16_BOMS = (b"\xff\xfe", b"\xfe\xff")
+
+
+class FileValidationError(ValueError):
+    """Datei ist leer, beschädigt oder passt zu keinem unterstützten Typ"""
+
+
+def _sniff_zip(file_path):
+    """
+    Unterscheidet DOCX/PPTX/XLSX anhand der Parts im ZIP-Verzeichnis (liest nur das Central Directory)
+    Andere gültige ZIPs (ZIP, EPUB, ODT, ...) -> container
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            names = set(archive.namelist())
+    except zipfile.BadZipFile:
+        return "unknown"
+    if "[Content_Types].xml" not in names:
+        return CONTAINER_TYPE
+    for file_type, main_part in OOXML_MAIN_PARTS.items():
+        if main_part in names:
+            return file_type
+    return CONTAINER_TYPE
+
+
+def _decode_text(head):
+    """
+    Dekodiert den Dateianfang als Text (UTF-16 mit BOM, UTF-8, sonst cp1252/latin-1)
+    None, wenn der Inhalt binär ist (NUL-Bytes ohne UTF-16-BOM)
+    """
+    if head.startswith(UTF16_BOMS):
+        # Ungerade Länge: letztes halbes Zeichen abgeschnitten
+        return head[:len(head) - len(head) % 2].decode("utf-16", errors="replace")
+    if b"\x00" in head:
+        return None
+    try:
+        return head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # Mehrbyte-Zeichen am Ende des gelesenen Blocks abgeschnitten
+        if e.start >= len(head) - 4:
+            return head[:e.start].decode("utf-8")
+    try:
+        return head.decode("cp1252")
+    except UnicodeDecodeError:
+        return head.decode("latin-1")
+
+
+def sniff_file_type(file_path):
+    """
+    Erkennt den Dateityp am Inhalt
+
+    Returns:
+        Einer der Typen aus dem Modul-Docstring
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+
+    # PDF-Header darf laut Spezifikation innerhalb der ersten 1024 Bytes stehen
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return _sniff_zip(file_path)
+    if head.startswith(OLE2_SIGNATURE):
+        # .doc/.ppt/.xls mit eigenem Partitioner, sonst (z.B. .msg) über partition()
+        return OLE2_EXTENSIONS.get(os.path.splitext(file_path)[1].lower(), CONTAINER_TYPE)
+    for signature, _ in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return "image"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "image"
+    # BMP: "BM" allein ist zu unspezifisch (Textdateien), reservierte Header-Bytes sind 0
+    if head.startswith(b"BM") and len(head) > 26 and head[6:10] == b"\x00\x00\x00\x00":
+        return "image"
+
+    if not head:
+        return "unknown"
+    # Textformate (Kodierung erkennt partition() selbst); Binärinhalt ohne Signatur ebenfalls
+    # an partition() weitergeben statt abzuweisen
+    text = _decode_text(head)
+    if text is None:
+        return CONTAINER_TYPE
+    start = text.lstrip("\ufeff \t\r\n").lower()
+    if start.startswith(("<!doctype html", "<html")) or ("<html" in start[:1024] and "<body" in start):
+        return "html"
+    return "txt"
+
+
+def validate_file(file_path, file_type):
+    """
+    Günstige Strukturprüfung vor der eigentlichen Verarbeitung
+
+    Raises:
+        FileValidationError mit verständlicher Ursache
+    """
+    if os.path.getsize(file_path) == 0:
+        raise FileValidationError("Datei ist leer")
+
+    if file_type == "unknown":
+        raise FileValidationError("Dateityp nicht erkannt (Inhalt passt zu keinem unterstützten Format)")
+
+    if file_type == "pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            return
+        try:
+            reader = PdfReader(file_path)
+            if reader.is_encrypted:
+                # Leeres Passwort (nur Rechte-Beschränkung) ist lesbar
+                if not reader.decrypt(""):
+                    raise FileValidationError("PDF ist passwortgeschützt")
+            if len(reader.pages) == 0:
+                raise FileValidationError("PDF enthält keine Seiten")
+        except FileValidationError:
+            raise
+        except Exception as e:
+            raise FileValidationError(f"PDF beschädigt: {e}")
+
+    elif file_type in OOXML_MAIN_PARTS:
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                archive.getinfo(OOXML_MAIN_PARTS[file_type])
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise FileValidationError(f"{file_type.upper()} beschädigt: {e}")
+
+    elif file_type == "image":
+        try:
+            from PIL import Image
+        except ImportError:
+            return
+        try:
+            with Image.open(file_path) as img:
+                img.verify()
+        except Exception as e:
+            raise FileValidationError(f"Bild beschädigt: {e}")
+
+
+def inspect_file(file_path):
+    """
+    Erkennt und prüft eine Datei in einem Schritt
+
+    Returns:
+        {"file_type", "extension", "extension_mismatch", "error"} - error ist None bei gültiger Datei
+    """
+    extension = os.path.splitext(file_path)[1].lower().lstrip(".")
+    inspection = {"file_type": "unknown", "extension": extension, "extension_mismatch": False, "error": None}
+    try:
+        file_type = sniff_file_type(file_path)
+        inspection["file_type"] = file_type
+        expected = EXPECTED_EXTENSIONS.get(file_type, {file_type})
+        inspection["extension_mismatch"] = file_type not in ("unknown", CONTAINER_TYPE) and extension not in expected
+        validate_file(file_path, file_type)
+    except FileValidationError as e:
+        inspection["error"] = str(e)
+    except OSError as e:
+        inspection["error"] = f"Datei nicht lesbar: {e}"
+    return inspection
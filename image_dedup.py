@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Erkennung von Beinahe-Duplikaten unter extrahierten Bildern (Perceptual Hash)
+Logos, Icons und Hintergründe wiederholen sich auf jeder Folie/Seite - oft mit
+leicht anderer Kodierung und damit anderem Inhalts-Hash. Ein Differenz-Hash (dHash)
+über ein verkleinertes Graustufenbild fasst solche Bilder zu Clustern zusammen;
+nur der erste Vertreter jedes Clusters wird von der Vision-API beschrieben, die übrigen
+übernehmen seine Beschreibung. Exportiert wird trotzdem jedes Bild mit eigenem Inhalt
+(zwei Versionen eines Diagramms können fast gleich aussehen).
+
+- Identischer Inhalts-Hash -> immer dasselbe Cluster (auch ohne PIL)
+- Hamming-Abstand der dHashes <= IMAGE_DEDUP_MAX_DISTANCE und ähnliches Seitenverhältnis
+  -> Beinahe-Duplikat
+- dHashes werden pro Inhalts-Hash im Prozess zwischengespeichert
+
+Konfiguration (Umgebungsvariablen):
+- IMAGE_DEDUP_ENABLED:      0 = nur exakte Duplikate zusammenfassen
+- IMAGE_DEDUP_MAX_DISTANCE: Maximaler Hamming-Abstand (von 64 Bit)
+- IMAGE_DEDUP_MIN_PX:       Kleinere Bilder (Kantenlänge) werden nur exakt verglichen
+- IMAGE_DEDUP_MAX_ASPECT_DIFF: Maximaler relativer Unterschied der Seitenverhältnisse
+"""
+
+import importlib.util
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from image_store import iter_image_bytes
+
+IMAGE_DEDUP_ENABLED = os.environ.get("IMAGE_DEDUP_ENABLED", "1").lower() not in ("0", "false", "no")
+IMAGE_DEDUP_MAX_DISTANCE = int(os.environ.get("IMAGE_DEDUP_MAX_DISTANCE", "4"))
+IMAGE_DEDUP_MIN_PX = int(os.environ.get("IMAGE_DEDUP_MIN_PX", "16"))
+IMAGE_DEDUP_MAX_ASPECT_DIFF = float(os.environ.get("IMAGE_DEDUP_MAX_ASPECT_DIFF", "0.05"))
+
+DHASH_SIZE = 8
+_DHASH_CACHE_SIZE = 20000
+
+# Inhalts-Hash -> (dHash, Seitenverhältnis) (None = nicht berechenbar)
+_DHASH_CACHE = OrderedDict()
+_DHASH_LOCK = threading.Lock()
+
+
+def dhash(data, size=DHASH_SIZE):
+    """
+    Differenz-Hash: Graustufen, (size+1) x size Pixel, Vergleich benachbarter Pixel
+
+    Returns:
+        (int mit size*size Bit, Seitenverhältnis Breite/Höhe) oder None (Bild zu klein / nicht lesbar)
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        if min(img.size) < IMAGE_DEDUP_MIN_PX:
+            return None
+        aspect_ratio = img.size[0] / img.size[1]
+        img.draft("L", (size * 4, size * 4))
+        pixels = list(img.convert("L").resize((size + 1, size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value, aspect_ratio
+
+
+def _similar(signature, other, max_distance):
+    value, aspect_ratio = signature
+    other_value, other_aspect_ratio = other
+    if abs(aspect_ratio - other_aspect_ratio) > IMAGE_DEDUP_MAX_ASPECT_DIFF * max(aspect_ratio, other_aspect_ratio):
+        return False
+    return bin(value ^ other_value).count("1") <= max_distance
+
+
+def _cached_dhashes(items):
+    """
+    dHash-Signaturen für alle Items (Dicts mit "hash" und "metadata"), fehlende werden parallel geladen
+    """
+    result = {}
+    missing = []
+    with _DHASH_LOCK:
+        for item in items:
+            if item["hash"] in _DHASH_CACHE:
+                _DHASH_CACHE.move_to_end(item["hash"])
+                result[item["hash"]] = _DHASH_CACHE[item["hash"]]
+            else:
+                missing.append(item)
+
+    for item, data, _ in iter_image_bytes(missing):
+        value = None
+        if data is not None:
+            try:
+                value = dhash(data)
+            except Exception as e:
+                print(f"⚠️ dHash für Bild {item['hash'][:12]} fehlgeschlagen: {e}")
+        result[item["hash"]] = value
+        with _DHASH_LOCK:
+            _DHASH_CACHE[item["hash"]] = value
+            while len(_DHASH_CACHE) > _DHASH_CACHE_SIZE:
+                _DHASH_CACHE.popitem(last=False)
+    return result
+
+
+def find_near_duplicates(items, max_distance=IMAGE_DEDUP_MAX_DISTANCE):
+    """
+    Fasst Bilder zu Clustern zusammen (erster Vertreter in Eingabe-Reihenfolge gewinnt)
+
+    Args:
+        items: Liste von Dicts mit "hash" (Inhalts-Hash) und "metadata" (für das Laden)
+
+    Returns:
+        {Inhalts-Hash: Inhalts-Hash des Cluster-Vertreters} für alle Hashes
+    """
+    unique = OrderedDict()
+    for item in items:
+        unique.setdefault(item["hash"], item)
+
+    representative = {image_hash: image_hash for image_hash in unique}
+    if not IMAGE_DEDUP_ENABLED or len(unique) < 2:
+        return representative
+
+    # Ohne PIL bleibt es bei exakten Duplikaten
+    if importlib.util.find_spec("PIL") is None:
+        return representative
+
+    dhashes = _cached_dhashes(list(unique.values()))
+    clusters = []  # (Signatur, Vertreter-Hash)
+    for image_hash in unique:
+        signature = dhashes.get(image_hash)
+        if signature is None:
+            continue
+        for cluster_signature, cluster_hash in clusters:
+            if _similar(signature, cluster_signature, max_distance):
+                representative[image_hash] = cluster_hash
+                break
+        else:
+            clusters.append((signature, image_hash))
+    return representative
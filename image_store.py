@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Content-adressierter Bild-Speicher (Blob-Store) für extrahierte Bilder
+Bild-Bytes liegen genau einmal unter ihrem SHA-256 im gemounteten cache/-Volume:
+- Elemente tragen nur noch die Referenz metadata.image_blob_id (statt image_base64)
+- Gleiche Bilder (z.B. Logos auf jeder Seite / in jedem Dokument) werden einmal gespeichert
+- Base64 entsteht erst dort, wo ein Renderer wirklich eine Data-URL braucht
+
+Zugriff auf Bilder immer über get_image_bytes() / get_image_base64() - beide
+funktionieren auch mit Elementen, die noch image_base64 tragen (z.B. alte Cache-Einträge).
+JSON-Exporte (Downloads, Job-API) setzen image_base64 über inline_image_data() wieder ein -
+der Blob-Store ist von außen nicht erreichbar.
+
+Konfiguration (Umgebungsvariablen):
+- IMAGE_BLOB_DIR:     Ablageverzeichnis (Standard: cache/blobs)
+- IMAGE_BLOB_MAX_MB:  Größenlimit, darüber LRU-Verdrängung
+- IMAGE_BLOB_PIN_TTL: Stunden, die eine Pin-Liste (pin_element_images) ohne Auffrischung gilt
+- IMAGE_BLOB_ENABLED: 0 = Bilder bleiben als image_base64 im Element
+- IMAGE_LOAD_WORKERS: Threads für paralleles Laden/Dekodieren bei Bild-Exporten
+"""
+
+import os
+import base64
+import hashlib
+import tempfile
+import threading
+import time
+import weakref
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+DEFAULT_BLOB_DIR = os.environ.get(
+    "IMAGE_BLOB_DIR",
+    str(Path(__file__).resolve().parent / "cache" / "blobs")
+)
+DEFAULT_MAX_BYTES = int(float(os.environ.get("IMAGE_BLOB_MAX_MB", "4096")) * 1024 * 1024)
+BLOB_STORE_ENABLED = os.environ.get("IMAGE_BLOB_ENABLED", "1").lower() not in ("0", "false", "no")
+IMAGE_LOAD_WORKERS = int(os.environ.get("IMAGE_LOAD_WORKERS", "4"))
+IMAGE_BLOB_PIN_TTL = float(os.environ.get("IMAGE_BLOB_PIN_TTL", "12")) * 3600
+
+# Bereits komprimierte Bildformate: in ZIPs nur speichern (Deflate spart nichts, kostet CPU)
+PRECOMPRESSED_MIME_TYPES = {"image/png", "image/jpeg", "image/jpg", "image/gif", "image/webp"}
+
+
+class BlobStore:
+    """
+    Bild-Bytes auf Disk, Schlüssel = SHA-256 des kompletten Inhalts
+
+    - Ablage als <blob_dir>/<2 Zeichen>/<sha256> (verteilt über 256 Unterverzeichnisse)
+    - Schreiben atomar über temporäre Datei + os.replace; vorhandene Blobs werden nur "berührt"
+    - LRU: Lesezugriffe aktualisieren die mtime, evict() löscht die ältesten Blobs über max_bytes
+    - Pins: Blobs offener Ergebnisse (Streamlit-Session, Job-API) stehen in <blob_dir>/pins/<owner>
+      und werden nie verdrängt - als Dateien, damit auch evict() in den Pool-Workern sie sieht.
+      Pins verfallen nach pin_ttl Sekunden ohne Auffrischung (beendete Sessions)
+    """
+
+    def __init__(self, blob_dir=DEFAULT_BLOB_DIR, max_bytes=DEFAULT_MAX_BYTES, pin_ttl=IMAGE_BLOB_PIN_TTL):
+        self.blob_dir = Path(blob_dir)
+        self.pin_dir = self.blob_dir / "pins"
+        self.max_bytes = max_bytes
+        self.pin_ttl = pin_ttl
+        self.puts = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+    def _blob_path(self, blob_id):
+        return self.blob_dir / blob_id[:2] / blob_id
+
+    def put(self, data, blob_id=None):
+        """
+        Speichert Bild-Bytes (falls noch nicht vorhanden)
+        blob_id: fester Schlüssel statt Inhalts-Hash (für abgeleitete Daten, z.B. Thumbnails)
+
+        Returns:
+            blob_id (SHA-256 Hex)
+        """
+        blob_id = blob_id or hashlib.sha256(data).hexdigest()
+        path = self._blob_path(blob_id)
+        with self._lock:
+            self.puts += 1
+        try:
+            # Bereits vorhanden: nur LRU-Zeitpunkt aktualisieren
+            os.utime(path, None)
+            with self._lock:
+                self.deduplicated += 1
+            return blob_id
+        except FileNotFoundError:
+            pass
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return blob_id
+
+    def get(self, blob_id):
+        """
+        Liefert die Bild-Bytes oder None (unbekannt / bereits verdrängt)
+        """
+        path = self._blob_path(blob_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def exists(self, blob_id):
+        return self._blob_path(blob_id).exists()
+
+    def pin(self, owner, blob_ids):
+        """
+        Schützt blob_ids vor der Verdrängung (ersetzt frühere Pins desselben owner)
+        """
+        self.pin_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.pin_dir, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write("\n".join(sorted(set(blob_ids))))
+            os.replace(tmp_path, self.pin_dir / owner)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def refresh_pin(self, owner):
+        """
+        Frischt einen Pin auf (offenes Ergebnis wird weiter angezeigt); False wenn keiner existiert
+        """
+        try:
+            os.utime(self.pin_dir / owner, None)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def unpin(self, owner):
+        try:
+            (self.pin_dir / owner).unlink()
+        except FileNotFoundError:
+            pass
+
+    def pinned_ids(self):
+        """
+        Alle gültig gepinnten blob_ids - abgelaufene Pin-Listen werden dabei entfernt
+        """
+        pinned = set()
+        now = time.time()
+        for path in self.pin_dir.glob("*"):
+            if path.name.startswith(".tmp_"):
+                continue
+            try:
+                if self.pin_ttl and now - path.stat().st_mtime > self.pin_ttl:
+                    path.unlink()
+                    continue
+                pinned.update(path.read_text().split())
+            except FileNotFoundError:
+                continue
+        return pinned
+
+    def evict(self):
+        """
+        LRU-Verdrängung: löscht die ältesten nicht gepinnten Blobs bis die Gesamtgröße unter max_bytes liegt
+        """
+        entries = []
+        total_bytes = 0
+        for path in self.blob_dir.glob("??/*"):
+            if path.name.startswith(".tmp_"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return 0
+
+        pinned = self.pinned_ids()
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total_bytes <= self.max_bytes:
+                break
+            if path.name in pinned:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {"blob_puts": self.puts, "blob_deduplicated": self.deduplicated}
+
+
+_BLOB_STORE = None
+_BLOB_STORE_LOCK = threading.Lock()
+
+
+def get_blob_store():
+    """
+    Prozessweiter Blob-Store (geteilt von Sessions und Pool-Workern über das Dateisystem).
+    None wenn deaktiviert.
+    """
+    global _BLOB_STORE
+    if not BLOB_STORE_ENABLED:
+        return None
+    with _BLOB_STORE_LOCK:
+        if _BLOB_STORE is None:
+            try:
+                _BLOB_STORE = BlobStore()
+            except Exception as e:
+                print(f"⚠️ Bild-Speicher nicht verfügbar: {e}")
+                return None
+        return _BLOB_STORE
+
+
+# Bild-Part-Objekt (z.B. python-pptx ImagePart) -> blob_id: ein Part, der auf mehreren
+# Folien verwendet wird, wird nur einmal gehasht und geschrieben
+_IMAGE_PART_BLOB_IDS = weakref.WeakKeyDictionary()
+_IMAGE_PART_LOCK = threading.Lock()
+
+
+def store_image_part(image_part, store=None):
+    """
+    Legt die Bytes eines Bild-Parts (Attribut .blob) im Blob-Store ab, ohne Base64
+
+    Returns:
+        blob_id oder None (Blob-Store deaktiviert)
+    """
+    store = store or get_blob_store()
+    if store is None:
+        return None
+    with _IMAGE_PART_LOCK:
+        blob_id = _IMAGE_PART_BLOB_IDS.get(image_part)
+    if blob_id is None:
+        blob_id = store.put(image_part.blob)
+        with _IMAGE_PART_LOCK:
+            _IMAGE_PART_BLOB_IDS[image_part] = blob_id
+    return blob_id
+
+
+def _metadata(element_or_metadata):
+    return getattr(element_or_metadata, "metadata", element_or_metadata)
+
+
+def store_element_images(elements, store=None):
+    """
+    Verschiebt image_base64 aller Elemente in den Blob-Store (metadata.image_blob_id)
+
+    Returns:
+        Anzahl ausgelagerter Bilder
+    """
+    store = store or get_blob_store()
+    if store is None:
+        return 0
+
+    stored = 0
+    referenced = 0
+    for element in elements:
+        metadata = getattr(element, "metadata", None)
+        image_base64 = getattr(metadata, "image_base64", None)
+        if not image_base64:
+            # Bereits beim Partitionieren abgelegt (z.B. PPTX Picture Partitioner)
+            referenced += bool(getattr(metadata, "image_blob_id", None))
+            continue
+        try:
+            metadata.image_blob_id = store.put(base64.b64decode(image_base64))
+            metadata.image_base64 = None
+            stored += 1
+        except Exception as e:
+            print(f"⚠️ Bild konnte nicht im Bild-Speicher abgelegt werden: {e}")
+
+    if stored or referenced:
+        try:
+            store.evict()
+        except Exception as e:
+            print(f"⚠️ Bild-Speicher Verdrängung fehlgeschlagen: {e}")
+    return stored
+
+
+def has_image(element_or_metadata):
+    """
+    True, wenn das Element Bild-Daten trägt (Blob-Referenz oder Base64)
+    """
+    metadata = _metadata(element_or_metadata)
+    return bool(getattr(metadata, "image_blob_id", None) or getattr(metadata, "image_base64", None))
+
+
+def get_image_bytes(element_or_metadata):
+    """
+    Liefert die rohen Bild-Bytes eines Elements (oder None)
+    """
+    metadata = _metadata(element_or_metadata)
+    blob_id = getattr(metadata, "image_blob_id", None)
+    if blob_id:
+        store = get_blob_store()
+        data = store.get(blob_id) if store is not None else None
+        if data is not None:
+            return data
+        print(f"⚠️ Bild {blob_id[:12]} nicht mehr im Bild-Speicher")
+    image_base64 = getattr(metadata, "image_base64", None)
+    if image_base64:
+        return base64.b64decode(image_base64)
+    return None
+
+
+def get_image_base64(element_or_metadata):
+    """
+    Liefert das Bild als Base64-String (nur für Data-URLs / Vision-APIs) oder None
+    """
+    metadata = _metadata(element_or_metadata)
+    image_base64 = getattr(metadata, "image_base64", None)
+    if image_base64:
+        return image_base64
+    data = get_image_bytes(metadata)
+    return base64.b64encode(data).decode("utf-8") if data is not None else None
+
+
+def get_image_hash(element_or_metadata):
+    """
+    Inhalts-Hash eines Bildes (= blob_id) für Dateinamen und Bedrock-Referenzen, oder None
+    """
+    metadata = _metadata(element_or_metadata)
+    blob_id = getattr(metadata, "image_blob_id", None)
+    if blob_id:
+        return blob_id
+    image_base64 = getattr(metadata, "image_base64", None)
+    if image_base64:
+        return hashlib.sha256(base64.b64decode(image_base64)).hexdigest()
+    return None
+
+
+def pin_element_images(owner, elements):
+    """
+    Pinnt alle Bilder eines offenen Ergebnisses (Session, Job) gegen Verdrängung
+    owner: eindeutiger Dateiname-tauglicher Schlüssel; ersetzt dessen frühere Pins
+
+    Returns:
+        Anzahl gepinnter Bilder
+    """
+    store = get_blob_store()
+    if store is None:
+        return 0
+    blob_ids = {getattr(getattr(e, "metadata", None), "image_blob_id", None) for e in elements}
+    blob_ids.discard(None)
+    try:
+        store.pin(owner, blob_ids)
+    except Exception as e:
+        print(f"⚠️ Bilder konnten nicht gepinnt werden: {e}")
+        return 0
+    return len(blob_ids)
+
+
+def refresh_image_pin(owner):
+    store = get_blob_store()
+    return store is not None and store.refresh_pin(owner)
+
+
+def unpin_images(owner):
+    store = get_blob_store()
+    if store is not None:
+        store.unpin(owner)
+
+
+def inline_image_data(element_dict):
+    """
+    Ergänzt image_base64 in einem Element-Dict (elements_to_dicts / to_dict) aus dem Bild-Speicher
+    Die interne image_blob_id entfällt danach - Exporte sehen aus wie vor dem Bild-Speicher;
+    nur wenn der Blob fehlt, bleibt sie als Hinweis stehen. Das Dict wird direkt verändert und zurückgegeben
+    """
+    metadata = element_dict.get("metadata")
+    if not metadata or not metadata.get("image_blob_id"):
+        return element_dict
+    if not metadata.get("image_base64"):
+        data = get_image_bytes(SimpleNamespace(image_blob_id=metadata["image_blob_id"]))
+        if data is None:
+            return element_dict
+        metadata["image_base64"] = base64.b64encode(data).decode("utf-8")
+    del metadata["image_blob_id"]
+    return element_dict
+
+
+def inline_images_in_dicts(element_dicts):
+    """
+    inline_image_data() für eine Liste von Element-Dicts (JSON-Exporte)
+    """
+    return [inline_image_data(element_dict) for element_dict in element_dicts]
+
+
+def missing_blobs(elements):
+    """
+    Anzahl referenzierter Blobs, die nicht mehr im Bild-Speicher liegen
+    (z.B. Cache-Eintrag älter als die verdrängten Blobs)
+    """
+    blob_ids = {getattr(getattr(e, "metadata", None), "image_blob_id", None) for e in elements}
+    blob_ids.discard(None)
+    if not blob_ids:
+        return 0
+    store = get_blob_store()
+    if store is None:
+        return len(blob_ids)
+    return sum(1 for blob_id in blob_ids if not store.exists(blob_id))
+
+
+def zip_compress_type(mime_type):
+    """
+    ZIP-Methode pro Eintrag: ZIP_STORED für PNG/JPEG/GIF/WebP, sonst ZIP_DEFLATED
+    """
+    return zipfile.ZIP_STORED if (mime_type or "").lower() in PRECOMPRESSED_MIME_TYPES else zipfile.ZIP_DEFLATED
+
+
+def iter_image_bytes(items, workers=IMAGE_LOAD_WORKERS):
+    """
+    Lädt Bild-Bytes parallel (Disk-Lesen bzw. Base64-Dekodierung) in Eingabe-Reihenfolge
+    Höchstens 2 * workers Bilder sind gleichzeitig geladen - der Aufrufer schreibt sie weg
+
+    Args:
+        items: Iterable von Elementen/Metadaten oder Dicts mit Schlüssel "metadata"
+
+    Yields:
+        (item, bytes | None, Fehlertext | None)
+    """
+    def load(item):
+        source = item["metadata"] if isinstance(item, dict) else item
+        try:
+            data = get_image_bytes(source)
+            return data, None if data is not None else "Bild-Daten nicht verfügbar"
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="image_load") as executor:
+        pending = deque()
+        for item in items:
+            pending.append((item, executor.submit(load, item)))
+            if len(pending) >= 2 * max(1, workers):
+                item_done, future = pending.popleft()
+                yield (item_done, *future.result())
+        while pending:
+            item_done, future = pending.popleft()
+            yield (item_done, *future.result())
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Lokale HTTP-Job-API für die Partitionierungs-Pipeline (ohne Streamlit-UI)
+Asynchron: POST /jobs legt einen Job in die Hintergrund-Warteschlange und antwortet sofort,
+Status und Ergebnis werden per Polling abgefragt. Viele kleine Dokumente laufen so
+parallel (Prozess-Pool) statt nacheinander hinter UI-Reruns.
+
+Endpunkte:
+    POST   /jobs?filename=bericht.pdf&strategy=auto   Body = Datei-Inhalt -> 202 {"job_id", ...}
+    GET    /jobs/<id>                                 Status (queued|running|done|failed)
+    GET    /jobs/<id>/result?format=json|jsonl        Elemente als JSON oder Bedrock-JSONL
+                                                      (json: &include_images=0 lässt image_base64 weg)
+    DELETE /jobs/<id>                                 Job und Ergebnis verwerfen
+    GET    /health                                    Prozess lebt
+    GET    /ready                                     Modell-Warm-up abgeschlossen (warmup.py)
+
+Konfiguration (Umgebungsvariablen):
+- JOB_API_PORT:        Port (Standard 8502)
+- JOB_API_WORKERS:     Gleichzeitig laufende Jobs (Partitionierung selbst im Prozess-Pool)
+- JOB_API_MAX_QUEUED:  Max. wartende + laufende Jobs, darüber 503
+- JOB_API_MAX_UPLOAD_MB: Max. Dateigröße pro Job
+- JOB_API_RESULT_TTL:  Sekunden, die fertige Ergebnisse abrufbar bleiben
+- JOB_API_TOKEN:       Optional - wenn gesetzt, ist "Authorization: Bearer <token>" Pflicht
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+APP_DIR = str(Path(__file__).resolve().parent)
+
+JOB_API_PORT = int(os.environ.get("JOB_API_PORT", "8502"))
+JOB_API_WORKERS = int(os.environ.get("JOB_API_WORKERS", "4"))
+JOB_API_MAX_QUEUED = int(os.environ.get("JOB_API_MAX_QUEUED", "100"))
+JOB_API_MAX_UPLOAD_BYTES = int(float(os.environ.get("JOB_API_MAX_UPLOAD_MB", "200")) * 1024 * 1024)
+JOB_API_RESULT_TTL = float(os.environ.get("JOB_API_RESULT_TTL", "3600"))
+JOB_API_TOKEN = os.environ.get("JOB_API_TOKEN", "")
+
+STRATEGIES = ("auto", "fast", "hi_res", "ocr_only", "adaptive")
+
+
+def _release_result(job):
+    """
+    Gibt ein verworfenes Ergebnis frei: ausgelagerte Elemente (ElementStore) sofort von Disk,
+    Bild-Pins aufheben
+    """
+    result = job.get("result")
+    if result is None:
+        return
+    elements = result.get("elements")
+    if hasattr(elements, "close"):
+        elements.close()
+    from image_store import unpin_images
+    unpin_images(f"job-{job['job_id']}")
+
+
+def _flag(params, name, default):
+    value = params.get(name, [None])[0]
+    if value is None:
+        return default
+    return value.lower() not in ("0", "false", "no")
+
+
+class JobStore:
+    """
+    Job-Verwaltung mit Hintergrund-Warteschlange
+
+    - Jobs laufen in einem Thread-Pool; die Partitionierung selbst im Prozess-Pool der App
+    - Fertige Jobs bleiben JOB_API_RESULT_TTL Sekunden abrufbar (Aufräumen bei jedem Zugriff)
+    - Jeder Fehler (Upload, Import, Verarbeitung) endet im Status "failed" - kein Job bleibt hängen
+    """
+
+    def __init__(self, workers=JOB_API_WORKERS, max_queued=JOB_API_MAX_QUEUED, result_ttl=JOB_API_RESULT_TTL):
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._upload_dir = tempfile.mkdtemp(prefix="job_api_")
+
+    def submit(self, filename, body, options):
+        """
+        Speichert die Datei und reiht den Job ein
+
+        Returns:
+            Job-Status-Dict oder None, wenn die Warteschlange voll ist
+        """
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self._upload_dir, job_id)
+        file_path = os.path.join(job_dir, filename)
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+            if active >= self.max_queued:
+                return None
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "filename": filename,
+                "options": options,
+                "status": "queued",
+                "submitted": time.time(),
+                "file_path": file_path,
+            }
+
+        # Datei außerhalb des Locks schreiben - große Uploads blockieren keine Status-Abfragen
+        try:
+            os.makedirs(job_dir)
+            with open(file_path, "wb") as f:
+                f.write(body)
+            self._executor.submit(self._run, job_id)
+        except Exception as e:
+            print(f"⚠️ Job {job_id} konnte nicht angenommen werden: {e}")
+            shutil.rmtree(job_dir, ignore_errors=True)
+            self._finish(job_id, {"status": "error", "stage": "upload", "error": str(e)})
+        return self.status(job_id)
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["status"] = "running"
+            job["started"] = time.time()
+        options = job["options"]
+
+        try:
+            import app_open_source_recovered as app
+
+            result = app.process_with_open_source_library(
+                job["file_path"],
+                options["strategy"],
+                include_tables=options["include_tables"],
+                include_images=options["include_images"],
+                parallel_pages=options["parallel_pages"],
+            )
+            if result.get("status") == "success":
+                from element_store import to_element_store
+                from image_store import pin_element_images
+                # Viele fertige Jobs im RAM: große Ergebnisse auf Disk auslagern
+                result["elements"] = to_element_store(result["elements"])
+                # Bilder bleiben bis zum Verwerfen des Ergebnisses im Bild-Speicher
+                pin_element_images(f"job-{job_id}", result["elements"])
+        except Exception as e:
+            result = {"status": "error", "stage": "job", "error": str(e)}
+        finally:
+            shutil.rmtree(os.path.dirname(job["file_path"]), ignore_errors=True)
+
+        self._finish(job_id, result)
+
+    def _finish(self, job_id, result):
+        """
+        Setzt den Endstatus (done/failed) eines Jobs
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["finished"] = time.time()
+            if result.get("status") == "success":
+                job["status"] = "done"
+                job["result"] = result
+            else:
+                job["status"] = "failed"
+                job["error"] = result.get("error")
+                job["stage"] = result.get("stage")
+
+    def status(self, job_id):
+        """
+        Öffentlicher Job-Status ohne Elemente
+        """
+        self.cleanup()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = {
+                "job_id": job["job_id"],
+                "filename": job["filename"],
+                "status": job["status"],
+                "options": job["options"],
+                "submitted": job["submitted"],
+                "started": job.get("started"),
+                "finished": job.get("finished"),
+            }
+            if job.get("started"):
+                status["queue_time"] = round(job["started"] - job["submitted"], 3)
+            result = job.get("result")
+            if result is not None:
+                status.update(
+                    element_count=result.get("element_count"),
+                    processing_time=result.get("processing_time"),
+                    method=result.get("method"),
+                    cache_hit=result.get("cache_hit"),
+                )
+            if job.get("error"):
+                status["error"] = job["error"]
+                status["stage"] = job.get("stage")
+            return status
+
+    def result(self, job_id):
+        self.cleanup()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else job.get("result")
+
+    def delete(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in ("queued", "running"):
+                return False
+            del self._jobs[job_id]
+        _release_result(job)
+        return True
+
+    def cleanup(self):
+        """
+        Verwirft abgelaufene fertige Jobs (Ergebnisse liegen im RAM)
+        """
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.get("finished") and now - job["finished"] > self.result_ttl
+            ]
+            expired_jobs = [self._jobs.pop(job_id) for job_id in expired]
+        for job in expired_jobs:
+            _release_result(job)
+        return len(expired)
+
+    def stats(self):
+        self.cleanup()
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+
+class JobAPIHandler(BaseHTTPRequestHandler):
+    """
+    HTTP-Handler (ein Thread pro Verbindung, ThreadingHTTPServer)
+    """
+
+    server_version = "UnstructuredJobAPI/1.0"
+    store = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+
+        if parts == ["health"]:
+            return self._send_json(200, {"status": "ok", "jobs": self.store.stats()})
+        if parts == ["ready"]:
+            from warmup import read_ready_marker
+            report = read_ready_marker()
+            if report is None:
+                return self._send_json(503, {"ready": False, "status": "warming_up"})
+            return self._send_json(200, {"ready": True, "status": report.get("status"), "duration": report.get("duration")})
+
+        if not self._authorized():
+            return
+        if len(parts) == 2 and parts[0] == "jobs":
+            status = self.store.status(parts[1])
+            if status is None:
+                return self._send_json(404, {"error": "Job nicht gefunden"})
+            return self._send_json(200, status)
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+            return self._send_result(parts[1], parse_qs(url.query))
+        return self._send_json(404, {"error": "Unbekannter Endpunkt"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if [p for p in url.path.split("/") if p] != ["jobs"]:
+            return self._send_json(404, {"error": "Unbekannter Endpunkt"})
+        if not self._authorized():
+            return
+
+        params = parse_qs(url.query)
+        filename = os.path.basename(params.get("filename", [""])[0] or self.headers.get("X-Filename", ""))
+        if not filename or "." not in filename:
+            return self._send_json(400, {"error": "filename mit Dateiendung erforderlich (?filename=bericht.pdf)"})
+        strategy = params.get("strategy", ["auto"])[0]
+        if strategy not in STRATEGIES:
+            return self._send_json(400, {"error": f"Unbekannte Strategie: {strategy}"})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return self._send_json(400, {"error": "Leerer Body - Datei-Inhalt als Request-Body senden"})
+        if length > JOB_API_MAX_UPLOAD_BYTES:
+            return self._send_json(413, {"error": f"Datei größer als {JOB_API_MAX_UPLOAD_BYTES // (1024 * 1024)} MB"})
+        body = self.rfile.read(length)
+
+        options = {
+            "strategy": strategy,
+            "include_tables": _flag(params, "include_tables", True),
+            "include_images": _flag(params, "include_images", True),
+            "parallel_pages": _flag(params, "parallel_pages", True),
+        }
+        status = self.store.submit(filename, body, options)
+        if status is None:
+            return self._send_json(503, {"error": "Warteschlange voll - später erneut versuchen"})
+        if status["status"] == "failed":
+            return self._send_json(500, status)
+        status["status_url"] = f"/jobs/{status['job_id']}"
+        status["result_url"] = f"/jobs/{status['job_id']}/result"
+        return self._send_json(202, status)
+
+    def do_DELETE(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if len(parts) != 2 or parts[0] != "jobs":
+            return self._send_json(404, {"error": "Unbekannter Endpunkt"})
+        if not self._authorized():
+            return
+        if self.store.delete(parts[1]):
+            return self._send_json(200, {"deleted": parts[1]})
+        return self._send_json(409, {"error": "Job unbekannt oder noch nicht abgeschlossen"})
+
+    def _send_result(self, job_id, params):
+        import app_open_source_recovered as app
+
+        status = self.store.status(job_id)
+        if status is None:
+            return self._send_json(404, {"error": "Job nicht gefunden"})
+        if status["status"] == "failed":
+            return self._send_json(422, status)
+        if status["status"] != "done":
+            return self._send_json(409, status)
+
+        result = self.store.result(job_id)
+        output_format = params.get("format", ["json"])[0]
+        if output_format == "jsonl":
+            # JSONL dokumentweise in eine temporäre Datei, dann blockweise senden (konstanter Speicher)
+            with tempfile.TemporaryFile() as spool:
+                export = app.export_for_bedrock_knowledge_base(
+                    result["elements"],
+                    status["filename"],
+                    format_type=params.get("format_type", ["element"])[0],
+                    describe_images=_flag(params, "describe_images", False),
+                    output=spool,
+                )
+                if export.get("status") != "success":
+                    return self._send_json(500, {"error": export.get("error")})
+                spool.seek(0)
+                return self._send_file(200, spool, export["size_bytes"], "application/x-ndjson")
+        if output_format == "json":
+            element_dicts = app.elements_to_dicts(result["elements"])
+            if _flag(params, "include_images", True):
+                # Bilder liegen im Bild-Speicher (image_blob_id) - für API-Clients wieder als Base64
+                element_dicts = app.inline_images_in_dicts(element_dicts)
+            payload = dict(status, elements=element_dicts)
+            return self._send_json(200, payload)
+        return self._send_json(400, {"error": f"Unbekanntes Format: {output_format} (json|jsonl)"})
+
+    def _authorized(self):
+        if not JOB_API_TOKEN or self.headers.get("Authorization") == f"Bearer {JOB_API_TOKEN}":
+            return True
+        self._send_json(401, {"error": "Authorization: Bearer <JOB_API_TOKEN> erforderlich"})
+        return False
+
+    def _send_json(self, status_code, payload):
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode("utf-8")
+        self._send_bytes(status_code, body, "application/json; charset=utf-8")
+
+    def _send_bytes(self, status_code, body, content_type):
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, status_code, file_obj, size, content_type):
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        shutil.copyfileobj(file_obj, self.wfile)
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} - {format % args}")
+
+
+def create_server(port=JOB_API_PORT, store=None):
+    """
+    Erstellt den HTTP-Server (ohne ihn zu starten)
+    """
+    JobAPIHandler.store = store or JobStore()
+    return ThreadingHTTPServer(("0.0.0.0", port), JobAPIHandler)
+
+
+def start_in_background(port=JOB_API_PORT):
+    """
+    Startet die API als Thread im aufrufenden Prozess (serve.py) - Jobs nutzen dort
+    denselben vorgewärmten Partition-Pool wie die Streamlit-Sessions, statt eines zweiten Pools
+    """
+    server = create_server(port)
+    threading.Thread(target=server.serve_forever, name="job_api", daemon=True).start()
+    print(f"✅ Job-API läuft auf Port {port} ({JOB_API_WORKERS} gleichzeitige Jobs, Pool der App)")
+    return server
+
+
+def main():
+    """
+    Eigenständiger Start (ohne Streamlit) - mit eigenem Partition-Pool
+    """
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    import app_open_source_recovered as app
+    from processing_pool import get_partition_pool
+
+    if not app.UNSTRUCTURED_AVAILABLE:
+        print(f"❌ Open Source Unstructured Library nicht verfügbar: {app.IMPORT_ERROR}")
+        sys.exit(1)
+
+    # Worker sofort starten (inkl. Warm-up), nicht erst beim ersten Job
+    partition_pool = get_partition_pool()
+    if partition_pool is not None:
+        partition_pool.start_workers()
+
+    server = create_server()
+    print(f"✅ Job-API läuft auf Port {JOB_API_PORT} ({JOB_API_WORKERS} gleichzeitige Jobs)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
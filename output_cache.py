@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Cache für generierte Ausgabeformate (Text, HTML, Markdown, JSON, ...) über Streamlit-Reruns
+Schlüssel = Fingerprint der Element-Liste + Format + Format-Optionen:
+- Mehrere Formate liegen gleichzeitig im Cache, ein erneuter Klick liefert sofort das Ergebnis
+- Speicherbudget: älteste Formate werden verdrängt (das zuletzt erzeugte bleibt immer erhalten)
+- Anderer Fingerprint (neues Dokument verarbeitet) -> Cache wird automatisch geleert
+
+Konfiguration (Umgebungsvariablen):
+- OUTPUT_CACHE_MAX_MB: Speicherbudget pro Session
+"""
+
+import os
+import hashlib
+from collections import OrderedDict
+
+from image_store import get_image_hash
+
+OUTPUT_CACHE_MAX_BYTES = int(float(os.environ.get("OUTPUT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+
+def fingerprint_elements(elements, options=None):
+    """
+    Fingerprint einer Element-Liste (SHA-256 über Typ + Element-ID bzw. Text + Bild-Hash jedes
+    Elements, dazu die Verarbeitungs-Optionen)
+
+    Die Element-ID hängt nur von Text/Position ab - Bild-Hash (image_blob_id) und Optionen
+    (z.B. include_images, strategy) unterscheiden sonst gleiche Läufe mit anderen Bildern.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    for element in elements:
+        element_id = getattr(element, "id", None) or str(element)
+        image_hash = get_image_hash(element) if getattr(element, "metadata", None) is not None else None
+        digest.update(f"{type(element).__name__}\x1f{element_id}\x1f{image_hash or ''}\x1e".encode("utf-8"))
+        count += 1
+    digest.update(str(count).encode("ascii"))
+    if options:
+        digest.update(repr(sorted(options.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _estimate_bytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        # Python-Strings: grob ein Byte pro Zeichen (ASCII-lastige Ausgaben)
+        return len(value)
+    return len(repr(value))
+
+
+class OutputCache:
+    """
+    LRU-Cache generierter Ausgaben eines Dokuments mit Speicherbudget
+    """
+
+    def __init__(self, max_bytes=OUTPUT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.fingerprint = None
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # (format, options) -> (Wert, Größe)
+
+    def bind(self, fingerprint):
+        """
+        Bindet den Cache an ein Dokument - bei anderem Fingerprint wird alles verworfen
+        """
+        if fingerprint != self.fingerprint:
+            self.clear()
+            self.fingerprint = fingerprint
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def get(self, format_name, options=()):
+        key = (format_name, options)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, format_name, value, options=()):
+        key = (format_name, options)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        size = _estimate_bytes(value)
+        self._entries[key] = (value, size)
+        self.total_bytes += size
+
+        # Verdrängung der ältesten Einträge - der gerade erzeugte bleibt (wird angezeigt)
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+            self.evictions += 1
+
+    def get_or_create(self, fingerprint, format_name, factory, options=()):
+        """
+        Liefert (Wert, aus_cache) - erzeugt den Wert über factory() nur bei Cache-Fehlschlag
+        """
+        self.bind(fingerprint)
+        value = self.get(format_name, options)
+        if value is not None:
+            return value, True
+        value = factory()
+        self.put(format_name, value, options)
+        return value, False
+
+    def outputs(self, fingerprint):
+        """
+        Alle gecachten Formate des Dokuments {format: Wert} (zuletzt erzeugte Option pro Format)
+        """
+        if fingerprint != self.fingerprint:
+            return {}
+        return {format_name: value for (format_name, _), (value, _) in self._entries.items()}
+
+    def stats(self):
+        return {
+            "formats": len(self._entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Export-Pakete (ZIP) direkt auf Disk statt im Speicher
+Die Exporter schreiben jeden Eintrag sofort in eine Datei unter EXPORT_PACKAGE_DIR;
+session_state hält nur den Pfad, der Download liest die Datei erst beim Anzeigen.
+Der Speicherbedarf hängt damit nicht mehr von der Paketgröße ab.
+AssetCollector: Bilder für HTML/Markdown-Exporte einmal als Datei (assets/) statt als Data-URL.
+
+Konfiguration (Umgebungsvariablen):
+- EXPORT_PACKAGE_DIR:       Ablageverzeichnis (Standard: System-Temp/unstructured_packages)
+- EXPORT_PACKAGE_MAX_AGE_H: Pakete älter als X Stunden werden beim nächsten Export gelöscht
+"""
+
+import os
+import time
+import tempfile
+
+EXPORT_PACKAGE_DIR = os.environ.get(
+    "EXPORT_PACKAGE_DIR",
+    os.path.join(tempfile.gettempdir(), "unstructured_packages")
+)
+EXPORT_PACKAGE_MAX_AGE = float(os.environ.get("EXPORT_PACKAGE_MAX_AGE_H", "6")) * 3600
+
+
+def cleanup_packages(max_age=EXPORT_PACKAGE_MAX_AGE, package_dir=EXPORT_PACKAGE_DIR):
+    """
+    Löscht alte Pakete (verwaiste Downloads abgelaufener Sessions)
+
+    Returns:
+        Anzahl gelöschter Dateien
+    """
+    removed = 0
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(package_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def new_package_path(prefix="package_", suffix=".zip", package_dir=EXPORT_PACKAGE_DIR):
+    """
+    Legt eine leere Paketdatei an und liefert ihren Pfad (räumt vorher alte Pakete auf)
+    """
+    os.makedirs(package_dir, exist_ok=True)
+    try:
+        cleanup_packages(package_dir=package_dir)
+    except Exception as e:
+        print(f"⚠️ Aufräumen alter Export-Pakete fehlgeschlagen: {e}")
+    fd, path = tempfile.mkstemp(dir=package_dir, prefix=prefix, suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def remove_package(path):
+    """
+    Löscht ein Paket (z.B. nach Fehler oder wenn der Nutzer es verwirft)
+    """
+    if not path:
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def package_available(path):
+    return bool(path) and os.path.isfile(path)
+
+
+_MIME_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/bmp": "bmp",
+    "image/tiff": "tif",
+    "image/svg+xml": "svg",
+    "image/x-emf": "emf",
+    "image/x-wmf": "wmf",
+}
+
+
+class AssetCollector:
+    """
+    Bilder als externe Dateien statt Data-URLs (HTML/Markdown-Export mit assets/-Ordner)
+
+    Als image_src an die Renderer übergeben: jedes Bild bekommt einen relativen Pfad
+    assets/<Inhalts-Hash>.<ext>, gleiche Bilder (Logos etc.) denselben Pfad.
+    write_to_zip() schreibt danach jedes Bild genau einmal ins Paket - ohne Base64.
+    """
+
+    def __init__(self, folder="assets"):
+        self.folder = folder
+        self.references = 0
+        self._assets = {}  # Inhalts-Hash -> (relativer Pfad, Metadaten, MIME-Typ)
+
+    def __call__(self, metadata):
+        from image_store import get_image_hash
+
+        image_hash = get_image_hash(metadata)
+        if not image_hash:
+            return None
+        self.references += 1
+        asset = self._assets.get(image_hash)
+        if asset is None:
+            mime_type = (getattr(metadata, "image_mime_type", None) or "image/png").lower()
+            extension = _MIME_EXTENSIONS.get(mime_type, "bin")
+            asset = (f"{self.folder}/{image_hash[:16]}.{extension}", metadata, mime_type)
+            self._assets[image_hash] = asset
+        return asset[0]
+
+    def __len__(self):
+        return len(self._assets)
+
+    def write_to_zip(self, zip_file):
+        """
+        Schreibt alle gesammelten Bilder (parallel geladen) in ein offenes ZipFile
+
+        Returns:
+            {"written": Anzahl, "bytes": Summe der Bildgrößen, "errors": [Fehlertexte]}
+        """
+        from image_store import iter_image_bytes, zip_compress_type
+
+        result = {"written": 0, "bytes": 0, "errors": []}
+        items = [
+            {"metadata": metadata, "path": path, "mime_type": mime_type}
+            for path, metadata, mime_type in self._assets.values()
+        ]
+        for item, data, error in iter_image_bytes(items):
+            if data is None:
+                result["errors"].append(f"{item['path']}: {error}")
+                continue
+            zip_file.writestr(item["path"], data, compress_type=zip_compress_type(item["mime_type"]))
+            result["written"] += 1
+            result["bytes"] += len(data)
+        return result
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Seitenbereich-parallele Partitionierung (PDF-Seiten, PPTX-Folien)
+Teilt lange Dokumente in Seitenbereiche, partitioniert diese parallel im Prozess-Pool
+und führt die Ergebnisse in Original-Reihenfolge zusammen:
+- page_number bleibt erhalten (starting_page_number pro Bereich)
+- Element-Reihenfolge = Seitenreihenfolge
+- parent_id-Hierarchie und Element-IDs werden über das Gesamtdokument neu aufgebaut
+
+Konfiguration (Umgebungsvariablen):
+- PDF_PARALLEL_MIN_PAGES:        Ab dieser Seiten-/Folienzahl wird gesplittet
+- PDF_PARALLEL_MIN_CHUNK_PAGES:  Mindestgröße eines Seitenbereichs
+- PDF_PARALLEL_CHUNKS_PER_WORKER: Bereiche pro Worker (Lastausgleich)
+- PDF_PARALLEL_FIRST_CHUNK_PAGES: Größe des ersten Bereichs (erste Elemente früh sichtbar, 0 = gleichmäßig)
+"""
+
+import os
+import math
+import time
+import shutil
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from image_store import has_image
+
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_PARALLEL_MIN_CHUNK_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_CHUNK_PAGES", "4"))
+PDF_PARALLEL_CHUNKS_PER_WORKER = int(os.environ.get("PDF_PARALLEL_CHUNKS_PER_WORKER", "2"))
+PDF_PARALLEL_FIRST_CHUNK_PAGES = int(os.environ.get("PDF_PARALLEL_FIRST_CHUNK_PAGES", "2"))
+
+
+def count_pdf_pages(file_path):
+    """
+    Seitenzahl einer PDF (None wenn pypdf fehlt oder die Datei nicht lesbar ist)
+    """
+    try:
+        from pypdf import PdfReader
+        return len(PdfReader(file_path).pages)
+    except Exception as e:
+        print(f"⚠️ Seitenzahl nicht ermittelbar: {e}")
+        return None
+
+
+def plan_page_ranges(page_count, workers, min_chunk_pages=PDF_PARALLEL_MIN_CHUNK_PAGES,
+                     chunks_per_worker=PDF_PARALLEL_CHUNKS_PER_WORKER, first_chunk_pages=None):
+    """
+    Teilt 1..page_count in gleich große, zusammenhängende Bereiche auf
+    first_chunk_pages: kleinerer erster Bereich - die ersten Elemente liegen vor,
+    ohne dass erst ein ganzer Anteil des Dokuments verarbeitet sein muss
+
+    Returns:
+        Liste von (start_page, end_page) - 1-basiert, inklusive
+    """
+    max_chunks = max(1, workers * chunks_per_worker)
+    chunk_count = max(1, min(max_chunks, math.ceil(page_count / max(1, min_chunk_pages))))
+    chunk_size = math.ceil(page_count / chunk_count)
+    if first_chunk_pages and chunk_size > first_chunk_pages:
+        rest = plan_page_ranges(page_count - first_chunk_pages, workers, min_chunk_pages, chunks_per_worker)
+        return [(1, first_chunk_pages)] + [
+            (start + first_chunk_pages, end + first_chunk_pages) for start, end in rest
+        ]
+    return [
+        (start, min(start + chunk_size - 1, page_count))
+        for start in range(1, page_count + 1, chunk_size)
+    ]
+
+
+def pdf_range_writer(file_path):
+    """
+    Liefert eine Funktion, die einen Seitenbereich als eigene PDF-Datei schreibt
+    (der PdfReader wird nur einmal geöffnet)
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(file_path)
+
+    def write_range(start_page, end_page, out_dir):
+        writer = PdfWriter()
+        for page_index in range(start_page - 1, end_page):
+            writer.add_page(reader.pages[page_index])
+        chunk_path = os.path.join(out_dir, f"pages_{start_page:05d}_{end_page:05d}.pdf")
+        with open(chunk_path, "wb") as f:
+            writer.write(f)
+        return chunk_path
+
+    return write_range
+
+
+def _remove_when_done(temp_dir, futures):
+    """
+    Räumt das Chunk-Verzeichnis auf, sobald kein Job es mehr liest:
+    wartende Jobs werden abgebrochen, laufende erst nach ihrem Ende entfernt
+    """
+    import threading
+
+    running = [future for future in futures if not future.cancel() and not future.done()]
+    if not running:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return
+
+    lock = threading.Lock()
+    remaining = [len(running)]
+
+    def job_finished(_future):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    for future in running:
+        future.add_done_callback(job_finished)
+
+
+def _range_result(future, timeout=None):
+    """
+    Ergebnis eines Bereichs-Jobs - Fehler wie bei run_partition_job als Ergebnis-Dict;
+    abgestürzter Worker: Pool verwerfen, der nächste Job startet einen neuen
+    """
+    from processing_pool import reset_partition_pool
+
+    try:
+        return future.result(timeout=timeout)
+    except BrokenProcessPool as e:
+        reset_partition_pool()
+        return {"status": "error", "stage": "worker", "error": f"Worker-Prozess abgestürzt: {e}"}
+    except Exception as e:
+        return {"status": "error", "stage": "worker", "error": str(e) or type(e).__name__}
+
+
+def _submit_range(pool, pending, chunk_path, strategy, start_page, **job_kwargs):
+    """
+    Reiht einen Seitenbereich ein; bei voller Warteschlange wird zuerst auf die eigenen
+    laufenden Bereiche gewartet, ohne eigene wartet der Bereich inline statt das Dokument abzubrechen
+
+    Returns:
+        (Future, Liste bereits fertiger (start, end, result) aus pending)
+    """
+    from processing_pool import PoolBusyError, InlinePartitionRunner
+
+    finished = []
+    while True:
+        try:
+            return pool.submit(chunk_path, strategy, starting_page_number=start_page, **job_kwargs), finished
+        except PoolBusyError as e:
+            if not pending:
+                print(f"⚠️ Seiten ab {start_page} laufen inline: {e}")
+                return InlinePartitionRunner().submit(chunk_path, strategy, starting_page_number=start_page, **job_kwargs), finished
+            start, end, future = pending.popleft()
+            finished.append((start, end, _range_result(future)))
+        except Exception as e:
+            # z.B. BrokenProcessPool beim Einreihen - Auswertung wie beim Job-Ergebnis
+            failed = Future()
+            failed.set_exception(e)
+            return failed, finished
+
+
+def iter_range_results(pool, strategy, page_ranges, write_range, **kwargs):
+    """
+    Schreibt und reiht die Seitenbereiche nacheinander ein und liefert die Ergebnisse
+    in Seitenreihenfolge, sobald sie vorliegen - der erste Bereich läuft bereits,
+    während die weiteren noch gesplittet werden
+
+    Bricht der Aufrufer ab (Fehler in einem Bereich, Generator geschlossen), werden die
+    übrigen Jobs abgebrochen und die Chunk-Dateien erst nach dem Ende laufender Jobs gelöscht
+
+    Args:
+        page_ranges: (start_page, end_page) oder (start_page, end_page, strategy) -
+            mit eigener Strategie pro Bereich (adaptive Verarbeitung)
+
+    Yields:
+        (start_page, end_page, chunk_result) - chunk_result mit serialisierten Elementen
+    """
+    from collections import deque
+    from processing_pool import PARTITION_JOB_TIMEOUT
+
+    job_kwargs = {k: v for k, v in kwargs.items() if k not in ("parallel_pages", "starting_page_number")}
+    temp_dir = tempfile.mkdtemp(prefix="page_ranges_")
+    pending = deque()
+    try:
+        for page_range in page_ranges:
+            start_page, end_page = page_range[0], page_range[1]
+            range_strategy = page_range[2] if len(page_range) > 2 else strategy
+            chunk_path = write_range(start_page, end_page, temp_dir)
+            future, finished = _submit_range(pool, pending, chunk_path, range_strategy, start_page, **job_kwargs)
+            yield from finished
+            pending.append((start_page, end_page, future))
+            # Bereits fertige Bereiche sofort weiterreichen (Reihenfolge bleibt erhalten)
+            while pending and pending[0][2].done():
+                start, end, done_future = pending.popleft()
+                yield start, end, _range_result(done_future)
+        while pending:
+            start, end, next_future = pending[0]
+            result = _range_result(next_future, timeout=PARTITION_JOB_TIMEOUT)
+            if not next_future.done():
+                # Timeout: Job läuft noch - bleibt in pending, Aufräumen wartet auf ihn
+                yield start, end, result
+                return
+            pending.popleft()
+            yield start, end, result
+    finally:
+        _remove_when_done(temp_dir, [future for _, _, future in pending])
+
+
+def merge_page_range_elements(chunk_elements, file_path):
+    """
+    Führt die Elemente der Seitenbereiche in Original-Reihenfolge zusammen
+
+    Args:
+        chunk_elements: Liste von (start_page, elements) in beliebiger Reihenfolge
+        file_path: Original-Datei (für filename/file_directory-Metadaten)
+
+    Returns:
+        Zusammengeführte Element-Liste wie bei einem einzigen partition_pdf-Aufruf
+    """
+    from unstructured.documents.elements import PageBreak
+
+    filename = os.path.basename(file_path)
+    file_directory = os.path.dirname(file_path)
+
+    merged = []
+    for _, elements in sorted(chunk_elements, key=lambda c: c[0]):
+        # Seitenumbruch zwischen den Bereichen ergänzen (wie im Einzel-Durchlauf)
+        if merged and type(merged[-1]).__name__ != "PageBreak" and elements:
+            merged.append(PageBreak(text=""))
+        merged.extend(elements)
+
+    for element in merged:
+        metadata = getattr(element, "metadata", None)
+        if metadata is None:
+            continue
+        # Chunk-Dateinamen durch Original ersetzen, Chunk-lokale Hierarchie verwerfen
+        metadata.filename = filename
+        metadata.file_directory = file_directory
+        metadata.parent_id = None
+
+    # Hierarchie über Bereichsgrenzen hinweg neu aufbauen (Titel auf S. 10 -> Text auf S. 11)
+    set_element_hierarchy = None
+    try:
+        from unstructured.partition.common.metadata import set_element_hierarchy
+    except ImportError:
+        try:
+            from unstructured.partition.common import set_element_hierarchy
+        except ImportError:
+            pass
+    if set_element_hierarchy is not None:
+        try:
+            merged = set_element_hierarchy(merged)
+        except Exception as e:
+            print(f"⚠️ Hierarchie-Aufbau nach Merge fehlgeschlagen: {e}")
+
+    # Deterministische IDs aus Original-Dateiname + Seite + Position; parent_id wird mit umgemappt
+    try:
+        from unstructured.documents.elements import assign_and_map_hash_ids
+        merged = assign_and_map_hash_ids(merged)
+    except Exception as e:
+        print(f"⚠️ Element-IDs nach Merge nicht neu berechnet: {e}")
+
+    return merged
+
+
+def iter_page_range_partition(file_path, strategy, page_count, write_range, pool, method, page_ranges=None, **kwargs):
+    """
+    Partitioniert Seitenbereiche parallel und liefert Zwischenergebnisse als Events
+    page_ranges=None: gleichmäßige Aufteilung über plan_page_ranges
+
+    Yields:
+        {"event": "batch", "pages": [start, end], "elements": [...], "completed_units", "total_units"}
+        abschließend {"event": "done", "result": {...}} mit zusammengeführter Element-Liste
+    """
+    from unstructured.staging.base import elements_from_dicts
+
+    start_time = time.time()
+    if page_ranges is None:
+        page_ranges = plan_page_ranges(page_count, pool.workers, first_chunk_pages=PDF_PARALLEL_FIRST_CHUNK_PAGES)
+    chunk_elements = []
+    methods = set()
+    completed_units = 0
+
+    for start_page, end_page, chunk_result in iter_range_results(pool, strategy, page_ranges, write_range, **kwargs):
+        if chunk_result.get("status") != "success":
+            yield {"event": "done", "result": {
+                "status": "error",
+                "stage": chunk_result.get("stage", "partition"),
+                "error": f"Seiten {start_page}-{end_page}: {chunk_result.get('error')}",
+                "processing_time": time.time() - start_time,
+                "method": method,
+            }}
+            return
+        methods.add(chunk_result.get("method"))
+        elements = elements_from_dicts(chunk_result["elements"])
+        chunk_elements.append((start_page, elements))
+        completed_units += end_page - start_page + 1
+        yield {
+            "event": "batch",
+            "pages": [start_page, end_page],
+            "elements": elements,
+            "completed_units": completed_units,
+            "total_units": page_count,
+        }
+
+    elements = merge_page_range_elements(chunk_elements, file_path)
+    img_elems = [e for e in elements if type(e).__name__ in ("Image", "Figure", "FigureCaption", "Picture")]
+    yield {"event": "done", "result": {
+        "status": "success",
+        "elements": elements,
+        "processing_time": time.time() - start_time,
+        "element_count": len(elements),
+        "method": method,
+        "chunk_methods": sorted(m for m in methods if m),
+        "page_count": page_count,
+        "page_ranges": [list(r) for r in page_ranges],
+        "image_support": True,
+        "image_elements": len(img_elems),
+        "image_base64": sum(1 for e in img_elems if has_image(e)),
+    }}
+
+
+def plan_range_partition(file_path, file_type=None):
+    """
+    Prüft, ob sich eine seitenbereichsweise Verarbeitung lohnt
+    file_type: am Inhalt erkannter Typ (file_sniffer), sonst wird er hier ermittelt
+
+    Returns:
+        (pool, page_count, write_range, method) oder None
+    """
+    from processing_pool import get_partition_pool
+    from file_sniffer import sniff_file_type
+
+    pool = get_partition_pool()
+    if pool is None:
+        return None
+
+    file_type = file_type or sniff_file_type(file_path)
+    if file_type == 'pdf':
+        page_count = count_pdf_pages(file_path)
+        if not page_count or page_count < PDF_PARALLEL_MIN_PAGES:
+            return None
+        return pool, page_count, pdf_range_writer(file_path), "open_source_pdf_parallel_pages"
+
+    if file_type == 'pptx':
+        from pptx_helpers import pptx_range_writer
+        # Paket-Struktur nur einmal lesen - alle Folienbereiche nutzen sie
+        try:
+            page_count, write_range = pptx_range_writer(file_path)
+        except Exception as e:
+            print(f"⚠️ Slide-Anzahl nicht ermittelbar: {e}")
+            return None
+        if page_count < PDF_PARALLEL_MIN_PAGES:
+            return None
+        return pool, page_count, write_range, "open_source_pptx_parallel_slides"
+
+    return None
+
+
+def partition_ranges_parallel(file_path, strategy="auto", **kwargs):
+    """
+    Partitioniert eine PDF bzw. PPTX seiten-/folienbereichsweise parallel im Prozess-Pool
+    Gleiche Aufteilung wie der Streaming-Pfad (plan_range_partition) - beide teilen den Cache-Schlüssel
+
+    Returns:
+        Ergebnis-Dict wie process_with_open_source_library oder None, wenn sich
+        die Aufteilung nicht lohnt (anderer Typ, zu wenige Seiten, kein Pool, kein pypdf)
+    """
+    plan = plan_range_partition(file_path, kwargs.get("file_type"))
+    if plan is None:
+        return None
+
+    pool, page_count, write_range, method = plan
+    result = None
+    for event in iter_page_range_partition(file_path, strategy, page_count, write_range, pool, method, **kwargs):
+        if event["event"] == "done":
+            result = event["result"]
+    return result
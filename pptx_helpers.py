@@ -4,122 +4,339 @@ PowerPoint-Verbesserungen für app_open_source_recovered.py
 Enthält Hilfsfunktionen für bessere Bild-Extraktion und Layout-Erkennung
 """
 
-def extract_images_from_pptx_manually(pptx_file_path):
+import os
+import re
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+# Placeholder-Typen (PP_PLACEHOLDER) für Fußzeilen-Elemente
+PLACEHOLDER_FOOTER = 4
+PLACEHOLDER_SLIDE_NUMBER = 12
+PLACEHOLDER_DATE = 13
+
+# MSO_SHAPE_TYPE.GROUP
+SHAPE_TYPE_GROUP = 6
+
+
+def _empty_headers_footers():
+    return {
+        "has_footer": False,
+        "has_slide_numbers": False,
+        "has_date": False,
+        "slides": []
+    }
+
+
+def _picture_info(shape, slide_num, grouped=False):
     """
-    Extrahiert Bilder direkt aus PPTX-Datei als Fallback
-    Nutzt python-pptx direkt für maximale Bild-Erfassung
+    Bild-Dictionary eines Picture-Shapes (wie extract_images_from_pptx_manually)
+    """
+    import base64
+
+    image = shape.image
+    if grouped:
+        picture_type = "Picture (Grouped)"
+        alt_text = shape.name or f"Gruppiertes Bild auf Slide {slide_num}"
+    else:
+        picture_type = "Picture"
+        alt_text = shape.name or f"Bild auf Slide {slide_num}"
+    return {
+        "slide": slide_num,
+        "type": picture_type,
+        "base64": base64.b64encode(image.blob).decode('utf-8'),
+        "mime_type": image.content_type,
+        "alt_text": alt_text,
+        "width": shape.width if hasattr(shape, 'width') else None,
+        "height": shape.height if hasattr(shape, 'height') else None
+    }
+
+
+def scan_pptx_package(pptx_file_path, include_images=True):
+    """
+    ✅ NEU: Liest die PPTX genau EINMAL und sammelt in einem Durchlauf über alle Slides/Shapes:
+    Bilder, Layout-Info (Layout-Name, Titel-/Tabellen-/Bild-Flags), Footer/Datum/Seitenzahl und Notes
+
+    Ersetzt drei getrennte Presentation()-Ladevorgänge (Bilder, Layout, Header/Footer) -
+    große Decks werden nur einmal geparst.
+
+    Args:
+        pptx_file_path: Pfad zur PPTX
+        include_images: False = Bilder nicht kodieren (nur Layout + Header/Footer)
 
     Returns:
-        Liste von Dictionaries mit Bild-Daten
+        {"slide_count", "images", "layout_info", "headers_footers", "error"} - die Teilstrukturen
+        entsprechen den Rückgaben der einzelnen extract_*-Funktionen, error ist None bei Erfolg
     """
+    scan = {
+        "slide_count": 0,
+        "images": [],
+        "layout_info": [],
+        "headers_footers": _empty_headers_footers(),
+        "error": None
+    }
     try:
         from pptx import Presentation
-        import base64
 
-        images = []
         prs = Presentation(pptx_file_path)
+    except Exception as e:
+        scan["error"] = str(e)
+        return scan
+
+    images = scan["images"]
+    headers_footers = scan["headers_footers"]
+
+    for slide_num, slide in enumerate(prs.slides, start=1):
+        scan["slide_count"] = slide_num
+        slide_info = {
+            "slide": slide_num,
+            "layout_name": None,
+            "shape_count": 0,
+            "has_title": False,
+            "has_images": False,
+            "has_tables": False,
+            "title_text": None
+        }
+        slide_hf = {
+            "slide": slide_num,
+            "footer_text": None,
+            "slide_number": None,
+            "date_text": None,
+            "notes": None
+        }
+
+        try:
+            slide_info["layout_name"] = slide.slide_layout.name
+        except Exception as e:
+            print(f"⚠️ Layout von Slide {slide_num} nicht lesbar: {e}")
+
+        # Slide Notes (oft für Fußnoten genutzt)
+        if slide.has_notes_slide:
+            try:
+                notes_text_frame = slide.notes_slide.notes_text_frame
+                if notes_text_frame:
+                    notes_text = notes_text_frame.text.strip()
+                    if notes_text:
+                        slide_hf["notes"] = notes_text
+            except Exception:
+                pass
+
+        # Ein einziger Durchlauf über alle Shapes der Slide
+        for shape in slide.shapes:
+            slide_info["shape_count"] += 1
+            try:
+                # Titel: Text im oberen Bereich
+                if shape.has_text_frame and shape.text.strip():
+                    if hasattr(shape, 'top') and shape.top is not None and shape.top < 1000000:
+                        slide_info["has_title"] = True
+                        slide_info["title_text"] = shape.text.strip()[:100]
+
+                # Tabellen
+                if getattr(shape, 'has_table', False):
+                    slide_info["has_tables"] = True
+
+                # Footer / Seitenzahl / Datum (Platzhalter)
+                if shape.is_placeholder and shape.has_text_frame:
+                    ph_type = shape.placeholder_format.type
+                    if ph_type == PLACEHOLDER_FOOTER:
+                        footer_text = shape.text.strip()
+                        if footer_text:
+                            slide_hf["footer_text"] = footer_text
+                            headers_footers["has_footer"] = True
+                    elif ph_type == PLACEHOLDER_SLIDE_NUMBER:
+                        slide_hf["slide_number"] = shape.text.strip()
+                        headers_footers["has_slide_numbers"] = True
+                    elif ph_type == PLACEHOLDER_DATE:
+                        slide_hf["date_text"] = shape.text.strip()
+                        headers_footers["has_date"] = True
+            except Exception as e:
+                print(f"⚠️ Shape auf Slide {slide_num} nicht lesbar: {e}")
 
-        for slide_num, slide in enumerate(prs.slides, start=1):
-            for shape in slide.shapes:
-                # Normale Bilder (Pictures)
-                if hasattr(shape, "image"):
+            # Bilder (direkt und eine Ebene in Gruppen)
+            if hasattr(shape, "image"):
+                slide_info["has_images"] = True
+                if include_images:
                     try:
-                        image_blob = shape.image.blob
-                        image_base64 = base64.b64encode(image_blob).decode('utf-8')
-                        mime_type = shape.image.content_type
-
-                        images.append({
-                            "slide": slide_num,
-                            "type": "Picture",
-                            "base64": image_base64,
-                            "mime_type": mime_type,
-                            "alt_text": shape.name or f"Bild auf Slide {slide_num}",
-                            "width": shape.width if hasattr(shape, 'width') else None,
-                            "height": shape.height if hasattr(shape, 'height') else None
-                        })
+                        images.append(_picture_info(shape, slide_num))
                     except Exception as e:
                         print(f"⚠️ Bild auf Slide {slide_num} konnte nicht extrahiert werden: {e}")
+            elif include_images and shape.shape_type == SHAPE_TYPE_GROUP:
+                try:
+                    for sub_shape in shape.shapes:
+                        if hasattr(sub_shape, "image"):
+                            try:
+                                images.append(_picture_info(sub_shape, slide_num, grouped=True))
+                            except Exception:
+                                pass
+                except Exception:
+                    pass
 
-                # Bilder in Gruppen
-                elif shape.shape_type == 6:  # MSO_SHAPE_TYPE.GROUP
-                    try:
-                        for sub_shape in shape.shapes:
-                            if hasattr(sub_shape, "image"):
-                                try:
-                                    image_blob = sub_shape.image.blob
-                                    image_base64 = base64.b64encode(image_blob).decode('utf-8')
-                                    mime_type = sub_shape.image.content_type
-
-                                    images.append({
-                                        "slide": slide_num,
-                                        "type": "Picture (Grouped)",
-                                        "base64": image_base64,
-                                        "mime_type": mime_type,
-                                        "alt_text": sub_shape.name or f"Gruppiertes Bild auf Slide {slide_num}",
-                                        "width": sub_shape.width if hasattr(sub_shape, 'width') else None,
-                                        "height": sub_shape.height if hasattr(sub_shape, 'height') else None
-                                    })
-                                except Exception:
-                                    pass
-                    except Exception:
-                        pass
-
-        print(f"📸 Manuelle Extraktion: {len(images)} Bilder gefunden")
-        return images
-    except Exception as e:
-        print(f"❌ Manuelle Bild-Extraktion fehlgeschlagen: {e}")
-        return []
+        scan["layout_info"].append(slide_info)
+        headers_footers["slides"].append(slide_hf)
+
+    return scan
 
 
-def extract_layout_info_from_pptx(pptx_file_path):
+def _iter_picture_refs(shapes, group_path=()):
     """
-    Extrahiert Layout-Information aus PPTX für bessere Darstellung
+    Alle Bild-Shapes inkl. beliebig tief verschachtelter Gruppen
+
+    Yields:
+        (shape, rId des Bild-Parts, Gruppen-Pfad als Tuple von Gruppen-Namen)
+    """
+    for shape in shapes:
+        try:
+            if shape.shape_type == SHAPE_TYPE_GROUP:
+                yield from _iter_picture_refs(shape.shapes, group_path + (shape.name,))
+                continue
+            rId = getattr(shape._element, "blip_rId", None)
+        except Exception:
+            continue
+        if rId:
+            yield shape, rId, group_path
+
+
+def _scan_slide_media(slide_num, slide):
+    """
+    Bild-Referenzen einer Slide: (partname, Referenz-Dict, Part)
+    """
+    refs = []
+    for shape, rId, group_path in _iter_picture_refs(slide.shapes):
+        try:
+            image_part = slide.part.related_part(rId)
+        except Exception as e:
+            print(f"⚠️ Bild-Part {rId} auf Slide {slide_num} nicht auflösbar: {e}")
+            continue
+        refs.append((str(image_part.partname), {
+            "slide": slide_num,
+            "shape_id": shape.shape_id,
+            "shape_name": shape.name,
+            "group_path": list(group_path),
+            "width": getattr(shape, "width", None),
+            "height": getattr(shape, "height", None)
+        }, image_part))
+    return refs
+
+
+def extract_pptx_media(pptx_file_path):
+    """
+    ✅ NEU: Bild-Extraktion auf Ebene der Media-Parts (ppt/media/*)
+    Bibliotheks-Funktion (extract_images_from_pptx_manually(mode="media")) - die App extrahiert
+    PPTX-Bilder beim Partitionieren über den Picture Partitioner.
+
+    - Jeder Media-Part wird genau einmal gelesen und abgelegt (Bild-Speicher bzw. einmal Base64),
+      egal wie viele Shapes ihn verwenden
+    - Jeder Part wird auf alle referenzierenden Slides/Shapes abgebildet - auch in beliebig
+      tief verschachtelten Gruppen
+    - Slides werden nacheinander durchsucht (python-pptx-XML-Zugriff, Threads brächten wegen
+      des GIL nichts); nur von Slides referenzierte Parts werden abgelegt (keine Master-/Layout-Grafiken)
 
     Returns:
-        Liste von Dictionaries mit Layout-Info pro Slide
+        Liste von Dicts {"partname", "mime_type", "size_bytes", "blob_id", "base64", "references"}
+        in Reihenfolge der ersten Verwendung
     """
-    try:
-        from pptx import Presentation
+    from pptx import Presentation
+    from image_store import store_image_part
+    import base64
+
+    prs = Presentation(pptx_file_path)
+
+    media = {}
+    parts = {}
+    for slide_num, slide in enumerate(prs.slides, start=1):
+        for partname, reference, image_part in _scan_slide_media(slide_num, slide):
+            if partname not in media:
+                media[partname] = {"partname": partname, "references": []}
+                parts[partname] = image_part
+            media[partname]["references"].append(reference)
+
+    # Jeder Part genau einmal lesen/ablegen
+    for partname, entry in media.items():
+        image_part = parts[partname]
+        entry["mime_type"] = image_part.content_type
+        entry["size_bytes"] = len(image_part.blob)
+        entry["blob_id"] = None
+        entry["base64"] = None
+        try:
+            entry["blob_id"] = store_image_part(image_part)
+            if entry["blob_id"] is None:
+                # Bild-Speicher deaktiviert: einmal Base64 pro Part
+                entry["base64"] = base64.b64encode(image_part.blob).decode('utf-8')
+        except Exception as e:
+            print(f"⚠️ Media-Part {partname} konnte nicht abgelegt werden: {e}")
+
+    return list(media.values())
+
+
+def extract_images_from_pptx_manually(pptx_file_path, mode="shapes", scan=None):
+    """
+    Extrahiert Bilder direkt aus PPTX-Datei als Fallback
+    Nutzt python-pptx direkt für maximale Bild-Erfassung
+    (Werden auch Layout/Footer gebraucht: einmal scan_pptx_package und das Ergebnis als scan übergeben)
 
-        layout_info = []
-        prs = Presentation(pptx_file_path)
+    Args:
+        scan: Optional - Ergebnis von scan_pptx_package (Modus "shapes"), sonst wird die Datei gelesen
+        mode: "shapes" (pro Shape, Gruppen eine Ebene tief) oder
+              "media" (✅ NEU: extract_pptx_media - pro Media-Part einmal dekodiert, rekursiv)
 
-        for slide_num, slide in enumerate(prs.slides, start=1):
-            slide_info = {
-                "slide": slide_num,
-                "layout_name": slide.slide_layout.name,
-                "shape_count": len(slide.shapes),
-                "has_title": False,
-                "has_images": False,
-                "has_tables": False,
-                "title_text": None
-            }
-
-            for shape in slide.shapes:
-                # Titel erkennen
-                if shape.has_text_frame and shape.text.strip():
-                    if hasattr(shape, 'top') and shape.top < 1000000:  # Oberer Bereich
-                        slide_info["has_title"] = True
-                        slide_info["title_text"] = shape.text.strip()[:100]
+    Returns:
+        Liste von Dictionaries mit Bild-Daten (im Modus "media" zusätzlich
+        "partname", "blob_id" und "group_path"; "base64" ist None, wenn der Bild-Speicher aktiv ist)
+    """
+    if mode == "media":
+        try:
+            media = extract_pptx_media(pptx_file_path)
+        except Exception as e:
+            print(f"❌ Manuelle Bild-Extraktion fehlgeschlagen: {e}")
+            return []
+        images = []
+        for entry in media:
+            for reference in entry["references"]:
+                images.append({
+                    "slide": reference["slide"],
+                    "type": "Picture (Grouped)" if reference["group_path"] else "Picture",
+                    "base64": entry["base64"],
+                    "blob_id": entry["blob_id"],
+                    "partname": entry["partname"],
+                    "mime_type": entry["mime_type"],
+                    "alt_text": reference["shape_name"] or f"Bild auf Slide {reference['slide']}",
+                    "width": reference["width"],
+                    "height": reference["height"],
+                    "group_path": reference["group_path"]
+                })
+        images.sort(key=lambda image: image["slide"])
+        print(f"📸 Manuelle Extraktion: {len(images)} Bilder aus {len(media)} Media-Parts")
+        return images
 
-                # Tabellen
-                if hasattr(shape, 'has_table') and shape.has_table:
-                    slide_info["has_tables"] = True
+    if scan is None:
+        scan = scan_pptx_package(pptx_file_path)
+    if scan["error"]:
+        print(f"❌ Manuelle Bild-Extraktion fehlgeschlagen: {scan['error']}")
+        return []
+    print(f"📸 Manuelle Extraktion: {len(scan['images'])} Bilder gefunden")
+    return scan["images"]
 
-                # Bilder
-                if hasattr(shape, 'image'):
-                    slide_info["has_images"] = True
 
-            layout_info.append(slide_info)
+def extract_layout_info_from_pptx(pptx_file_path, scan=None):
+    """
+    Extrahiert Layout-Information aus PPTX für bessere Darstellung
 
-        print(f"📐 Layout-Info extrahiert für {len(layout_info)} Slides")
-        return layout_info
-    except Exception as e:
-        print(f"⚠️ Layout-Extraktion fehlgeschlagen: {e}")
+    Args:
+        scan: Optional - Ergebnis von scan_pptx_package (kein erneutes Lesen der Datei)
+
+    Returns:
+        Liste von Dictionaries mit Layout-Info pro Slide
+    """
+    if scan is None:
+        scan = scan_pptx_package(pptx_file_path, include_images=False)
+    if scan["error"]:
+        print(f"⚠️ Layout-Extraktion fehlgeschlagen: {scan['error']}")
         return []
+    print(f"📐 Layout-Info extrahiert für {len(scan['layout_info'])} Slides")
+    return scan["layout_info"]
 
 
-def extract_headers_footers_from_pptx(pptx_file_path):
+def extract_headers_footers_from_pptx(pptx_file_path, scan=None):
     """
     Extrahiert Header, Footer und Fußnoten aus PPTX
 
@@ -129,100 +346,190 @@ def extract_headers_footers_from_pptx(pptx_file_path):
     - Slide Number (Seitenzahl)
     - Date (Datum)
 
+    Args:
+        scan: Optional - Ergebnis von scan_pptx_package (kein erneutes Lesen der Datei)
+
     Returns:
         Dictionary mit Header/Footer-Informationen
     """
-    try:
-        from pptx import Presentation
+    if scan is None:
+        scan = scan_pptx_package(pptx_file_path, include_images=False)
+    if scan["error"]:
+        print(f"❌ Header/Footer-Extraktion fehlgeschlagen: {scan['error']}")
+        return _empty_headers_footers()
 
-        headers_footers = {
-            "has_footer": False,
-            "has_slide_numbers": False,
-            "has_date": False,
-            "slides": []
-        }
+    headers_footers = scan["headers_footers"]
+    footer_count = sum(1 for s in headers_footers["slides"] if s["footer_text"])
+    notes_count = sum(1 for s in headers_footers["slides"] if s["notes"])
 
-        prs = Presentation(pptx_file_path)
+    print(f"📝 Header/Footer extrahiert:")
+    print(f"   - Footer auf {footer_count} Slides")
+    print(f"   - Notes auf {notes_count} Slides")
 
-        for slide_num, slide in enumerate(prs.slides, start=1):
-            slide_hf = {
-                "slide": slide_num,
-                "footer_text": None,
-                "slide_number": None,
-                "date_text": None,
-                "notes": None
-            }
-
-            # Slide Notes extrahieren (oft für Fußnoten genutzt)
-            if slide.has_notes_slide:
-                try:
-                    notes_slide = slide.notes_slide
-                    if notes_slide.notes_text_frame:
-                        notes_text = notes_slide.notes_text_frame.text.strip()
-                        if notes_text:
-                            slide_hf["notes"] = notes_text
-                except Exception:
-                    pass
+    return headers_footers
 
-            # Footer/Header aus Slide Properties
-            # PowerPoint speichert Header/Footer in HeadersFooters-Objekt
-            try:
-                # Zugriff auf Slide-Element (XML-Ebene)
-                slide_part = slide.part
-
-                # Footer-Platzhalter suchen
-                for shape in slide.shapes:
-                    # Footer ist oft in Placeholder mit bestimmtem Type
-                    if hasattr(shape, 'placeholder_format'):
-                        ph_type = shape.placeholder_format.type
-                        # 4 = FOOTER, 12 = SLIDE_NUMBER, 13 = DATE
-                        if ph_type == 4 and shape.has_text_frame:  # Footer
-                            footer_text = shape.text.strip()
-                            if footer_text:
-                                slide_hf["footer_text"] = footer_text
-                                headers_footers["has_footer"] = True
-                        elif ph_type == 12 and shape.has_text_frame:  # Slide Number
-                            slide_hf["slide_number"] = shape.text.strip()
-                            headers_footers["has_slide_numbers"] = True
-                        elif ph_type == 13 and shape.has_text_frame:  # Date
-                            slide_hf["date_text"] = shape.text.strip()
-                            headers_footers["has_date"] = True
-            except Exception as e:
-                print(f"⚠️ Footer-Extraktion für Slide {slide_num} fehlgeschlagen: {e}")
 
-            headers_footers["slides"].append(slide_hf)
+# OPC-Namespaces für das Lesen der Paket-Struktur (ohne python-pptx)
+_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_P_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+
 
-        # Zusammenfassung
-        footer_count = sum(1 for s in headers_footers["slides"] if s["footer_text"])
-        notes_count = sum(1 for s in headers_footers["slides"] if s["notes"])
+def _rels_path(part_name):
+    directory, base = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", base + ".rels")
 
-        print(f"📝 Header/Footer extrahiert:")
-        print(f"   - Footer auf {footer_count} Slides")
-        print(f"   - Notes auf {notes_count} Slides")
 
-        return headers_footers
+def _read_package(pptx_file_path):
+    """
+    Liest nur die Paket-Struktur einer PPTX (Beziehungen aller erreichbaren Parts + Folienliste)
+
+    Returns:
+        (rels, presentation_part, slide_rids) - rels: {Part: {rId: Ziel-Part}} (interne Ziele)
+    """
+    rels = {}
+    presentation_part = None
+    with zipfile.ZipFile(pptx_file_path) as archive:
+        names = set(archive.namelist())
+        stack = [""]  # "" = Paket selbst (_rels/.rels)
+        while stack:
+            part_name = stack.pop()
+            if part_name in rels:
+                continue
+            rels[part_name] = {}
+            rels_path = _rels_path(part_name)
+            if rels_path not in names:
+                continue
+            for rel in ElementTree.fromstring(archive.read(rels_path)).iter(_REL_NS + "Relationship"):
+                if rel.get("TargetMode") == "External":
+                    continue
+                target = rel.get("Target")
+                if target.startswith("/"):
+                    target = target.lstrip("/")
+                else:
+                    target = posixpath.normpath(posixpath.join(posixpath.dirname(part_name), target))
+                rels[part_name][rel.get("Id")] = target
+                if not part_name and rel.get("Type", "").endswith("/officeDocument"):
+                    presentation_part = target
+                if target in names:
+                    stack.append(target)
+
+        if presentation_part is None:
+            raise ValueError("Kein Präsentations-Part (officeDocument) im Paket")
+        presentation = ElementTree.fromstring(archive.read(presentation_part))
+    slide_rids = [slide_id.get(_R_NS + "id") for slide_id in presentation.iter(_P_NS + "sldId")]
+    return rels, presentation_part, slide_rids
+
+
+def _remove_xml_elements(xml, tag, attribute, values):
+    """
+    Entfernt Elemente <tag attribute="wert"> mit wert in values aus rohem XML
+    (Bytes bleiben sonst unverändert - Namespace-Präfixe, mc:Ignorable usw. bleiben erhalten)
+    """
+    element = re.compile(rb"<(?:\w+:)?" + tag + rb"\b[^>]*?(?:/>|>.*?</(?:\w+:)?" + tag + rb">)", re.DOTALL)
+    value_of = re.compile(rb"\s" + attribute + rb'="([^"]*)"')
+
+    def replace(match):
+        value = value_of.search(match.group(0))
+        return b"" if value and value.group(1).decode("utf-8") in values else match.group(0)
+
+    return element.sub(replace, xml)
+
+
+def count_pptx_slides(pptx_file_path):
+    """
+    Anzahl Slides einer PPTX (None wenn nicht lesbar) - liest nur die Paket-Struktur
+    """
+    try:
+        return len(_read_package(pptx_file_path)[2])
     except Exception as e:
-        print(f"❌ Header/Footer-Extraktion fehlgeschlagen: {e}")
-        return {
-            "has_footer": False,
-            "has_slide_numbers": False,
-            "has_date": False,
-            "slides": []
-        }
+        print(f"⚠️ Slide-Anzahl nicht ermittelbar: {e}")
+        return None
+
 
+def pptx_range_writer(pptx_file_path):
+    """
+    Liefert (Slide-Anzahl, Funktion, die einen Folienbereich als eigene PPTX schreibt)
+    Die Paket-Struktur wird nur einmal gelesen; jeder Bereich wird direkt auf ZIP-Ebene
+    geschrieben (Folienliste + Beziehungen gekürzt, nur noch erreichbare Parts kopiert) -
+    kein python-pptx-Parse der ganzen Präsentation pro Bereich
+    """
+    rels, presentation_part, slide_rids = _read_package(pptx_file_path)
+    presentation_rels = _rels_path(presentation_part)
+
+    def write_range(start_slide, end_slide, out_dir):
+        dropped = set(slide_rids[:start_slide - 1] + slide_rids[end_slide:])
+
+        # Erreichbare Parts ohne die Beziehungen zu den weggelassenen Slides
+        reachable = set()
+        stack = [""]
+        while stack:
+            part_name = stack.pop()
+            if part_name in reachable:
+                continue
+            reachable.add(part_name)
+            for r_id, target in rels.get(part_name, {}).items():
+                if not (part_name == presentation_part and r_id in dropped):
+                    stack.append(target)
+        keep = {name for name in reachable if name} | {_rels_path(name) for name in reachable}
+
+        chunk_path = os.path.join(out_dir, f"slides_{start_slide:05d}_{end_slide:05d}.pptx")
+        with zipfile.ZipFile(pptx_file_path) as source, \
+                zipfile.ZipFile(chunk_path, "w", zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                name = info.filename
+                if name == "[Content_Types].xml":
+                    data = source.read(name)
+                    part_names = {name.decode("utf-8") for name in re.findall(rb'PartName="([^"]*)"', data)}
+                    dropped_parts = {name for name in part_names if name.lstrip("/") not in reachable}
+                    data = _remove_xml_elements(data, b"Override", b"PartName", dropped_parts)
+                elif name not in keep:
+                    continue
+                elif name == presentation_part:
+                    data = _remove_xml_elements(source.read(name), b"sldId", rb"\w+:id", dropped)
+                elif name == presentation_rels:
+                    data = _remove_xml_elements(source.read(name), b"Relationship", b"Id", dropped)
+                else:
+                    data = source.read(name)
+                target.writestr(info, data, compress_type=info.compress_type)
+        return chunk_path
+
+    return len(slide_rids), write_range
+
+
+def write_pptx_slide_range(pptx_file_path, start_slide, end_slide, out_dir):
+    """
+    Schreibt die Slides start_slide..end_slide (1-basiert, inklusive) als eigene PPTX
+    Für mehrere Bereiche derselben Datei pptx_range_writer verwenden (Struktur nur einmal lesen)
 
-def elements_to_html_powerpoint_optimized(elements, layout_info=None, headers_footers=None):
+    Returns:
+        Pfad der geschriebenen Teil-Präsentation
+    """
+    return pptx_range_writer(pptx_file_path)[1](start_slide, end_slide, out_dir)
+
+
+def elements_to_html_powerpoint_optimized(elements, layout_info=None, headers_footers=None, image_src=None, scan=None):
     """
     Generiert HTML speziell für PowerPoint mit Slide-Struktur
 
     Args:
         elements: Liste von Unstructured-Elementen
-        layout_info: Optional - Layout-Info von extract_layout_info_from_pptx
-        headers_footers: Optional - Header/Footer-Info von extract_headers_footers_from_pptx
+        layout_info: Optional - Layout-Info von extract_layout_info_from_pptx (bzw. scan_pptx_package)
+        headers_footers: Optional - Header/Footer-Info von extract_headers_footers_from_pptx (bzw. scan_pptx_package)
+        image_src: ✅ NEU: Optional - f(metadata) -> relativer Bildpfad (z.B. package_writer.AssetCollector);
+                   ohne wird jedes Bild als Data-URL eingebettet
+        scan: ✅ NEU: Optional - Ergebnis von scan_pptx_package; liefert layout_info und
+              headers_footers aus demselben Durchlauf, wenn diese nicht übergeben werden
 
     Returns:
         HTML-String mit Slide-basierter Darstellung
     """
+    from image_store import get_image_base64
+
+    if scan is not None and not scan.get("error"):
+        layout_info = layout_info if layout_info is not None else scan["layout_info"]
+        headers_footers = headers_footers if headers_footers is not None else scan["headers_footers"]
+
     html_parts = []
 
     # CSS für Slide-Layout
@@ -426,11 +733,19 @@ def elements_to_html_powerpoint_optimized(elements, layout_info=None, headers_fo
 
             # Bild
             elif element_type in ["Image", "Figure", "Picture", "FigureCaption"]:
-                if hasattr(element, 'metadata') and hasattr(element.metadata, 'image_base64') and element.metadata.image_base64:
+                if not hasattr(element, 'metadata'):
+                    src = None
+                elif image_src is not None:
+                    # ✅ NEU: Externe Referenz (assets/...) statt Data-URL
+                    src = image_src(element.metadata)
+                else:
+                    image_base64 = get_image_base64(element.metadata)
                     mime_type = getattr(element.metadata, 'image_mime_type', 'image/png')
+                    src = f"data:{mime_type};base64,{image_base64}" if image_base64 else None
+                if src:
                     html_parts.append(f'''
                     <div class="slide-image">
-                        <img src="data:{mime_type};base64,{element.metadata.image_base64}"
+                        <img src="{src}"
                              alt="{element.text}"
                              class="pptx-image"/>
                         <p class="image-caption">{element.text}</p>
@@ -478,6 +793,9 @@ def elements_to_html_powerpoint_optimized(elements, layout_info=None, headers_fo
 # Verwendung:
 # Importiere diese Funktionen in app_open_source_recovered.py:
 # from pptx_helpers import (
+#     scan_pptx_package,  # Bilder + Layout + Header/Footer in einem Durchlauf
+#                         # (Ergebnis als scan=... an die extract_*-Funktionen bzw.
+#                         #  elements_to_html_powerpoint_optimized übergeben - Datei nur einmal lesen)
 #     extract_images_from_pptx_manually,
 #     extract_layout_info_from_pptx,
 #     extract_headers_footers_from_pptx,
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Prozess-Pool für Partitionierungs-Jobs
+Entlastet den Streamlit-Script-Thread: partition_pdf/partition_pptx/partition laufen
+in vorgewärmten Worker-Prozessen (Modelle bereits geladen), Ergebnisse kommen als
+serialisierte Element-Dicts zurück.
+
+Konfiguration (Umgebungsvariablen):
+- PARTITION_WORKERS:        Anzahl Worker-Prozesse (0 = inline, kein Pool)
+- PARTITION_QUEUE_DEPTH:    Max. wartende Jobs zusätzlich zu den laufenden
+- PARTITION_QUEUE_TIMEOUT:  Sekunden, die ein Submit auf einen freien Platz wartet
+- PARTITION_JOB_TIMEOUT:    Max. Laufzeit eines Jobs in Sekunden
+- PARTITION_WORKER_PRELOAD: Modell-Warm-up beim Worker-Start (1/0, siehe warmup.py)
+- PARTITION_WARMUP_TIMEOUT: Max. Sekunden, die warm_up() auf alle Worker wartet
+"""
+
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+APP_DIR = str(Path(__file__).resolve().parent)
+
+PARTITION_WORKERS = int(os.environ.get("PARTITION_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+PARTITION_QUEUE_DEPTH = int(os.environ.get("PARTITION_QUEUE_DEPTH", "8"))
+PARTITION_QUEUE_TIMEOUT = float(os.environ.get("PARTITION_QUEUE_TIMEOUT", "60"))
+PARTITION_JOB_TIMEOUT = float(os.environ.get("PARTITION_JOB_TIMEOUT", "1800"))
+PARTITION_WORKER_PRELOAD = os.environ.get("PARTITION_WORKER_PRELOAD", "1").lower() not in ("0", "false", "no")
+PARTITION_WARMUP_TIMEOUT = float(os.environ.get("PARTITION_WARMUP_TIMEOUT", "900"))
+
+# Warm-up-Status dieses Worker-Prozesses (vom Initializer gesetzt, von _worker_ready gemeldet)
+_WORKER_WARMUP_STATUS = "skipped"
+
+
+class PoolBusyError(RuntimeError):
+    """Warteschlange voll - kein freier Platz innerhalb des Timeouts"""
+
+
+def _preload_models():
+    """
+    Lädt und testet die hi_res-Modelle (YOLOX Layout, Table Transformer, Tesseract)
+    einmal pro Worker - gleicher Warm-up wie beim Container-Start (warmup.py)
+    """
+    from warmup import run_warmup
+
+    report = run_warmup(exercise=True)
+    if report["status"] != "ready":
+        print(f"⚠️ Worker-Warm-up unvollständig (PID {os.getpid()}): {report['steps']}")
+    return report["status"]
+
+
+def _worker_ready():
+    """
+    Leerer Job - erzwingt den Start eines Workers; läuft erst nach dessen Initializer (Warm-up)
+
+    Returns:
+        (PID, Warm-up-Status des Workers)
+    """
+    return os.getpid(), _WORKER_WARMUP_STATUS
+
+
+def _init_worker(app_dir, preload_models):
+    """
+    Initializer jedes Worker-Prozesses: App-Modul (inkl. unstructured) importieren
+    und optional die Modelle vorladen, damit der erste Job nicht den Kaltstart zahlt
+    """
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    global _WORKER_WARMUP_STATUS
+    import app_open_source_recovered  # noqa: F401 - lädt unstructured Partitioner
+    if preload_models:
+        _WORKER_WARMUP_STATUS = _preload_models()
+    print(f"✅ Partition-Worker bereit (PID {os.getpid()})")
+
+
+def _run_partition_job(file_path, strategy, kwargs):
+    """
+    Läuft IM Worker: partitioniert die Datei und serialisiert die Elemente
+    """
+    import app_open_source_recovered as app
+
+    result = app._process_uncached(file_path, strategy, **kwargs)
+    if result.get("status") == "success":
+        result["elements"] = app.elements_to_dicts(result["elements"])
+    result["worker_pid"] = os.getpid()
+    return result
+
+
+class PartitionPool:
+    """
+    Begrenzter Pool aus Worker-Prozessen mit fester Warteschlangen-Tiefe
+
+    - max. workers Jobs laufen parallel, max. queue_depth weitere warten
+    - submit() blockiert höchstens queue_timeout Sekunden, danach PoolBusyError
+    - 'spawn' statt 'fork': Streamlit-Threads werden nicht in die Worker kopiert
+    """
+
+    def __init__(self, workers=PARTITION_WORKERS, queue_depth=PARTITION_QUEUE_DEPTH,
+                 queue_timeout=PARTITION_QUEUE_TIMEOUT, preload_models=PARTITION_WORKER_PRELOAD):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_depth)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._workers_started = False
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(APP_DIR, preload_models),
+        )
+
+    def submit(self, file_path, strategy="auto", **kwargs):
+        """
+        Reiht einen Job ein und gibt ein Future zurück (Ergebnis mit Element-Dicts)
+        """
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PoolBusyError(
+                f"Partition-Warteschlange voll ({self.workers} Worker, {self.queue_depth} wartend)"
+            )
+        try:
+            future = self._executor.submit(_run_partition_job, file_path, strategy, kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_flight += 1
+        future.add_done_callback(self._job_done)
+        return future
+
+    def run(self, file_path, strategy="auto", timeout=PARTITION_JOB_TIMEOUT, **kwargs):
+        """
+        Führt einen Job synchron aus und deserialisiert die Elemente
+        """
+        from element_store import load_element_dicts
+
+        result = self.submit(file_path, strategy, **kwargs).result(timeout=timeout)
+        if result.get("status") == "success":
+            # Große Ergebnisse blockweise in den Element-Speicher (Auslagerung beim Laden)
+            result["elements"] = load_element_dicts(result["elements"])
+        return result
+
+    def start_workers(self):
+        """
+        Startet alle Worker sofort statt beim ersten Job (einmalig, blockiert nicht)
+        """
+        with self._lock:
+            if self._workers_started:
+                return
+            self._workers_started = True
+        # Ohne freie Worker startet jeder Submit einen neuen Prozess bis max_workers
+        for _ in range(self.workers):
+            self._executor.submit(_worker_ready)
+
+    def warm_up(self, timeout=PARTITION_WARMUP_TIMEOUT):
+        """
+        Startet alle Worker und wartet, bis JEDER seinen Warm-up gemeldet hat
+        (ein Worker nimmt erst nach seinem Initializer Jobs an - jede gemeldete PID ist warm)
+
+        Returns:
+            {"status": "ready"|"degraded"|"timeout"|"error", "workers": {pid: Status}, "duration"}
+        """
+        with self._lock:
+            self._workers_started = True
+        start_time = time.time()
+        workers = {}
+        status = None
+        while len(workers) < self.workers:
+            remaining = timeout - (time.time() - start_time)
+            if remaining <= 0:
+                status = "timeout"
+                break
+            # Ein Bereitschafts-Job pro fehlendem Worker; bereits warme Worker antworten sofort
+            futures = [self._executor.submit(_worker_ready) for _ in range(self.workers - len(workers))]
+            try:
+                for future in futures:
+                    pid, worker_status = future.result(timeout=remaining)
+                    workers[pid] = worker_status
+            except BrokenProcessPool as e:
+                print(f"⚠️ Worker beim Warm-up abgestürzt: {e}")
+                status = "error"
+                break
+            except Exception:
+                status = "timeout"
+                break
+            if len(workers) < self.workers:
+                time.sleep(0.5)
+
+        if status is None:
+            warm = all(worker_status in ("ready", "skipped") for worker_status in workers.values())
+            status = "ready" if warm else "degraded"
+        return {
+            "status": status,
+            "workers": {str(pid): worker_status for pid, worker_status in workers.items()},
+            "duration": round(time.time() - start_time, 2),
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+            }
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _job_done(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+
+class InlinePartitionRunner:
+    """
+    Ersatz für den Pool bei PARTITION_WORKERS=0: gleiche submit()-Schnittstelle,
+    Jobs laufen synchron im aktuellen Prozess
+    """
+
+    workers = 1
+
+    def submit(self, file_path, strategy="auto", **kwargs):
+        future = Future()
+        try:
+            future.set_result(_run_partition_job(file_path, strategy, kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+_PARTITION_POOL = None
+_PARTITION_POOL_LOCK = threading.Lock()
+
+
+def get_partition_pool():
+    """
+    Prozessweiter Pool (geteilt von allen Streamlit-Sessions). None bei PARTITION_WORKERS=0.
+    """
+    global _PARTITION_POOL
+    if PARTITION_WORKERS <= 0:
+        return None
+    with _PARTITION_POOL_LOCK:
+        if _PARTITION_POOL is None:
+            try:
+                _PARTITION_POOL = PartitionPool()
+            except Exception as e:
+                print(f"⚠️ Partition-Pool konnte nicht gestartet werden: {e}")
+                return None
+        return _PARTITION_POOL
+
+
+def get_partition_runner():
+    """
+    Pool falls aktiv, sonst InlinePartitionRunner (für Seitenbereich-Jobs ohne Pool)
+    """
+    return get_partition_pool() or InlinePartitionRunner()
+
+
+def reset_partition_pool():
+    """
+    Verwirft einen defekten Pool (z.B. Worker per OOM beendet); der nächste Aufruf startet neu
+    """
+    global _PARTITION_POOL
+    with _PARTITION_POOL_LOCK:
+        if _PARTITION_POOL is not None:
+            try:
+                _PARTITION_POOL.shutdown(wait=False)
+            except Exception:
+                pass
+        _PARTITION_POOL = None
+
+
+def run_partition_job(file_path, strategy="auto", **kwargs):
+    """
+    Führt einen Partition-Job im Pool aus; Fehler werden als Ergebnis-Dict gemeldet
+    """
+    start_time = time.time()
+    pool = get_partition_pool()
+    if pool is None:
+        return None
+
+    try:
+        return pool.run(file_path, strategy, **kwargs)
+    except PoolBusyError as e:
+        return {"status": "error", "stage": "queue", "error": str(e), "processing_time": time.time() - start_time, "method": "partition_pool"}
+    except BrokenProcessPool as e:
+        reset_partition_pool()
+        return {"status": "error", "stage": "worker", "error": f"Worker-Prozess abgestürzt: {e}", "processing_time": time.time() - start_time, "method": "partition_pool"}
+    except Exception as e:
+        return {"status": "error", "stage": "worker", "error": str(e), "processing_time": time.time() - start_time, "method": "partition_pool"}
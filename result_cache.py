@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Persistenter Ergebnis-Cache für process_with_open_source_library
+Content-adressiert: Schlüssel = Datei-Hash + Strategie + effektive Partition-Parameter
+Ablage als JSON-Dateien im gemounteten cache/-Volume, Größenlimit mit LRU-Verdrängung
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+# Bei Änderungen am gespeicherten Format erhöhen -> alte Einträge werden ignoriert
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RESULT_CACHE_DIR",
+    str(Path(__file__).resolve().parent / "cache" / "results")
+)
+DEFAULT_MAX_BYTES = int(float(os.environ.get("RESULT_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+CACHE_ENABLED = os.environ.get("RESULT_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+
+def hash_file_content(file_path, chunk_size=1024 * 1024):
+    """
+    Berechnet den SHA-256 des kompletten Datei-Inhalts (blockweise, speicherschonend)
+    """
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-adressierter Cache für Partition-Ergebnisse auf Disk
+
+    - Ein Eintrag = eine JSON-Datei <key>.json (Elemente als Dicts + Ergebnis-Metadaten)
+    - Schreiben atomar über temporäre Datei + os.replace (mehrere Nutzer gleichzeitig)
+    - LRU: Treffer aktualisieren die mtime, beim Überschreiten von max_bytes
+      werden die am längsten nicht genutzten Einträge gelöscht
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, file_hash, strategy, include_tables, include_images, partition_kwargs, library_version=None):
+        """
+        Erzeugt den Cache-Schlüssel aus Datei-Hash und allen ergebnisrelevanten Parametern
+        """
+        # Dateiname/-pfad ist NICHT Teil des Schlüssels - gleicher Inhalt = gleicher Treffer
+        effective_kwargs = {k: v for k, v in (partition_kwargs or {}).items() if k not in ("filename", "file")}
+        key_material = {
+            "format_version": CACHE_FORMAT_VERSION,
+            "file_hash": file_hash,
+            "strategy": strategy,
+            "include_tables": bool(include_tables),
+            "include_images": bool(include_images),
+            "partition_kwargs": effective_kwargs,
+            "library_version": library_version,
+        }
+        serialized = json.dumps(key_material, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        """
+        Liefert den gespeicherten Eintrag ({"elements": [...], "meta": {...}}) oder None
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("format_version") != CACHE_FORMAT_VERSION:
+                raise ValueError("Veraltetes Cache-Format")
+            # LRU: Zugriffszeitpunkt merken
+            os.utime(path, None)
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+        except Exception as e:
+            print(f"⚠️ Cache-Eintrag {key[:12]} unlesbar, wird verworfen: {e}")
+            self._remove(path)
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        return entry
+
+    def put(self, key, element_dicts, meta):
+        """
+        Speichert einen Eintrag atomar und verdrängt bei Bedarf alte Einträge
+        element_dicts: Liste oder Iterable (wird Element für Element geschrieben)
+        """
+        header = {
+            "format_version": CACHE_FORMAT_VERSION,
+            "created": time.time(),
+            "meta": meta,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                # Gleiches JSON wie json.dump(entry) - die Elemente aber ohne vollständige Liste im RAM
+                f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':'), default=str)[:-1])
+                f.write(',"elements":[')
+                for index, element_dict in enumerate(element_dicts):
+                    if index:
+                        f.write(",")
+                    json.dump(element_dict, f, ensure_ascii=False, separators=(',', ':'), default=str)
+                f.write("]}")
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            self._remove(Path(tmp_path))
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """
+        LRU-Verdrängung: löscht die ältesten Einträge bis die Gesamtgröße unter max_bytes liegt
+        """
+        entries = []
+        total_bytes = 0
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {"cache_hits": self.hits, "cache_misses": self.misses}
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _remove(path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+_RESULT_CACHE = None
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Prozessweiter Cache (geteilt von allen Streamlit-Sessions). None wenn deaktiviert.
+    """
+    global _RESULT_CACHE
+    if not CACHE_ENABLED:
+        return None
+    with _RESULT_CACHE_LOCK:
+        if _RESULT_CACHE is None:
+            try:
+                _RESULT_CACHE = ResultCache()
+            except Exception as e:
+                print(f"⚠️ Ergebnis-Cache nicht verfügbar: {e}")
+                return None
+        return _RESULT_CACHE
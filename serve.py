@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Container-Prozess: Prozess-Pool + Modell-Warm-up + Job-API + Streamlit in EINEM Prozess
+Der Partition-Pool gehört zu dem Prozess, der die Jobs einreiht. Deshalb wird er hier
+beim Boot gestartet und vorgewärmt - die Streamlit-Sessions und die Job-API (Thread,
+JOB_API_ENABLED) im selben Prozess nutzen genau diesen einen Pool
+(processing_pool.get_partition_pool), statt ihn erst beim ersten Seitenaufruf kalt
+bzw. für die API ein zweites Mal zu starten.
+
+- Pool aktiv:         alle Worker starten und laden die Modelle (Initializer, warmup.py);
+                      logs/ready.json erst, wenn jeder Worker seinen Warm-up gemeldet hat
+- PARTITION_WORKERS=0: Warm-up läuft in diesem Prozess (Inline-Verarbeitung der Sessions)
+- WARMUP_ENABLED=0:   Marker sofort ("skipped"), Worker starten trotzdem im Hintergrund
+
+Aufruf (docker-entrypoint.sh):
+    python3 serve.py --server.port=8501 --server.address=0.0.0.0
+    (alle Argumente gehen unverändert an "streamlit run")
+"""
+
+import os
+import sys
+import time
+import threading
+from pathlib import Path
+
+APP_DIR = str(Path(__file__).resolve().parent)
+APP_SCRIPT = os.path.join(APP_DIR, "app_open_source_recovered.py")
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "1").lower() not in ("0", "false", "no")
+JOB_API_ENABLED = os.environ.get("JOB_API_ENABLED", "1").lower() not in ("0", "false", "no")
+
+
+def warm_up_at_boot():
+    """
+    Startet/wärmt den Pool bzw. diesen Prozess und schreibt danach den Bereitschafts-Marker
+    """
+    from processing_pool import get_partition_pool
+    from warmup import run_warmup, write_ready_marker
+
+    start_time = time.time()
+    partition_pool = get_partition_pool()
+
+    if not WARMUP_ENABLED:
+        if partition_pool is not None:
+            partition_pool.start_workers()
+        report = {"status": "skipped", "pid": os.getpid(), "started": start_time, "steps": {}, "duration": 0}
+    elif partition_pool is not None:
+        print(f"🔥 Warm-up: starte {partition_pool.workers} Partition-Worker...")
+        pool_report = partition_pool.warm_up()
+        report = {
+            "status": pool_report["status"],
+            "mode": "pool",
+            "pid": os.getpid(),
+            "started": start_time,
+            "workers": pool_report["workers"],
+            "steps": {},
+            "duration": pool_report["duration"],
+        }
+    else:
+        print("🔥 Warm-up: lade Layout-, Tabellen- und OCR-Modelle (inline)...")
+        report = dict(run_warmup(exercise=True), mode="inline")
+
+    print(f"{'✅' if report['status'] in ('ready', 'skipped') else '⚠️'} Warm-up {report['status']} nach {report['duration']}s")
+    try:
+        write_ready_marker(report)
+    except Exception as e:
+        print(f"❌ Bereitschafts-Marker konnte nicht geschrieben werden: {e}")
+
+
+def main():
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    # Warm-up im Hintergrund - Streamlit ist sofort erreichbar, der Healthcheck wartet auf den Marker
+    threading.Thread(target=warm_up_at_boot, name="warmup", daemon=True).start()
+
+    if JOB_API_ENABLED:
+        try:
+            from job_api import start_in_background
+            start_in_background()
+        except Exception as e:
+            print(f"⚠️ Job-API konnte nicht gestartet werden: {e}")
+
+    from streamlit.web import cli as streamlit_cli
+
+    sys.argv = ["streamlit", "run", APP_SCRIPT, *sys.argv[1:]]
+    sys.exit(streamlit_cli.main())
+
+
+if __name__ == "__main__":
+    main()
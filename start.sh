@@ -15,6 +15,9 @@ echo "🛑 Stoppe alte Container..."
 docker compose down 2>/dev/null || docker-compose down 2>/dev/null
 echo ""
 
+# Alten Bereitschafts-Marker entfernen (wird nach dem Warm-up neu geschrieben)
+rm -f logs/ready.json
+
 # Starte Container
 echo "▶️  Starte Container..."
 docker compose up -d 2>/dev/null || docker-compose up -d 2>/dev/null
@@ -35,6 +38,30 @@ while [ $COUNTER -lt $MAX_WAIT ]; do
 done
 echo ""
 
+# Warte auf Modell-Warm-up (YOLOX, Table Transformer, Tesseract)
+echo "🔥 Warte auf Modell-Warm-up..."
+COUNTER=0
+MAX_WAIT=600
+while [ $COUNTER -lt $MAX_WAIT ]; do
+    if [ -f logs/ready.json ]; then
+        WARMUP_STATUS=$(grep -o '"status": "[a-z]*"' logs/ready.json | head -1 | cut -d'"' -f4)
+        if [ "$WARMUP_STATUS" = "ready" ] || [ "$WARMUP_STATUS" = "skipped" ]; then
+            echo "✅ Modelle geladen - erste Anfrage ohne Kaltstart!"
+        else
+            echo "⚠️  Warm-up unvollständig ($WARMUP_STATUS) - Details: logs/ready.json"
+        fi
+        break
+    fi
+    echo -n "."
+    sleep 5
+    COUNTER=$((COUNTER + 5))
+done
+if [ ! -f logs/ready.json ]; then
+    echo ""
+    echo "⚠️  Warm-up nach ${MAX_WAIT}s nicht abgeschlossen - Logs: docker compose logs -f"
+fi
+echo ""
+
 VM_IP=$(hostname -I | awk '{print $1}')
 echo "============================================"
 echo "✅ Anwendung läuft!"
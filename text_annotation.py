@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Hervorhebungen (emphasized_text_contents) und Links (link_texts/link_urls) in einem Durchlauf annotieren
+Statt pro Eintrag display_text.replace(...) aufzurufen (quadratisch bei vielen Hervorhebungen,
+bereits eingefügtes Markup wird erneut umschlossen), findet ein Aho-Corasick-Automat alle
+Vorkommen aller Muster in EINEM Scan über den Text:
+- Überlappende Treffer: der am weitesten links beginnende, bei Gleichstand der längste gewinnt
+- Die Ausgabe entsteht in einem einzigen Links-nach-rechts-Aufbau aus dem Originaltext
+
+Benchmark (naiv vs. Automat bei wachsender Absatzlänge):
+    python text_annotation.py --benchmark
+"""
+
+import argparse
+import time
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Multi-Pattern-Automat: alle Vorkommen aller Muster in O(Textlänge + Treffer)
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # Node -> Indizes der Muster, die hier enden (inkl. Suffix-Treffer)
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append(index)
+
+        # Fehler-Links per Breitensuche
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text):
+        """
+        Yields:
+            (start, end, Muster-Index) für jedes Vorkommen
+        """
+        node = 0
+        goto = self._goto
+        fail = self._fail
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in self._out[node]:
+                yield position + 1 - len(self.patterns[index]), position + 1, index
+
+
+def select_spans(matches):
+    """
+    Nicht überlappende Treffer: am weitesten links beginnend, bei Gleichstand der längste
+    """
+    spans = []
+    covered_until = 0
+    for start, end, index in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+        if start >= covered_until:
+            spans.append((start, end, index))
+            covered_until = end
+    return spans
+
+
+def annotate_text(text, emphasized=(), links=(), render_emphasis=None, render_link=None, escape=None):
+    """
+    Annotiert Hervorhebungen und Links in einem Scan und baut die Ausgabe einmal von links nach rechts
+
+    Args:
+        text: Originaltext
+        emphasized: Hervorgehobene Textstellen (emphasized_text_contents)
+        links: Liste von (Linktext, URL) - gefundene Linktexte werden inline verlinkt
+        render_emphasis: f(segment) -> Markup
+        render_link: f(segment, url) -> Markup (segment ist ggf. schon hervorgehoben)
+        escape: f(text) -> Text für nicht annotierte Abschnitte (Standard: unverändert)
+
+    Returns:
+        (annotierter Text, Menge der Indizes aus links, die inline gesetzt wurden)
+    """
+    escape = escape or (lambda segment: segment)
+    render_emphasis = render_emphasis or (lambda segment: segment)
+    render_link = render_link or (lambda segment, url: segment)
+
+    # Muster -> (hervorgehoben?, Link-Index oder None); erster Link je Text gewinnt
+    payloads = {}
+    for pattern in emphasized or ():
+        if pattern and isinstance(pattern, str):
+            payloads[pattern] = (True, None)
+    for link_index, (link_text, _) in enumerate(links or ()):
+        if link_text and isinstance(link_text, str):
+            emphasis, current = payloads.get(link_text, (False, None))
+            payloads[link_text] = (emphasis, current if current is not None else link_index)
+
+    if not text or not payloads:
+        return escape(text or ""), set()
+
+    patterns = list(payloads)
+    spans = select_spans(AhoCorasick(patterns).iter_matches(text))
+
+    parts = []
+    linked = set()
+    position = 0
+    for start, end, index in spans:
+        parts.append(escape(text[position:start]))
+        segment = escape(text[start:end])
+        emphasis, link_index = payloads[patterns[index]]
+        if emphasis:
+            segment = render_emphasis(segment)
+        if link_index is not None:
+            segment = render_link(segment, links[link_index][1])
+            linked.add(link_index)
+        parts.append(segment)
+        position = end
+    parts.append(escape(text[position:]))
+    return "".join(parts), linked
+
+
+def _annotate_naive(text, emphasized):
+    """
+    Bisheriges Verfahren (nur für den Benchmark): ein replace() pro Hervorhebung
+    """
+    for emph_text in emphasized:
+        if emph_text in text:
+            text = text.replace(emph_text, f"<strong>{emph_text}</strong>")
+    return text
+
+
+def run_benchmark(sizes=(1_000, 4_000, 16_000, 64_000, 128_000), repeat=3):
+    """
+    Vergleicht naiv vs. Automat: Absatz aus size Zeichen, jedes 7. Wortpaar ist hervorgehoben
+    (Anzahl Hervorhebungen wächst mit der Absatzlänge - wie bei stark formatierten DOCX/HTML)
+    """
+    import random
+
+    random.seed(42)
+    words = [f"wort{i}" for i in range(5000)]
+    print(f"{'Zeichen':>8} {'Muster':>7} {'naiv [ms]':>10} {'Automat [ms]':>13} {'Faktor':>7}")
+    for size in sizes:
+        tokens = []
+        length = 0
+        while length < size:
+            word = random.choice(words)
+            tokens.append(word)
+            length += len(word) + 1
+        text = " ".join(tokens)
+        emphasized = sorted({" ".join(tokens[i:i + 2]) for i in range(0, len(tokens) - 1, 7)})
+
+        def measure(func):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - start)
+            return best * 1000
+
+        naive_ms = measure(lambda: _annotate_naive(text, emphasized))
+        automaton_ms = measure(lambda: annotate_text(text, emphasized, render_emphasis=lambda s: f"<strong>{s}</strong>"))
+        print(f"{len(text):>8} {len(emphasized):>7} {naive_ms:>10.1f} {automaton_ms:>13.1f} {naive_ms / max(automaton_ms, 1e-9):>6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hervorhebungen/Links in einem Durchlauf annotieren")
+    parser.add_argument("--benchmark", action="store_true", help="Micro-Benchmark naiv vs. Aho-Corasick")
+    args = parser.parse_args()
+    if args.benchmark:
+        run_benchmark()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
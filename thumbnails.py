@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Thumbnail-Cache für die Bild-Galerie
+Bilder werden einmal verkleinert und unter "<Bild-Hash>_<Kantenlänge>" auf Disk
+abgelegt (cache/thumbnails) - die Galerie überträgt nur noch kleine Vorschaubilder,
+das Original wird erst beim Öffnen/Download eines Bildes aus dem Bild-Speicher geladen.
+
+Konfiguration (Umgebungsvariablen):
+- THUMBNAIL_DIR:          Ablageverzeichnis (Standard: cache/thumbnails)
+- THUMBNAIL_MAX_PX:       Maximale Kantenlänge der Vorschaubilder
+- THUMBNAIL_MAX_MB:       Größenlimit, darüber LRU-Verdrängung
+- THUMBNAIL_JPEG_QUALITY: JPEG-Qualität (Bilder ohne Transparenz)
+"""
+
+import io
+import os
+import threading
+from pathlib import Path
+
+from image_store import BlobStore, get_image_bytes, get_image_hash
+
+THUMBNAIL_DIR = os.environ.get(
+    "THUMBNAIL_DIR",
+    str(Path(__file__).resolve().parent / "cache" / "thumbnails")
+)
+THUMBNAIL_MAX_PX = int(os.environ.get("THUMBNAIL_MAX_PX", "256"))
+THUMBNAIL_MAX_BYTES = int(float(os.environ.get("THUMBNAIL_MAX_MB", "256")) * 1024 * 1024)
+THUMBNAIL_JPEG_QUALITY = int(os.environ.get("THUMBNAIL_JPEG_QUALITY", "80"))
+
+_THUMBNAIL_STORE = None
+_THUMBNAIL_STORE_LOCK = threading.Lock()
+
+
+def get_thumbnail_store():
+    """
+    Prozessweiter Thumbnail-Speicher (None, wenn das Verzeichnis nicht anlegbar ist)
+    """
+    global _THUMBNAIL_STORE
+    with _THUMBNAIL_STORE_LOCK:
+        if _THUMBNAIL_STORE is None:
+            try:
+                _THUMBNAIL_STORE = BlobStore(THUMBNAIL_DIR, THUMBNAIL_MAX_BYTES)
+            except Exception as e:
+                print(f"⚠️ Thumbnail-Cache nicht verfügbar: {e}")
+                return None
+        return _THUMBNAIL_STORE
+
+
+def _mime_type(data):
+    return "image/png" if data.startswith(b"\x89PNG") else "image/jpeg"
+
+
+def make_thumbnail(data, max_px=THUMBNAIL_MAX_PX):
+    """
+    Verkleinert ein Bild auf max_px Kantenlänge (Seitenverhältnis bleibt)
+    JPEG ohne Transparenz, sonst PNG
+
+    Returns:
+        (thumbnail_bytes, mime_type)
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        # JPEG: direkt in reduzierter Auflösung dekodieren (deutlich schneller bei Fotos)
+        img.draft(img.mode, (max_px, max_px))
+        img.thumbnail((max_px, max_px))
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+        out = io.BytesIO()
+        if has_alpha:
+            img.convert("RGBA").save(out, format="PNG", optimize=True)
+        else:
+            img.convert("RGB").save(out, format="JPEG", quality=THUMBNAIL_JPEG_QUALITY, optimize=True)
+    data = out.getvalue()
+    return data, _mime_type(data)
+
+
+def get_thumbnail(element_or_metadata, max_px=THUMBNAIL_MAX_PX):
+    """
+    Liefert das Vorschaubild eines Bild-Elements (aus dem Cache oder neu erzeugt)
+
+    Returns:
+        {"bytes", "mime_type", "cached"} oder None (kein Bild / nicht lesbar)
+    """
+    image_hash = get_image_hash(element_or_metadata)
+    if image_hash is None:
+        return None
+
+    store = get_thumbnail_store()
+    key = f"{image_hash}_{max_px}"
+    if store is not None:
+        data = store.get(key)
+        if data is not None:
+            return {"bytes": data, "mime_type": _mime_type(data), "cached": True}
+
+    original = get_image_bytes(element_or_metadata)
+    if original is None:
+        return None
+    try:
+        data, mime_type = make_thumbnail(original, max_px)
+    except Exception as e:
+        print(f"⚠️ Thumbnail für Bild {image_hash[:12]} fehlgeschlagen: {e}")
+        return None
+
+    if store is not None:
+        try:
+            store.put(data, blob_id=key)
+        except Exception as e:
+            print(f"⚠️ Thumbnail konnte nicht gespeichert werden: {e}")
+    return {"bytes": data, "mime_type": mime_type, "cached": False}
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Persistenter Cache für Vision-LLM Bildbeschreibungen (SQLite im logs/-Volume)
+Schlüssel = Bild-Hash (SHA-256 des Inhalts) + Provider/Modell + Prompt-Version:
+dasselbe Bild wird bei erneutem Export oder erneutem Upload nicht noch einmal bezahlt.
+
+- Einträge älter als VISION_CACHE_TTL_DAYS gelten als abgelaufen
+- Über VISION_CACHE_MAX_ENTRIES werden die am längsten nicht genutzten Einträge gelöscht
+- Treffer-/Fehlschlag-Zähler und eingesparte Kosten pro Prozess (stats())
+
+Konfiguration (Umgebungsvariablen):
+- VISION_CACHE_PATH:        SQLite-Datei (Standard: logs/vision_cache.sqlite3)
+- VISION_CACHE_TTL_DAYS:    Gültigkeit eines Eintrags in Tagen (0 = unbegrenzt)
+- VISION_CACHE_MAX_ENTRIES: Maximale Anzahl Einträge
+- VISION_CACHE_ENABLED:     0 = Cache aus
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+VISION_CACHE_PATH = os.environ.get(
+    "VISION_CACHE_PATH",
+    str(Path(__file__).resolve().parent / "logs" / "vision_cache.sqlite3")
+)
+VISION_CACHE_TTL = float(os.environ.get("VISION_CACHE_TTL_DAYS", "90")) * 86400
+VISION_CACHE_MAX_ENTRIES = int(os.environ.get("VISION_CACHE_MAX_ENTRIES", "50000"))
+VISION_CACHE_ENABLED = os.environ.get("VISION_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS descriptions (
+    image_hash     TEXT NOT NULL,
+    provider       TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    description    TEXT NOT NULL,
+    model          TEXT,
+    cost_estimate  REAL NOT NULL DEFAULT 0,
+    created        REAL NOT NULL,
+    last_used      REAL NOT NULL,
+    PRIMARY KEY (image_hash, provider, prompt_version)
+);
+CREATE INDEX IF NOT EXISTS idx_descriptions_last_used ON descriptions (last_used);
+"""
+
+
+class VisionCache:
+    """
+    SQLite-Cache für Bildbeschreibungen
+
+    Eine Verbindung pro Zugriff (Streamlit-Sessions laufen in eigenen Threads),
+    WAL-Modus, damit Lesen und Schreiben aus mehreren Prozessen parallel gehen.
+    """
+
+    def __init__(self, path=VISION_CACHE_PATH, ttl=VISION_CACHE_TTL, max_entries=VISION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.cost_saved = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Transaktion pro Block (commit/rollback), Verbindung danach schließen
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, image_hash, provider, prompt_version):
+        """
+        Liefert {"description", "model", "cost_estimate", "created"} oder None
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT description, model, cost_estimate, created FROM descriptions "
+                "WHERE image_hash = ? AND provider = ? AND prompt_version = ?",
+                (image_hash, provider, prompt_version),
+            ).fetchone()
+            if row is not None and self.ttl and now - row[3] > self.ttl:
+                conn.execute(
+                    "DELETE FROM descriptions WHERE image_hash = ? AND provider = ? AND prompt_version = ?",
+                    (image_hash, provider, prompt_version),
+                )
+                row = None
+            if row is not None:
+                conn.execute(
+                    "UPDATE descriptions SET last_used = ? "
+                    "WHERE image_hash = ? AND provider = ? AND prompt_version = ?",
+                    (now, image_hash, provider, prompt_version),
+                )
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.cost_saved += row[2]
+        return {"description": row[0], "model": row[1], "cost_estimate": row[2], "created": row[3]}
+
+    def put(self, image_hash, provider, prompt_version, description, model=None, cost_estimate=0.0):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO descriptions "
+                "(image_hash, provider, prompt_version, description, model, cost_estimate, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (image_hash, provider, prompt_version, description, model, cost_estimate, now, now),
+            )
+        self.evict()
+
+    def evict(self):
+        """
+        Löscht abgelaufene Einträge und - über max_entries - die am längsten nicht genutzten
+
+        Returns:
+            Anzahl gelöschter Einträge
+        """
+        removed = 0
+        with self._connect() as conn:
+            if self.ttl:
+                removed += conn.execute(
+                    "DELETE FROM descriptions WHERE created < ?", (time.time() - self.ttl,)
+                ).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM descriptions").fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM descriptions WHERE rowid IN "
+                    "(SELECT rowid FROM descriptions ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+        return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "cost_saved": round(self.cost_saved, 4),
+            }
+
+
+_VISION_CACHE = None
+_VISION_CACHE_LOCK = threading.Lock()
+
+
+def get_vision_cache():
+    """
+    Prozessweiter Cache (geteilt von allen Streamlit-Sessions). None wenn deaktiviert.
+    """
+    global _VISION_CACHE
+    if not VISION_CACHE_ENABLED:
+        return None
+    with _VISION_CACHE_LOCK:
+        if _VISION_CACHE is None:
+            try:
+                _VISION_CACHE = VisionCache()
+            except Exception as e:
+                print(f"⚠️ Vision-Cache nicht verfügbar: {e}")
+                return None
+        return _VISION_CACHE
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Nebenläufige, ratenbegrenzte Ausführung von Vision-Bildbeschreibungen
+Statt Bild für Bild im Element-Loop werden alle Bilder eines Exports gesammelt
+und parallel beschrieben:
+- höchstens VISION_CONCURRENCY Anfragen gleichzeitig
+- höchstens VISION_RPM Anfragen pro Minute (gleichmäßig verteilt)
+- Wiederholung mit exponentiellem Backoff + Jitter (VISION_MAX_RETRIES) - nur bei Drosselung
+  und vorübergehenden Fehlern (429, 408, 5xx, Timeout/Verbindung), Retry-After des Providers
+  wird beachtet; Auth-, Validierungs- und Bildfehler schlagen sofort fehl
+- Kostenobergrenze pro Export (VISION_BUDGET_USD) - danach werden Bilder übersprungen
+- Cache-Treffer (vision_cache) zählen weder gegen Rate-Limit noch Budget
+
+Die Provider-SDKs (anthropic, openai) lesen ANTHROPIC_BASE_URL / OPENAI_BASE_URL -
+damit lässt sich der Executor gegen einen lokalen Stub-Server testen.
+
+Konfiguration (Umgebungsvariablen):
+- VISION_CONCURRENCY:  Parallele Anfragen
+- VISION_RPM:          Anfragen pro Minute (0 = unbegrenzt)
+- VISION_MAX_RETRIES:  Wiederholungen pro Bild nach einem Fehler
+- VISION_BACKOFF_BASE: Wartezeit vor der ersten Wiederholung in Sekunden (verdoppelt sich)
+- VISION_MAX_RETRY_AFTER: Obergrenze für ein vom Provider verlangtes Retry-After in Sekunden
+- VISION_BUDGET_USD:   Kostenobergrenze pro Export (0 = unbegrenzt)
+"""
+
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+VISION_CONCURRENCY = int(os.environ.get("VISION_CONCURRENCY", "8"))
+VISION_RPM = float(os.environ.get("VISION_RPM", "120"))
+VISION_MAX_RETRIES = int(os.environ.get("VISION_MAX_RETRIES", "3"))
+VISION_BACKOFF_BASE = float(os.environ.get("VISION_BACKOFF_BASE", "1.0"))
+VISION_MAX_RETRY_AFTER = float(os.environ.get("VISION_MAX_RETRY_AFTER", "60"))
+VISION_BUDGET_USD = float(os.environ.get("VISION_BUDGET_USD", "5.0"))
+
+
+RETRYABLE_STATUS = {408, 429}
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error):
+    """
+    Drosselung (429), Timeout (408), Serverfehler (5xx) und Verbindungs-/Timeout-Fehler ohne
+    HTTP-Status (SDK-Klassen wie APIConnectionError/APITimeoutError) - alles andere nicht
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def retry_after(error):
+    """
+    Vom Provider verlangte Wartezeit in Sekunden (Retry-After / retry-after-ms) oder None
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(0.0, float(value) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class RateLimiter:
+    """
+    Verteilt Anfragen gleichmäßig: mindestens 60/rpm Sekunden zwischen zwei Starts
+    """
+
+    def __init__(self, rpm):
+        self.interval = 60.0 / rpm if rpm and rpm > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class CostBudget:
+    """
+    Kostenobergrenze: Anfragen reservieren ihre geschätzten Kosten vorab,
+    nach der Antwort wird mit den tatsächlichen Kosten abgerechnet
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.reserved = 0.0
+        self.spent = 0.0
+        self._lock = threading.Lock()
+
+    def try_reserve(self, amount):
+        with self._lock:
+            if self.limit and self.spent + self.reserved + amount > self.limit + 1e-9:
+                return False
+            self.reserved += amount
+            return True
+
+    def settle(self, reserved, actual):
+        with self._lock:
+            self.reserved -= reserved
+            self.spent += actual
+
+
+def run_vision_jobs(jobs, lookup, call, cost_per_request=0.0, concurrency=VISION_CONCURRENCY,
+                    rpm=VISION_RPM, max_retries=VISION_MAX_RETRIES, backoff_base=VISION_BACKOFF_BASE,
+                    budget=VISION_BUDGET_USD):
+    """
+    Beschreibt alle Bilder nebenläufig
+
+    Args:
+        jobs: Liste von Dicts mit mindestens "key" (eindeutig)
+        lookup: job -> Ergebnis-Dict oder None (Cache, ohne Rate-Limit/Budget)
+        call: job -> Ergebnis-Dict mit "cost_estimate"; wirft bei Fehlern (vorübergehende werden
+              wiederholt, siehe is_retryable)
+        cost_per_request: geschätzte Kosten pro Anfrage (für die Budget-Reservierung)
+
+    Returns:
+        {"results": {key: Ergebnis-Dict}, "stats": {...}}
+        Übersprungene/fehlgeschlagene Bilder: {"error": ..., "skipped": "budget"|None}
+    """
+    start_time = time.time()
+    limiter = RateLimiter(rpm)
+    cost_budget = CostBudget(budget)
+    counters = {"requests": 0, "retries": 0, "failed": 0, "skipped_budget": 0, "cache_hits": 0}
+    counters_lock = threading.Lock()
+
+    def count(name):
+        with counters_lock:
+            counters[name] += 1
+
+    def run(job):
+        try:
+            cached = lookup(job)
+        except Exception as e:
+            print(f"⚠️ Vision-Cache Lookup fehlgeschlagen: {e}")
+            cached = None
+        if cached is not None:
+            count("cache_hits")
+            return cached
+
+        if not cost_budget.try_reserve(cost_per_request):
+            count("skipped_budget")
+            return {"error": "Vision-Budget erschöpft", "skipped": "budget"}
+
+        last_error = None
+        attempts = 0
+        for attempt in range(max_retries + 1):
+            if attempt:
+                count("retries")
+                # Exponentielles Backoff mit Jitter, damit parallele Wiederholungen sich verteilen;
+                # ein Retry-After des Providers hat Vorrang, falls länger
+                delay = backoff_base * (2 ** (attempt - 1)) * (0.5 + random.random())
+                requested = retry_after(last_error)
+                if requested is not None:
+                    delay = max(delay, min(requested, VISION_MAX_RETRY_AFTER))
+                time.sleep(delay)
+            limiter.acquire()
+            count("requests")
+            attempts = attempt + 1
+            try:
+                result = call(job)
+                cost_budget.settle(cost_per_request, result.get("cost_estimate", 0.0))
+                result["attempts"] = attempts
+                return result
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e):
+                    break
+        cost_budget.settle(cost_per_request, 0.0)
+        count("failed")
+        return {"error": str(last_error), "skipped": None, "attempts": attempts}
+
+    results = {}
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(jobs))), thread_name_prefix="vision") as executor:
+            for job, result in zip(jobs, executor.map(run, jobs)):
+                results[job["key"]] = result
+
+    stats = dict(counters)
+    stats.update(
+        images=len(jobs),
+        spent=round(cost_budget.spent, 4),
+        budget=budget or None,
+        concurrency=concurrency,
+        rpm=rpm or None,
+        duration=round(time.time() - start_time, 3),
+    )
+    return {"results": results, "stats": stats}
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Modell-Warm-up beim Container-Start
+Lädt YOLOX (Layout), Table Transformer und die Tesseract-Sprachdaten einmal und
+verarbeitet ein winziges Beispiel-PDF mit hi_res, damit die erste echte Anfrage
+nach einem Neustart keinen Kaltstart zahlt.
+
+Ergebnis: Bereitschafts-Marker logs/ready.json (von start.sh und dem
+docker-compose Healthcheck abgefragt). Beim Container-Start schreibt ihn serve.py,
+sobald alle Partition-Worker (processing_pool) diesen Warm-up gemeldet haben bzw.
+der Streamlit-Prozess selbst gewärmt ist (PARTITION_WORKERS=0).
+
+Aufruf:
+    python3 warmup.py            # Warm-up in diesem Prozess ausführen, Marker schreiben (manuell)
+    python3 warmup.py --check    # Exit-Code 0, wenn Streamlit läuft und der Marker existiert
+    python3 warmup.py --skip     # Nur Marker schreiben (WARMUP_ENABLED=0)
+
+Konfiguration (Umgebungsvariablen):
+- WARMUP_READY_FILE: Pfad des Bereitschafts-Markers
+- WARMUP_LANGUAGES:  OCR-Sprachen, die vorhanden sein müssen (Komma-getrennt)
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from pathlib import Path
+
+APP_DIR = str(Path(__file__).resolve().parent)
+
+WARMUP_READY_FILE = os.environ.get("WARMUP_READY_FILE", os.path.join(APP_DIR, "logs", "ready.json"))
+WARMUP_LANGUAGES = [lang.strip() for lang in os.environ.get("WARMUP_LANGUAGES", "deu,eng").split(",") if lang.strip()]
+STREAMLIT_HEALTH_URL = "http://localhost:8501/_stcore/health"
+
+
+def build_sample_pdf():
+    """
+    Erzeugt ein einseitiges PDF mit Überschrift, Absatz und einer 3x3-Tabelle
+    (ohne Zusatz-Bibliotheken, damit das Beispiel nicht als Binärdatei im Repo liegt)
+    """
+    commands = [
+        "BT /F1 18 Tf 72 770 Td (Warm-up Beispieldokument) Tj ET",
+        "BT /F1 11 Tf 72 745 Td (Dieses Dokument laedt Layout-, Tabellen- und OCR-Modelle vor.) Tj ET",
+        "0.8 w",
+    ]
+    # Tabellen-Gitter: 3 Zeilen x 3 Spalten
+    left, top, col_width, row_height = 72, 710, 140, 28
+    for row in range(4):
+        y = top - row * row_height
+        commands.append(f"{left} {y} m {left + 3 * col_width} {y} l S")
+    for col in range(4):
+        x = left + col * col_width
+        commands.append(f"{x} {top} m {x} {top - 3 * row_height} l S")
+    cells = [["Modell", "Zweck", "Status"], ["YOLOX", "Layout", "geladen"], ["Tesseract", "OCR deu+eng", "geladen"]]
+    for row, values in enumerate(cells):
+        for col, value in enumerate(values):
+            x = left + col * col_width + 6
+            y = top - (row + 1) * row_height + 9
+            commands.append(f"BT /F1 10 Tf {x} {y} Td ({value}) Tj ET")
+    content = "\n".join(commands).encode("latin-1")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(pdf)
+
+
+def _load_layout_model():
+    from unstructured.partition.model_init import initialize
+    initialize()
+
+
+def _load_table_model():
+    from unstructured_inference.models.tables import load_agent
+    load_agent()
+
+
+def _check_ocr_languages():
+    import pytesseract
+    available = set(pytesseract.get_languages(config=""))
+    missing = [lang for lang in WARMUP_LANGUAGES if lang not in available]
+    if missing:
+        raise RuntimeError(f"Tesseract-Sprachdaten fehlen: {', '.join(missing)}")
+    return sorted(available & set(WARMUP_LANGUAGES))
+
+
+def _exercise_sample():
+    """
+    Verarbeitet das Beispiel-PDF über denselben Pfad wie echte Anfragen (hi_res + Tabellen + OCR)
+    """
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    import app_open_source_recovered as app
+
+    with tempfile.TemporaryDirectory(prefix="warmup_") as temp_dir:
+        sample_path = os.path.join(temp_dir, "warmup_sample.pdf")
+        with open(sample_path, "wb") as f:
+            f.write(build_sample_pdf())
+        result = app._process_uncached(sample_path, "hi_res", include_tables=True, include_images=True)
+    if result.get("status") != "success":
+        raise RuntimeError(result.get("error", "Beispiel-Verarbeitung fehlgeschlagen"))
+    return {"elements": result.get("element_count"), "method": result.get("method")}
+
+
+def run_warmup(exercise=True):
+    """
+    Führt alle Warm-up-Schritte aus; Fehler einzelner Schritte brechen nicht ab
+
+    Returns:
+        {"status": "ready"|"degraded", "steps": {name: {"ok", "seconds", ...}}, "duration", ...}
+    """
+    start_time = time.time()
+    steps = [
+        ("layout_model", _load_layout_model),
+        ("table_model", _load_table_model),
+        ("ocr_languages", _check_ocr_languages),
+    ]
+    if exercise:
+        steps.append(("sample_hi_res", _exercise_sample))
+
+    report = {"status": "ready", "pid": os.getpid(), "started": start_time, "steps": {}}
+    for name, step in steps:
+        step_start = time.time()
+        try:
+            details = step()
+            report["steps"][name] = {"ok": True, "seconds": round(time.time() - step_start, 2)}
+            if details is not None:
+                report["steps"][name]["details"] = details
+        except Exception as e:
+            print(f"⚠️ Warm-up Schritt '{name}' fehlgeschlagen: {e}")
+            report["steps"][name] = {"ok": False, "seconds": round(time.time() - step_start, 2), "error": str(e)}
+            report["status"] = "degraded"
+
+    report["duration"] = round(time.time() - start_time, 2)
+    return report
+
+
+def write_ready_marker(report, path=WARMUP_READY_FILE):
+    """
+    Schreibt den Bereitschafts-Marker atomar (Leser sehen nie eine halbe Datei)
+    """
+    report = dict(report, finished=time.time())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".ready_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def read_ready_marker(path=WARMUP_READY_FILE):
+    """
+    Liefert den Inhalt des Bereitschafts-Markers oder None (Warm-up läuft noch)
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def check_ready():
+    """
+    Bereit = Streamlit antwortet UND der Warm-up ist abgeschlossen
+    """
+    import urllib.request
+
+    if read_ready_marker() is None:
+        return False
+    try:
+        with urllib.request.urlopen(STREAMLIT_HEALTH_URL, timeout=5) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modell-Warm-up und Bereitschafts-Marker")
+    parser.add_argument("--check", action="store_true", help="Nur Bereitschaft prüfen (Exit-Code)")
+    parser.add_argument("--skip", action="store_true", help="Warm-up überspringen, Marker sofort schreiben")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check_ready() else 1)
+
+    if args.skip:
+        report = {"status": "skipped", "pid": os.getpid(), "started": time.time(), "steps": {}, "duration": 0}
+    else:
+        print("🔥 Warm-up: lade Layout-, Tabellen- und OCR-Modelle...")
+        report = run_warmup(exercise=True)
+        print(f"{'✅' if report['status'] == 'ready' else '⚠️'} Warm-up {report['status']} nach {report['duration']}s")
+
+    try:
+        write_ready_marker(report)
+    except Exception as e:
+        print(f"❌ Bereitschafts-Marker konnte nicht geschrieben werden: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()